@@ -0,0 +1,550 @@
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+from batch_controller import AdaptiveBatchController, wal_size
+from cascade_planner import CascadePlanner, key_alias, key_column, reference_guard
+from column_profiler import quote_identifier
+from legal_hold import HOLDS_SCHEMA, LegalHoldRegistry, held_condition, held_keys_sql, hold_column
+from purge_journal import PurgeJournal
+from retention_manager import RetentionManager
+from retention_sql import predicate_for_table
+from schema_catalog import TableInfo, load_schema_catalog
+
+# Columns every archive table has ahead of the live table's own columns
+ARCHIVE_COLUMNS = ("_archive_id", "_archive_job", "_source_key")
+
+
+def _chunk_source(step: Dict) -> Tuple[str, str]:
+    """Table and key column a step's chunks are taken from"""
+    if step.get("key_set"):
+        # Keys precomputed in a temp table (cascade steps): chunk over the set itself
+        return f"temp.{step['key_set']}", "k"
+    return f"main.{quote_identifier(step['table'])}", step["key"]
+
+
+def next_chunk_sql(step: Dict, after) -> Tuple[str, List]:
+    """Lookup of the first eligible key above ``after`` (from the start when None) that opens each chunk"""
+    name, key = _chunk_source(step)
+    predicate, params = ("1", []) if step.get("key_set") else (step["predicate"], list(step["params"]))
+    if after is None:
+        return f"SELECT min({key}) FROM {name} WHERE {predicate}", params
+    return f"SELECT min({key}) FROM {name} WHERE {key} > ? AND {predicate}", [after] + params
+
+
+def chunk_filter_sql(step: Dict, lo, hi) -> Tuple[str, List]:
+    """WHERE clause (and parameters) selecting the rows of one key range to archive, before legal holds"""
+    key = step["key"]
+    bounds = "{0} >= ?" + (" AND {0} <= ?" if hi is not None else "")
+    params = [lo] + ([hi] if hi is not None else [])
+    if step.get("key_set"):
+        return f"{key} IN (SELECT k FROM temp.{step['key_set']} WHERE {bounds.format('k')})", params
+    where = f"{bounds.format(key)} AND {step['predicate']}"
+    params += list(step["params"])
+    if step.get("reference_guard"):
+        # Rows that live rows still reference stay, so no reference is left dangling
+        where += f" AND {step['reference_guard']}"
+    return where, params
+
+
+def chunk_keys_sql(step: Dict, where: str) -> str:
+    """SELECT of the keys of a chunk's rows, staged before they are copied"""
+    return f"SELECT {step['key']} FROM main.{quote_identifier(step['table'])} WHERE {where}"
+
+
+class ArchivalExecutor:
+    """Copy purge-eligible rows into an archive database, then delete them from the live one.
+
+    The archive database is ATTACHed to the live connection so every chunk
+    is moved with set-based statements over a bounded key range: each chunk
+    covers at most ``chunk_size`` consecutive keys starting at the next
+    eligible row. A transaction spanning ATTACHed databases is not atomic
+    in WAL mode, so ``chunks_per_transaction`` chunks move in two
+    transactions: the first stages their keys and copies the rows into the
+    archive and commits, the second deletes from the live table only
+    staged rows that still qualify and are present in the archive. A crash
+    in between leaves rows in both databases, never in neither. Archive
+    tables carry no key or constraint of the live table: each archived row
+    gets its own ``_archive_id`` and records the job that moved it and its
+    live key (``_source_key``), so a key reused after an earlier purge is
+    archived next to the old row instead of replacing it, and a resumed
+    job does not copy a row twice.
+    ``rows_per_second`` (when set) throttles the run between transactions.
+    Tables are processed group by group from the report's
+    ``grouped_by_priority``, in ``intra_group_priority`` order within each
+    group, so children go before their parents. Rows that live rows still
+    reference through a foreign key are left in place; with ``cascade`` a
+    referenced table is instead archived together with its dependent rows
+    (see CascadePlanner), children first.
+
+    With ``journal_path`` every chunk is recorded in a PurgeJournal within
+    the transaction that moved it, and running again with the same
+    ``job_id`` resumes the stored plan after the last committed chunk
+    (a job that already finished starts afresh under a new id instead).
+    With a ``controller`` (AdaptiveBatchController) the keys covered per
+    transaction follow its lock-hold and WAL budgets instead of staying at
+    ``chunk_size * chunks_per_transaction``.
+
+    With ``legal_hold_path`` rows held in a LegalHoldRegistry are never
+    moved: chunks whose key range holds none of a table's held keys run
+    unchanged, the others exclude held rows with an anti-join, and a
+    cascade keeps held rows together with the parent rows they reference.
+    A plan made with holds refuses to run without them.
+    """
+
+    def __init__(self, db_path: str, archive_path: str, chunk_size: int = 5_000,
+                 chunks_per_transaction: int = 4, rows_per_second: Optional[float] = None,
+                 as_of: Optional[date] = None, busy_timeout_ms: int = 5_000,
+                 retention_manager: Optional[RetentionManager] = None, cascade: bool = False,
+                 journal_path: Optional[str] = None, job_id: Optional[str] = None,
+                 controller: Optional[AdaptiveBatchController] = None,
+                 legal_hold_path: Optional[str] = None):
+        self.db_path = db_path
+        self.archive_path = archive_path
+        self.chunk_size = max(1, chunk_size)
+        self.chunks_per_transaction = max(1, chunks_per_transaction)
+        self.rows_per_second = rows_per_second
+        self.as_of = as_of or date.today()
+        self.busy_timeout_ms = busy_timeout_ms
+        self.retention_manager = retention_manager or RetentionManager()
+        self.cascade = cascade
+        self.journal = PurgeJournal(journal_path) if journal_path else None
+        self.job_id = job_id or datetime.now().strftime("job-%Y%m%d-%H%M%S")
+        self._job_name = self.job_id
+        self.controller = controller
+        self.holds = LegalHoldRegistry(legal_hold_path) if legal_hold_path else None
+        self.held_tables: Dict[str, int] = {}
+        self._holds_present: Dict[str, bool] = {}
+        self.hold_checks = {"chunks_clear": 0, "chunks_filtered": 0}
+        self._columns: Dict[str, List[str]] = {}
+        self.conn = None
+
+    @classmethod
+    def resume(cls, journal_path: str, job_id: str, **kwargs) -> Optional["ArchivalExecutor"]:
+        """Executor for a journaled job, with the databases and as-of date it was started with"""
+        journal = PurgeJournal(journal_path).open()
+        try:
+            job = journal.load_job(job_id)
+        finally:
+            journal.close()
+        if job is None:
+            print(f"ERROR: Unknown job {job_id} in {journal_path}")
+            return None
+        return cls(job["db_path"], job["archive_path"], as_of=date.fromisoformat(job["as_of"]),
+                   journal_path=journal_path, job_id=job_id, **kwargs)
+
+    def connect(self) -> sqlite3.Connection:
+        """Open the live database in autocommit mode with the archive attached"""
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.db_path, isolation_level=None)
+            self.conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+            self.conn.execute("ATTACH DATABASE ? AS archive", (self.archive_path,))
+            if self.journal is not None:
+                self.journal.attach(self.conn)
+            if self.holds is not None:
+                self.holds.attach(self.conn)
+            if self.controller is not None:
+                # Let a reset WAL shrink back, so its file size tracks the budget rather than the peak
+                limit = int(self.controller.checkpoint_fraction * self.controller.wal_budget_bytes)
+                self.conn.execute(f"PRAGMA main.journal_size_limit = {limit}")
+        return self.conn
+
+    def close(self) -> None:
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def plan_from_report(self, report: Dict, groups: Optional[List[str]] = None) -> List[Dict]:
+        """Ordered archival steps (one per table with a usable retention predicate), optionally for some groups"""
+        catalog = load_schema_catalog(self.db_path)
+        table_analysis = report.get("table_analysis", {})
+        steps = []
+        for group_name, tables in report.get("grouped_by_priority", {}).items():
+            if groups is not None and group_name not in groups:
+                continue
+            ordered = sorted(tables, key=lambda x: (x.get("intra_group_priority", 2), x.get("purge_order") or 0))
+            for entry in ordered:
+                table_name = entry["table_name"]
+                table = catalog.table(table_name)
+                if table is None:
+                    continue
+                info = table_analysis.get(table_name, {})
+                predicate, reason = predicate_for_table(
+                    self.retention_manager, table.column_names,
+                    (entry.get("rcc_classification") or {}).get("assigned_rcc"),
+                    (entry.get("retention_analysis") or {}).get("retention_lookup_columns"),
+                    info.get("column_profile"), self.as_of
+                )
+                key = key_column(table)
+                if predicate is None or key is None:
+                    print(f"WARNING: Skipping {table_name}: {reason or 'no single-column key to chunk by'}")
+                    continue
+                step = {
+                    "group": group_name,
+                    "table": table_name,
+                    "key": key,
+                    "predicate": predicate["sql"],
+                    "params": predicate["params"],
+                    "cutoff": predicate["cutoff"],
+                    "estimated_rows": (entry.get("purge_estimate") or {}).get("eligible_rows")
+                }
+                guard = reference_guard(catalog, table_name)
+                if guard:
+                    step["reference_guard"] = guard
+                if self.holds is not None:
+                    step.update(self._hold_fields(table, key))
+                steps.append(step)
+        return steps
+
+    @staticmethod
+    def _hold_fields(table: TableInfo, key: str) -> Dict:
+        """How a step matches held keys, and whether they sort like its chunk keys (so ranges can be checked)"""
+        column = hold_column(table)
+        alias = key_alias(table)
+        return {
+            "legal_holds": True,
+            "hold_column": column,
+            "hold_range": column == key or (key == "rowid" and alias is not None and column == quote_identifier(alias))
+        }
+
+    def _hold_exclusion(self, step: Dict, lo, hi) -> Optional[tuple]:
+        """Anti-join condition (and parameters) keeping held rows of a chunk, or None when none can match"""
+        if not self._holds_present.get(step["table"]):
+            return None
+        column = f"{quote_identifier(step['table'])}.{step['hold_column']}"
+        if step["hold_range"]:
+            held_keys = held_keys_sql(hi is not None)
+            bounds = [step["table"], lo] + ([hi] if hi is not None else [])
+            if self.conn.execute(f"{held_keys} LIMIT 1", bounds).fetchone() is None:
+                self.hold_checks["chunks_clear"] += 1
+                return None
+            self.hold_checks["chunks_filtered"] += 1
+            # Only the chunk's own held keys, which SQLite collects once per statement into a small lookup
+            return f"+{column} NOT IN ({held_keys})", bounds
+        self.hold_checks["chunks_filtered"] += 1
+        return f"NOT {held_condition(column)}", [step["table"]]
+
+    def _check_holds(self, table_name: str) -> bool:
+        """Whether a table has held keys right now (looked up once per step, so new holds are seen)"""
+        held = self.connect().execute(f"SELECT 1 FROM {HOLDS_SCHEMA}.legal_holds WHERE table_name = ? LIMIT 1",
+                                      (table_name,)).fetchone() is not None
+        self._holds_present[table_name] = held
+        return held
+
+    def ensure_archive_table(self, table: TableInfo) -> None:
+        """Create the archive table of a live table if it does not exist yet (see ARCHIVE_COLUMNS)"""
+        conn = self.connect()
+        name = quote_identifier(table.name)
+        clashing = set(ARCHIVE_COLUMNS) & set(table.column_names)
+        if clashing:
+            raise ValueError(f"Table {table.name} has columns reserved for the archive: {', '.join(sorted(clashing))}")
+        existing = [row[1] for row in conn.execute(f"PRAGMA archive.table_info({name})")]
+        if existing and "_archive_job" not in existing:
+            raise RuntimeError(f"archive.{table.name} was created by an older version with the live keys; "
+                               f"rename it or archive into a new database")
+        columns = ", ".join(f"{quote_identifier(c.name)} {c.type}".rstrip() for c in table.columns)
+        conn.execute(f"CREATE TABLE IF NOT EXISTS archive.{name} (_archive_id INTEGER PRIMARY KEY, "
+                     f"_archive_job TEXT NOT NULL, _source_key, {columns})")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS archive.{quote_identifier(f'ix_archive_{table.name}_source')} "
+                     f"ON {name} (_archive_job, _source_key)")
+
+    def _next_chunk(self, step: Dict, after) -> Optional[tuple]:
+        """Key range [lo, hi] of the next chunk, or None when no eligible rows remain"""
+        conn = self.connect()
+        row = conn.execute(*next_chunk_sql(step, after)).fetchone()
+        if row[0] is None:
+            return None
+        lo = row[0]
+        name, key = _chunk_source(step)
+        # Bounded by key count, not by eligible rows, so one chunk never touches more than chunk_size rows
+        upper = conn.execute(f"SELECT {key} FROM {name} WHERE {key} >= ? ORDER BY {key} LIMIT 1 OFFSET ?",
+                             (lo, self.chunk_size - 1)).fetchone()
+        return lo, upper[0] if upper else None
+
+    @contextmanager
+    def _transaction(self):
+        """BEGIN IMMEDIATE ... COMMIT, rolled back on any exception (KeyboardInterrupt included)"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def _chunk_filter(self, step: Dict, lo, hi) -> Tuple[str, List]:
+        """WHERE clause (and parameters) selecting the rows of one key range to archive"""
+        where, params = chunk_filter_sql(step, lo, hi)
+        exclusion = self._hold_exclusion(step, lo, hi) if step.get("legal_holds") and not step.get("key_set") else None
+        if exclusion is not None:
+            where += f" AND {exclusion[0]}"
+            params += exclusion[1]
+        return where, params
+
+    @staticmethod
+    def _staged(step: Dict, lo, hi) -> Tuple[str, List]:
+        """Condition matching the rows whose keys were staged for one key range"""
+        bounds = "k >= ?" + (" AND k <= ?" if hi is not None else "")
+        return (f"{step['key']} IN (SELECT k FROM temp.archival_keys WHERE {bounds})",
+                [lo] + ([hi] if hi is not None else []))
+
+    def _archived(self, lo, hi) -> Tuple[str, List]:
+        """Condition on the archive rows this job copied from one key range"""
+        bounds = "_source_key >= ?" + (" AND _source_key <= ?" if hi is not None else "")
+        return f"_archive_job = ? AND {bounds}", [self.job_id, lo] + ([hi] if hi is not None else [])
+
+    def _copy_chunk(self, step: Dict, lo, hi) -> Tuple[int, str, List]:
+        """Stage the keys of one chunk and copy their rows into the archive; returns the staged count and the filter"""
+        conn = self.connect()
+        table = quote_identifier(step["table"])
+        where, params = self._chunk_filter(step, lo, hi)
+        staged_rows = conn.execute(f"INSERT OR IGNORE INTO temp.archival_keys {chunk_keys_sql(step, where)}",
+                                   params).rowcount
+        staged, staged_params = self._staged(step, lo, hi)
+        archived, archived_params = self._archived(lo, hi)
+        # Rows this job copied before an interruption are not copied again (one index probe rules that out)
+        if conn.execute(f"SELECT 1 FROM archive.{table} WHERE {archived} LIMIT 1", archived_params).fetchone():
+            staged += f" AND {step['key']} NOT IN (SELECT _source_key FROM archive.{table} WHERE {archived})"
+            staged_params += archived_params
+        columns = ", ".join(quote_identifier(c) for c in self._columns[step["table"]])
+        conn.execute(f"INSERT INTO archive.{table} (_archive_job, _source_key, {columns}) "
+                     f"SELECT ?, {step['key']}, {columns} FROM main.{table} WHERE {staged}",
+                     [self.job_id] + staged_params)
+        return staged_rows, where, params
+
+    def _delete_chunk(self, step: Dict, lo, hi, where: str, params: List) -> int:
+        """Delete the staged rows of one chunk that still qualify and are in the archive"""
+        table = quote_identifier(step["table"])
+        staged, staged_params = self._staged(step, lo, hi)
+        archived, archived_params = self._archived(lo, hi)
+        return self.connect().execute(
+            f"DELETE FROM main.{table} WHERE {staged} AND {where} "
+            f"AND {step['key']} IN (SELECT _source_key FROM archive.{table} WHERE {archived})",
+            staged_params + list(params) + archived_params
+        ).rowcount
+
+    def archive_table(self, step: Dict, after=None, step_no: Optional[int] = None) -> Dict:
+        """Move every eligible row of one table with a key above ``after``, chunk by chunk.
+
+        ``step_no`` identifies the plan step in the journal (when one is used).
+        """
+        conn = self.connect()
+        catalog = load_schema_catalog(self.db_path)
+        table = catalog.table(step["table"])
+        self.ensure_archive_table(table)
+        self._columns[table.name] = table.column_names
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS archival_keys (k PRIMARY KEY)")
+        journaled = self.journal is not None and step_no is not None
+
+        if self.controller is not None:
+            self.controller.start_table()
+        started = time.monotonic()
+        moved = chunks = left_live = 0
+        done = False
+        while not done:
+            if self.controller is not None:
+                self.chunk_size = max(1, self.controller.rows // self.chunks_per_transaction)
+            copied_chunks = []
+            exhausted = False
+            locked = time.monotonic()
+            # First transaction: copy into the archive and commit there
+            with self._transaction():
+                conn.execute("DELETE FROM temp.archival_keys")
+                for _ in range(self.chunks_per_transaction):
+                    chunk = self._next_chunk(step, after)
+                    if chunk is None:
+                        done = exhausted = True
+                        break
+                    lo, hi = chunk
+                    chunk_started = time.monotonic()
+                    copied_chunks.append((lo, hi, *self._copy_chunk(step, lo, hi), time.monotonic() - chunk_started))
+                    done = hi is None
+                    if done:
+                        break
+                    after = hi
+            lock_seconds = time.monotonic() - locked
+
+            # Second transaction: delete what was copied, with the journal entries
+            locked = time.monotonic()
+            with self._transaction():
+                for lo, hi, staged, where, params, seconds in copied_chunks:
+                    chunk_started = time.monotonic()
+                    rows = self._delete_chunk(step, lo, hi, where, params)
+                    moved += rows
+                    chunks += 1
+                    # Rows changed between the transactions stay live (and archived) rather than deleted unseen
+                    left_live += staged - rows
+                    if journaled:
+                        self.journal.record_chunk(self.job_id, step_no, step["table"], lo, hi, rows,
+                                                  seconds + time.monotonic() - chunk_started, hi is None)
+                if exhausted and journaled:
+                    self.journal.mark_done(self.job_id, step_no, step["table"])
+            lock_seconds += time.monotonic() - locked
+
+            if self.controller is not None:
+                self._adapt(len(copied_chunks) * self.chunk_size, lock_seconds)
+            self._throttle(moved, started)
+            if self.controller is not None and not done:
+                time.sleep(self.controller.pause_seconds())
+
+        if left_live:
+            print(f"WARNING: {left_live} archived rows of {step['table']} changed before deletion and were kept live")
+        return {"rows_archived": moved, "chunks": chunks, "rows_left_live": left_live,
+                "seconds": round(time.monotonic() - started, 3)}
+
+    def _adapt(self, keys: int, lock_seconds: float) -> None:
+        """Feed one committed transaction to the controller and checkpoint the WAL when it asks"""
+        wal_bytes = wal_size(self.db_path)
+        self.controller.observe(keys, lock_seconds, wal_bytes)
+        if self.controller.should_checkpoint(wal_bytes):
+            busy, log_frames, checkpointed = self.conn.execute("PRAGMA main.wal_checkpoint(PASSIVE)").fetchone()
+            self.controller.after_checkpoint(busy, log_frames, checkpointed)
+
+    def execute_cascade(self, step: Dict, step_no: Optional[int] = None) -> Dict:
+        """Archive a table's eligible rows together with every row that depends on them, children first.
+
+        The dependent key sets live in temp tables, so a resumed cascade is
+        planned again from the rows that remain.
+        """
+        conn = self.connect()
+        catalog = load_schema_catalog(self.db_path)
+        planner = CascadePlanner(conn, catalog)
+        try:
+            plan = planner.plan(step["table"], step["predicate"], step["params"])
+            if "error" in plan:
+                raise RuntimeError(f"{plan['error']}: {', '.join(plan['tables'])}")
+            if step.get("legal_holds"):
+                held = {}
+                for cascade_step in plan["steps"]:
+                    name = cascade_step["table"]
+                    column = hold_column(catalog.table(name))
+                    if column is not None and self._check_holds(name):
+                        held[name] = (held_condition(f"c.{column}"), [name])
+                kept = planner.protect(plan, held) if held else {}
+                if kept:
+                    print(f"Keeping held rows and their parents: {kept}")
+            tables = {}
+            for cascade_step in plan["steps"]:
+                if not cascade_step["rows"] and cascade_step["table"] != step["table"]:
+                    continue
+                tables[cascade_step["table"]] = self.archive_table({
+                    "table": cascade_step["table"],
+                    "key": cascade_step["key"],
+                    "key_set": cascade_step["temp_table"]
+                }, step_no=step_no)
+        finally:
+            planner.release()
+        return {
+            "rows_archived": sum(t["rows_archived"] for t in tables.values()),
+            "chunks": sum(t["chunks"] for t in tables.values()),
+            "cascade": tables
+        }
+
+    def _throttle(self, moved: int, started: float) -> None:
+        if not self.rows_per_second:
+            return
+        ahead = moved / self.rows_per_second - (time.monotonic() - started)
+        if ahead > 0:
+            time.sleep(ahead)
+
+    def _load_or_create_job(self, report: Optional[Dict], groups: Optional[List[str]] = None) -> Optional[Dict]:
+        """The unfinished journaled job to resume, or a new one planned from the report.
+
+        A finished (``done``) job is not resumed when a report is given: the
+        new run gets the job id with its start time appended.
+        """
+        self.connect()
+        job = self.journal.load_job(self.job_id)
+        if job is not None and job["status"] == "done" and report is not None:
+            finished_id = self.job_id
+            self.job_id = f"{finished_id}@{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}"
+            print(f"Job {finished_id} already finished; starting job {self.job_id}")
+            job = None
+        if job is not None:
+            print(f"Resuming job {self.job_id} ({job['status']})")
+            self.as_of = date.fromisoformat(job["as_of"])
+            return job
+        if report is None:
+            print(f"ERROR: Unknown job {self.job_id} and no report to plan it from")
+            return None
+        steps = self.plan_from_report(report, groups)
+        self.journal.create_job(self.job_id, self.db_path, self.archive_path, self.as_of.isoformat(), steps)
+        return self.journal.load_job(self.job_id)
+
+    def run(self, report: Optional[Dict] = None, groups: Optional[List[str]] = None) -> Dict:
+        """Archive every table of the report (or of ``groups``) in priority order.
+
+        A failing table does not stop the run. With a journal, an existing
+        ``job_id`` is resumed from its stored plan and ``report`` is not needed.
+        """
+        if report is None and self.journal is None:
+            raise ValueError("report required without a journal job")
+        if self.journal is None:
+            # Nothing can be resumed without a journal: a fresh id keeps this run's archive rows apart
+            self.job_id = f"{self._job_name}@{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}"
+        progress = {}
+        if self.journal is not None:
+            job = self._load_or_create_job(report, groups)
+            if job is None:
+                self.close()
+                return {"error": f"Unknown job {self.job_id}"}
+            steps, progress = job["steps"], job["progress"]
+        else:
+            steps = self.plan_from_report(report, groups)
+        if self.holds is not None:
+            self.held_tables = self.holds.counts()
+            self.holds.close()
+            catalog = load_schema_catalog(self.db_path)
+            for step in steps:
+                # Plans journaled before holds were configured get them too
+                table = catalog.table(step["table"])
+                if "hold_column" not in step and table is not None:
+                    step.update(self._hold_fields(table, step["key"]))
+        catalog = load_schema_catalog(self.db_path)
+        for step in steps:
+            # Plans journaled before reference guards existed get them too
+            if "reference_guard" not in step:
+                guard = reference_guard(catalog, step["table"])
+                if guard:
+                    step["reference_guard"] = guard
+        catalog_relationships = catalog.relationships()
+        started = time.monotonic()
+        results = {}
+        try:
+            for step_no, step in enumerate(steps):
+                state = progress.get(step_no, {}).get(step["table"], {})
+                if state.get("done"):
+                    continue
+                print(f"Archiving {step['table']} ({step['group']}): {step['predicate']} {step['params']}")
+                try:
+                    if step.get("legal_holds") and self.holds is None:
+                        raise RuntimeError("planned with legal holds; run it with the legal-hold registry")
+                    if step.get("legal_holds"):
+                        self._check_holds(step["table"])
+                    referenced = catalog_relationships.get(step["table"], {}).get("is_referenced")
+                    if self.cascade and referenced:
+                        results[step["table"]] = {"status": "done", **self.execute_cascade(step, step_no)}
+                    else:
+                        results[step["table"]] = {
+                            "status": "done", **self.archive_table(step, state.get("last_key"), step_no)
+                        }
+                except (sqlite3.Error, RuntimeError) as e:
+                    print(f"ERROR: Archiving {step['table']} failed: {e}")
+                    results[step["table"]] = {"status": "failed", "error": str(e)}
+            if self.journal is not None:
+                failed = any(r["status"] == "failed" for r in results.values())
+                self.journal.finish_job(self.job_id, "failed" if failed else "done")
+        finally:
+            self.close()
+        return {
+            "job_id": self.job_id if self.journal is not None else None,
+            "archive_path": self.archive_path,
+            "as_of": self.as_of.isoformat(),
+            "tables": results,
+            "total_rows_archived": sum(r.get("rows_archived", 0) for r in results.values()),
+            "seconds": round(time.monotonic() - started, 3),
+            "batch_control": self.controller.stats() if self.controller is not None else None,
+            "legal_holds": {"held_keys": self.held_tables, **self.hold_checks} if self.holds is not None else None
+        }
@@ -0,0 +1,110 @@
+import os
+from typing import Dict, Optional
+
+
+class AdaptiveBatchController:
+    """Size archival write transactions to a lock-hold target and a WAL budget.
+
+    After every transaction the executor reports how many keys it covered,
+    how long the write lock was held (BEGIN to the end of COMMIT) and the
+    size of the WAL file. The controller keeps a smoothed per-key cost and
+    sizes the next transaction to ``target_lock_seconds``, growing by at
+    most ``max_growth`` per step and shrinking at once when a transaction
+    overruns. Narrow rows therefore get large batches and wide blob rows
+    small ones. When the WAL passes ``checkpoint_fraction`` of its budget the
+    executor runs a PASSIVE checkpoint, which never waits for readers; a
+    WAL over budget, or a checkpoint that readers kept from completing,
+    halves the batch so the application's readers can catch up. Between
+    transactions the executor pauses for ``yield_ratio`` of the last lock
+    hold, since SQLite hands the lock to no one in particular and a writer
+    that retries immediately would starve the application's writers.
+    """
+
+    def __init__(self, target_lock_seconds: float = 0.25, wal_budget_bytes: int = 64 * 1024 * 1024,
+                 initial_rows: int = 5_000, min_rows: int = 100, max_rows: int = 500_000,
+                 max_growth: float = 2.0, smoothing: float = 0.3, checkpoint_fraction: float = 0.5,
+                 yield_ratio: float = 0.5, min_yield_seconds: float = 0.01):
+        self.target_lock_seconds = target_lock_seconds
+        self.wal_budget_bytes = wal_budget_bytes
+        self.min_rows = min_rows
+        self.max_rows = max_rows
+        self.max_growth = max_growth
+        self.smoothing = smoothing
+        self.checkpoint_fraction = checkpoint_fraction
+        self.yield_ratio = yield_ratio
+        self.min_yield_seconds = min_yield_seconds
+        self.last_lock_seconds = 0.0
+        self.initial_rows = self._clamp(initial_rows)
+        self.rows = self.initial_rows
+        self.seconds_per_row: Optional[float] = None
+        self.transactions = 0
+        self.over_target = 0
+        self.checkpoints = 0
+        self.max_lock_seconds = 0.0
+        self.max_wal_bytes = 0
+
+    def _clamp(self, rows: float) -> int:
+        return int(max(self.min_rows, min(self.max_rows, rows)))
+
+    def start_table(self) -> None:
+        """Forget the learned per-key cost: row width, and so cost, differs from table to table"""
+        self.rows = self.initial_rows
+        self.seconds_per_row = None
+
+    def observe(self, rows: int, lock_seconds: float, wal_bytes: int = 0) -> int:
+        """Record one committed transaction and return the size of the next one"""
+        self.transactions += 1
+        self.last_lock_seconds = lock_seconds
+        self.max_lock_seconds = max(self.max_lock_seconds, lock_seconds)
+        self.max_wal_bytes = max(self.max_wal_bytes, wal_bytes)
+        if rows <= 0:
+            return self.rows
+
+        cost = lock_seconds / rows
+        if self.seconds_per_row is None:
+            self.seconds_per_row = cost
+        else:
+            self.seconds_per_row += self.smoothing * (cost - self.seconds_per_row)
+
+        # 10% headroom below the target absorbs jitter in commit latency
+        ideal = 0.9 * self.target_lock_seconds / self.seconds_per_row if self.seconds_per_row else self.max_rows
+        proposed = min(ideal, self.rows * self.max_growth)
+        if lock_seconds > self.target_lock_seconds:
+            self.over_target += 1
+            proposed = min(proposed, self.rows * self.target_lock_seconds / lock_seconds)
+        if wal_bytes > self.wal_budget_bytes:
+            proposed = min(proposed, self.rows / 2)
+        self.rows = self._clamp(proposed)
+        return self.rows
+
+    def pause_seconds(self) -> float:
+        """Gap to leave after a transaction so writers waiting in their busy handler get the lock"""
+        return max(self.min_yield_seconds, self.yield_ratio * self.last_lock_seconds)
+
+    def should_checkpoint(self, wal_bytes: int) -> bool:
+        return wal_bytes >= self.checkpoint_fraction * self.wal_budget_bytes
+
+    def after_checkpoint(self, busy: int, log_frames: int, checkpointed_frames: int) -> None:
+        """Record a PASSIVE checkpoint result; readers holding back part of the WAL halve the batch"""
+        self.checkpoints += 1
+        if busy or (log_frames > 0 and checkpointed_frames < log_frames):
+            self.rows = self._clamp(self.rows / 2)
+
+    def stats(self) -> Dict:
+        return {
+            "batch_rows": self.rows,
+            "seconds_per_row": self.seconds_per_row,
+            "transactions": self.transactions,
+            "over_target": self.over_target,
+            "checkpoints": self.checkpoints,
+            "max_lock_seconds": round(self.max_lock_seconds, 4),
+            "max_wal_bytes": self.max_wal_bytes
+        }
+
+
+def wal_size(db_path: str) -> int:
+    """Current size of a database's WAL file (0 when it has none)"""
+    try:
+        return os.path.getsize(db_path + "-wal")
+    except OSError:
+        return 0
@@ -0,0 +1,275 @@
+import re
+import sqlite3
+from typing import Dict, List, Optional
+
+from column_profiler import quote_identifier
+from schema_catalog import SchemaCatalog, TableInfo
+from schema_graph import strongly_connected_components
+
+_WITHOUT_ROWID = re.compile(r"\)\s*WITHOUT\s+ROWID\s*;?\s*$", re.IGNORECASE)
+
+
+def key_column(table: TableInfo) -> Optional[str]:
+    """Column that identifies a row: rowid, or the single-column key of a WITHOUT ROWID table"""
+    if not _WITHOUT_ROWID.search(table.ddl or ""):
+        return "rowid"
+    if len(table.primary_keys) == 1:
+        return quote_identifier(table.primary_keys[0])
+    return None
+
+
+def key_alias(table: TableInfo) -> Optional[str]:
+    """Name of the declared column holding the table's key (INTEGER PRIMARY KEY or WITHOUT ROWID key)"""
+    if len(table.primary_keys) != 1:
+        return None
+    column = table.primary_keys[0]
+    if _WITHOUT_ROWID.search(table.ddl or ""):
+        return column
+    declared = next((c.type for c in table.columns if c.name == column), "")
+    return column if declared.upper() == "INTEGER" else None
+
+
+def reference_guard(catalog: SchemaCatalog, table_name: str) -> Optional[str]:
+    """SQL true for rows of ``table_name`` that no live row references, or None when nothing references it.
+
+    One ``NOT EXISTS`` per referencing foreign key (self-references
+    included), written against the unqualified table name so it can be
+    added to statements on ``main.<table>``. Each probe is an index lookup
+    when the child's FK columns are indexed.
+    """
+    parent = catalog.table(table_name)
+    if parent is None:
+        return None
+    quoted = quote_identifier(table_name)
+    guards = []
+    for child in catalog.tables:
+        groups: Dict[int, List[tuple]] = {}
+        for fk in child.foreign_keys:
+            if fk.parent_table == table_name:
+                groups.setdefault(fk.fk_id, []).append((fk.child_column, fk.parent_column))
+        for pairs in groups.values():
+            # A NULL parent column means the parent's primary key, column by column
+            if any(parent_column is None for _, parent_column in pairs):
+                pairs = list(zip([c for c, _ in pairs], parent.primary_keys))
+            conditions = " AND ".join(
+                f"c.{quote_identifier(child_column)} = {quoted}.{quote_identifier(parent_column)}"
+                for child_column, parent_column in pairs
+            )
+            guards.append(f"NOT EXISTS (SELECT 1 FROM main.{quote_identifier(child.name)} AS c WHERE {conditions})")
+    return " AND ".join(guards) or None
+
+
+class CascadePlanner:
+    """Work out which rows depend, through foreign keys, on the rows a predicate selects.
+
+    Starting from the root rows, every table that references an affected
+    table gets a temp table of the keys of its dependent rows, filled with
+    one ``INSERT OR IGNORE ... SELECT`` join per foreign key, parents before
+    children. A table reached along several paths (a diamond) collects keys
+    from each of them, and the temp table's primary key deduplicates them.
+    Cycles and self-references are repeated until no new keys appear.
+    Nothing is looked up row by row, so a parent fanning out to millions of
+    children costs one join.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, catalog: SchemaCatalog,
+                 relationships: Optional[Dict[str, Dict]] = None):
+        self.conn = conn
+        self.catalog = catalog
+        self.relationships = relationships if relationships is not None else catalog.relationships()
+        self.tables = {t.name: t for t in catalog.tables}
+        self.temp_tables: List[str] = []
+        # Key sets and components of the last plan, for protect()
+        self._temp_of: Dict[str, str] = {}
+        self._components: List[List[str]] = []
+
+    def dependents(self, root_table: str) -> List[str]:
+        """The root and every table that references it directly or indirectly"""
+        reached = [root_table]
+        seen = {root_table}
+        for name in reached:
+            for ref in self.relationships.get(name, {}).get("referenced_by", []):
+                if ref["child_table"] not in seen:
+                    seen.add(ref["child_table"])
+                    reached.append(ref["child_table"])
+        return reached
+
+    def _fk_groups(self, table_name: str, parents: set) -> List[Dict]:
+        """Foreign keys of a table into the given parents, composite FKs joined into one entry"""
+        groups = {}
+        for fk in self.relationships.get(table_name, {}).get("foreign_keys", []):
+            if fk["parent_table"] in parents:
+                group = groups.setdefault(fk.get("fk_id", 0), {"parent_table": fk["parent_table"], "pairs": []})
+                group["pairs"].append((fk["child_column"], fk["parent_column"]))
+        return list(groups.values())
+
+    def _pairs(self, fk: Dict) -> List[tuple]:
+        """(child column, parent column) pairs of a foreign key"""
+        pairs = fk["pairs"]
+        # A NULL parent column means the parent's primary key, column by column
+        if any(parent_column is None for _, parent_column in pairs):
+            pairs = list(zip([c for c, _ in pairs], self.tables[fk["parent_table"]].primary_keys))
+        return pairs
+
+    def _fill_sql(self, child: TableInfo, fk: Dict, temp_of: Dict[str, str]) -> str:
+        """INSERT OR IGNORE of the child keys whose FK points at a row already in the parent's set"""
+        parent = self.tables[fk["parent_table"]]
+        pairs = self._pairs(fk)
+        child_key = key_column(child)
+        target = f"temp.{temp_of[child.name]}"
+        source = f"temp.{temp_of[parent.name]}"
+        child_name = f"main.{quote_identifier(child.name)}"
+
+        alias = key_alias(parent)
+        if len(pairs) == 1 and alias is not None and pairs[0][1] == alias:
+            # The FK holds the parent's key itself: join the child straight to the parent's key set
+            return (f"INSERT OR IGNORE INTO {target} SELECT c.{child_key} FROM {source} AS s "
+                    f"JOIN {child_name} AS c ON c.{quote_identifier(pairs[0][0])} = s.k")
+        conditions = " AND ".join(
+            f"c.{quote_identifier(child_column)} = p.{quote_identifier(parent_column)}"
+            for child_column, parent_column in pairs
+        )
+        return (f"INSERT OR IGNORE INTO {target} SELECT c.{child_key} FROM {source} AS s "
+                f"JOIN main.{quote_identifier(parent.name)} AS p ON p.{key_column(parent)} = s.k "
+                f"JOIN {child_name} AS c ON {conditions}")
+
+    def plan(self, root_table: str, predicate_sql: str, params: Optional[List] = None) -> Dict:
+        """Dependent row sets of the root rows matching ``predicate_sql`` and the order to remove them in.
+
+        Steps come children first: each table is listed before every table
+        it references, so executing them in order never leaves a dangling
+        reference. Each step names the temp table holding its keys.
+        """
+        self.release()
+        affected = self.dependents(root_table)
+        unkeyed = [name for name in affected if key_column(self.tables[name]) is None]
+        if unkeyed:
+            return {"error": "Tables without a single-column key cannot be planned", "tables": unkeyed}
+
+        temp_of = self._temp_of = {}
+        for i, name in enumerate(affected):
+            temp_of[name] = f"cascade_{i}"
+            self.conn.execute(f"DROP TABLE IF EXISTS temp.{temp_of[name]}")
+            self.conn.execute(f"CREATE TEMP TABLE {temp_of[name]} (k PRIMARY KEY) WITHOUT ROWID")
+            self.temp_tables.append(temp_of[name])
+
+        root = self.tables[root_table]
+        self.conn.execute(
+            f"INSERT OR IGNORE INTO temp.{temp_of[root_table]} "
+            f"SELECT {key_column(root)} FROM main.{quote_identifier(root_table)} WHERE {predicate_sql}",
+            params or []
+        )
+
+        # Components come out parents first, so every parent set is complete before its children are filled
+        affected_set = set(affected)
+        level = {}
+        fill_order = []
+        self._components = strongly_connected_components(affected, self.relationships)
+        for component in self._components:
+            members = set(component)
+            statements = []
+            parent_levels = []
+            for name in component:
+                for fk in self._fk_groups(name, affected_set):
+                    statements.append(self._fill_sql(self.tables[name], fk, temp_of))
+                    if fk["parent_table"] not in members:
+                        parent_levels.append(level[fk["parent_table"]])
+            component_level = 1 + max(parent_levels) if parent_levels else 0
+            cyclic = len(component) > 1 or bool(self._fk_groups(component[0], members))
+            passes = 0
+            while statements:
+                passes += 1
+                added = sum(self.conn.execute(sql).rowcount for sql in statements)
+                if not cyclic or added == 0:
+                    break
+            for name in component:
+                level[name] = component_level
+                fill_order.append((name, passes))
+
+        steps = []
+        for name, passes in reversed(fill_order):
+            rows = self.conn.execute(f"SELECT count(*) FROM temp.{temp_of[name]}").fetchone()[0]
+            steps.append({
+                "table": name,
+                "level": level[name],
+                "rows": rows,
+                "key": key_column(self.tables[name]),
+                "temp_table": temp_of[name],
+                "fill_passes": passes
+            })
+        return {
+            "root_table": root_table,
+            "predicate": predicate_sql,
+            "params": list(params or []),
+            "steps": steps,
+            "total_rows": sum(step["rows"] for step in steps)
+        }
+
+    def protect(self, plan: Dict, held: Dict[str, tuple]) -> Dict[str, int]:
+        """Take rows that must stay (such as rows under legal hold) out of the last plan's key sets.
+
+        ``held`` maps a table to an SQL condition on its rows (alias ``c``)
+        and the condition's parameters. A row that stays keeps referencing
+        its parents, so every parent row it points at stays too, up to the
+        root; its own children are still removed. Children are handled
+        before their parents, and cycles repeat until nothing new is kept.
+        Returns the keys kept per table and updates the plan's row counts.
+        """
+        temp_of = self._temp_of
+        keep_of = {}
+        for name in temp_of:
+            keep_of[name] = f"{temp_of[name]}_keep"
+            self.conn.execute(f"DROP TABLE IF EXISTS temp.{keep_of[name]}")
+            self.conn.execute(f"CREATE TEMP TABLE {keep_of[name]} (k PRIMARY KEY) WITHOUT ROWID")
+            self.temp_tables.append(keep_of[name])
+
+        for name, (condition, params) in held.items():
+            if name not in temp_of:
+                continue
+            self.conn.execute(
+                f"INSERT OR IGNORE INTO temp.{keep_of[name]} SELECT s.k FROM temp.{temp_of[name]} AS s "
+                f"JOIN main.{quote_identifier(name)} AS c ON c.{key_column(self.tables[name])} = s.k "
+                f"WHERE {condition}", params
+            )
+
+        for component in reversed(self._components):
+            statements = []
+            for name in component:
+                child = self.tables[name]
+                for fk in self._fk_groups(name, set(temp_of)):
+                    parent = self.tables[fk["parent_table"]]
+                    conditions = " AND ".join(
+                        f"p.{quote_identifier(parent_column)} = c.{quote_identifier(child_column)}"
+                        for child_column, parent_column in self._pairs(fk)
+                    )
+                    statements.append(
+                        f"INSERT OR IGNORE INTO temp.{keep_of[parent.name]} SELECT p.{key_column(parent)} "
+                        f"FROM temp.{keep_of[name]} AS s "
+                        f"JOIN main.{quote_identifier(name)} AS c ON c.{key_column(child)} = s.k "
+                        f"JOIN main.{quote_identifier(parent.name)} AS p ON {conditions} "
+                        f"WHERE p.{key_column(parent)} IN (SELECT k FROM temp.{temp_of[parent.name]})"
+                    )
+            cyclic = len(component) > 1 or bool(self._fk_groups(component[0], set(component)))
+            while statements:
+                added = sum(self.conn.execute(sql).rowcount for sql in statements)
+                if not cyclic or added == 0:
+                    break
+
+        kept = {}
+        for name in temp_of:
+            removed = self.conn.execute(
+                f"DELETE FROM temp.{temp_of[name]} WHERE k IN (SELECT k FROM temp.{keep_of[name]})"
+            ).rowcount
+            if removed:
+                kept[name] = removed
+        for step in plan["steps"]:
+            step["rows"] -= kept.get(step["table"], 0)
+            step["held"] = kept.get(step["table"], 0)
+        plan["total_rows"] = sum(step["rows"] for step in plan["steps"])
+        return kept
+
+    def release(self) -> None:
+        """Drop the temp tables of the previous plan"""
+        for name in self.temp_tables:
+            self.conn.execute(f"DROP TABLE IF EXISTS temp.{name}")
+        self.temp_tables = []
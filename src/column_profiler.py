@@ -0,0 +1,251 @@
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+
+from schema_catalog import TableInfo
+
+# Value kinds reported per column, as fractions of its non-null values
+VALUE_KINDS = ("integer", "real", "text", "blob", "date")
+
+# Aggregates per column in one SELECT; keeps wide tables under SQLite's result-column limit
+_COLUMNS_PER_QUERY = 150
+
+# Stored values of 1990-01-01 .. 2100-01-01 in each numeric date encoding
+_TIMESTAMP_RANGES = (
+    ("unix seconds", 631_152_000, 4_102_444_800),
+    ("unix millis", 631_152_000_000, 4_102_444_800_000),
+    ("julian day", 2_447_892.5, 2_488_069.5),
+)
+
+
+def quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _column_aggregates(column: str) -> List[str]:
+    c = quote_identifier(column)
+    return [
+        f"count({c})",
+        f"min(CASE WHEN typeof({c}) != 'blob' THEN {c} END)",
+        f"max(CASE WHEN typeof({c}) != 'blob' THEN {c} END)",
+        f"sum(typeof({c}) = 'integer')",
+        f"sum(typeof({c}) = 'real')",
+        f"sum(typeof({c}) = 'text')",
+        f"sum(typeof({c}) = 'blob')",
+        f"sum(typeof({c}) = 'text' AND instr({c}, '-') > 0 AND julianday({c}) IS NOT NULL)",
+    ]
+
+
+def rowid_sample_source(conn: sqlite3.Connection, table_name: str, blocks: int,
+                        block_rows: int) -> Optional[Tuple[str, float]]:
+    """Subquery over ``blocks`` evenly spaced rowid ranges spanning min(rowid)..max(rowid).
+
+    Rowids need not start at 1 or be dense (deletes, explicit keys), so the
+    blocks are spread over the actual rowid span. Returns the subquery and
+    the fraction of the span it covers, or None for an empty table or one
+    without rowids.
+    """
+    name = quote_identifier(table_name)
+    try:
+        lo, hi = conn.execute(f"SELECT min(rowid), max(rowid) FROM {name}").fetchone()
+    except sqlite3.Error:
+        return None
+    if lo is None:
+        return None
+    span = hi - lo + 1
+    stride = max(1, span // blocks)
+    # Blocks never overlap, so no row is counted twice
+    block_rows = min(block_rows, stride)
+    source = "(" + " UNION ALL ".join(
+        f"SELECT * FROM {name} WHERE rowid BETWEEN {lo + i * stride} AND {lo + i * stride + block_rows - 1}"
+        for i in range(blocks)
+    ) + ")"
+    return source, min(1.0, blocks * block_rows / span)
+
+
+def bounded_row_count(conn: sqlite3.Connection, table: TableInfo, limit: int) -> Optional[int]:
+    """The table's row estimate, made exact by a count of at most ``limit + 1`` rows when it is only an upper bound"""
+    if table.row_estimate is None or table.row_estimate <= limit or not table.row_estimate_is_upper_bound:
+        return table.row_estimate
+    # max(rowid) overstates tables with gaps: count up to the limit before deciding to sample
+    counted = conn.execute(
+        f"SELECT count(*) FROM (SELECT 1 FROM {quote_identifier(table.name)} LIMIT {limit + 1})"
+    ).fetchone()[0]
+    return counted if counted <= limit else table.row_estimate
+
+
+class ColumnProfiler:
+    """Per-column statistics from one aggregate query per table.
+
+    Tables with more than ``sample_threshold_rows`` rows are profiled from
+    ``sample_blocks`` evenly spaced rowid ranges of ``block_rows`` rows each,
+    so the cost is bounded by the sample size rather than the table size.
+    Distinct counts are approximate: they always come from a sample of at
+    most ``distinct_sample_rows`` rows (distinct counting needs a temporary
+    B-tree per column) and are extrapolated for near-unique columns.
+    """
+
+    def __init__(self, sample_threshold_rows: int = 1_000_000, sample_blocks: int = 20,
+                 block_rows: int = 5_000, distinct_sample_rows: int = 100_000):
+        self.sample_threshold_rows = sample_threshold_rows
+        self.sample_blocks = sample_blocks
+        self.block_rows = block_rows
+        self.distinct_sample_rows = distinct_sample_rows
+
+    def _source(self, conn: sqlite3.Connection, table: TableInfo, max_rows: int,
+                block_rows: int) -> Tuple[str, bool, Optional[float]]:
+        """FROM clause reading about ``max_rows`` rows of a table, whether it samples and the rowid span it covers"""
+        name = quote_identifier(table.name)
+        rows = bounded_row_count(conn, table, max_rows)
+        if rows is None:
+            # No rowid to sample by (WITHOUT ROWID): bound the scan instead
+            return f"(SELECT * FROM {name} LIMIT {max_rows})", True, None
+        if rows <= max_rows:
+            return name, False, None
+        sample = rowid_sample_source(conn, table.name, self.sample_blocks, block_rows)
+        return (sample[0], True, sample[1]) if sample else (name, False, None)
+
+    def _aggregate(self, conn: sqlite3.Connection, table: TableInfo, select: List[str], max_rows: int,
+                   block_rows: int) -> Tuple[tuple, bool, Optional[int]]:
+        """One aggregate query over a table or its sample, whether it sampled, and the table's estimated rows.
+
+        A rowid sample that hit no rows falls back to a full scan.
+        """
+        source, sampled, coverage = self._source(conn, table, max_rows, block_rows)
+        row = conn.execute(f"SELECT count(*), {', '.join(select)} FROM {source}").fetchone()
+        if coverage is not None and not row[0]:
+            # Every rowid block fell into a gap
+            row = conn.execute(f"SELECT count(*), {', '.join(select)} FROM {quote_identifier(table.name)}").fetchone()
+            sampled, coverage = False, None
+        if not sampled:
+            population = row[0]
+        elif coverage is not None and table.row_estimate_is_upper_bound:
+            # Scale the sample by the share of the rowid span it read rather than trust max(rowid)
+            population = int(row[0] / coverage)
+        else:
+            population = table.row_estimate
+        return row, sampled, population
+
+    def profile_table(self, conn: sqlite3.Connection, table: TableInfo) -> Dict:
+        """Profile every column of a table"""
+        columns = table.column_names
+        distinct_block_rows = max(1, min(self.block_rows, self.distinct_sample_rows // self.sample_blocks))
+        scanned_rows = 0
+        sampled = False
+        column_stats = {}
+
+        for start in range(0, max(len(columns), 1), _COLUMNS_PER_QUERY):
+            chunk = columns[start:start + _COLUMNS_PER_QUERY]
+            row, sampled, population = self._aggregate(
+                conn, table, [agg for column in chunk for agg in _column_aggregates(column)] or ["0"],
+                self.sample_threshold_rows, self.block_rows
+            )
+            distinct_row, _, _ = self._aggregate(
+                conn, table, [f"count({quote_identifier(c)}), count(DISTINCT {quote_identifier(c)})" for c in chunk]
+                or ["0"], self.distinct_sample_rows, distinct_block_rows
+            )
+            scanned_rows = row[0] or 0
+            for i, column in enumerate(chunk):
+                values = row[1 + i * 8: 9 + i * 8]
+                column_stats[column] = self._column_profile(
+                    values, scanned_rows, population, distinct_row[1 + i * 2: 3 + i * 2]
+                )
+
+        return {
+            "row_estimate": table.row_estimate,
+            "row_estimate_is_upper_bound": table.row_estimate_is_upper_bound,
+            "sampled": sampled,
+            "scanned_rows": scanned_rows,
+            "columns": column_stats
+        }
+
+    @staticmethod
+    def _column_profile(values, scanned_rows: int, population: Optional[int], distinct_sample) -> Dict:
+        non_null, min_value, max_value = values[:3]
+        kind_counts = dict(zip(VALUE_KINDS, values[3:]))
+        # Non-null values in the distinct sample and how many of them differ
+        sample_non_null, distinct = distinct_sample
+        distinct_estimate = distinct
+        if sample_non_null and scanned_rows and population and distinct / sample_non_null > 0.9:
+            # Near-unique in the sample: assume it stays near-unique in the full table
+            distinct_estimate = max(distinct, int(population * (non_null / scanned_rows) * (distinct / sample_non_null)))
+        return {
+            "null_fraction": round(1 - non_null / scanned_rows, 4) if scanned_rows else None,
+            "distinct_estimate": distinct_estimate,
+            "kinds": {k: round(v / non_null, 3) for k, v in kind_counts.items() if v and non_null},
+            "min": min_value if not isinstance(min_value, str) else min_value[:40],
+            "max": max_value if not isinstance(max_value, str) else max_value[:40]
+        }
+
+    def profile_tables(self, db_path: str, tables: List[TableInfo]) -> Dict[str, Dict]:
+        """Profile several tables over one read connection; failures are skipped with a warning"""
+        profiles = {}
+        conn = sqlite3.connect(db_path)
+        try:
+            for table in tables:
+                try:
+                    profiles[table.name] = self.profile_table(conn, table)
+                except sqlite3.Error as e:
+                    print(f"WARNING: Could not profile {table.name}: {e}")
+        finally:
+            conn.close()
+        return profiles
+
+
+def _size_bucket(rows: int) -> str:
+    """Order of magnitude of a row count ("10k+ rows"), which ordinary growth rarely changes"""
+    for limit, label in ((10 ** 9, "1B+"), (10 ** 6, "1M+"), (10 ** 5, "100k+"), (10 ** 4, "10k+"), (10 ** 3, "1k+")):
+        if rows >= limit:
+            return f"{label} rows"
+    return "under 1k rows"
+
+
+def _timestamp_encoding(stats: Dict) -> Optional[str]:
+    """How a numeric column stores dates, when all its values fall in 1990..2100 in one encoding"""
+    low, high = stats.get("min"), stats.get("max")
+    if not isinstance(low, (int, float)) or not isinstance(high, (int, float)):
+        return None
+    for encoding, start, end in _TIMESTAMP_RANGES:
+        if start <= low and high <= end:
+            return encoding
+    return None
+
+
+def format_profile_hint(profile: Optional[Dict], max_columns: int = 12) -> str:
+    """Compact one-line-per-column summary of a profile for LLM prompts; date-like columns first.
+
+    Only facts that ordinary inserts and updates leave alone are shown (the
+    value kind, a numeric date encoding, whether there are NULLs, two-valued
+    flags, the table's order of magnitude), since the hint is part of the
+    LLM cache key: exact counts or ranges would miss the cache whenever the
+    data changed.
+    """
+    if not profile:
+        return ""
+    columns = profile.get("columns", {})
+
+    described = []
+    for name, stats in columns.items():
+        kinds = stats.get("kinds", {})
+        kind = "date" if kinds.get("date", 0) >= 0.5 else max(kinds, key=kinds.get) if kinds else "empty"
+        parts = [kind]
+        encoding = _timestamp_encoding(stats) if kind in ("integer", "real") else None
+        if encoding:
+            parts.append(f"dates as {encoding}")
+        null_fraction = stats.get("null_fraction") or 0
+        if null_fraction >= 0.5:
+            parts.append("mostly null")
+        elif null_fraction:
+            parts.append("has nulls")
+        if kind != "empty" and stats.get("distinct_estimate") is not None and stats["distinct_estimate"] <= 2:
+            parts.append("at most 2 values")
+        described.append((kind == "date" or encoding is not None, name, parts))
+    # Stable order: dates first, then the table's column order
+    ordered = [item for item in described if item[0]] + [item for item in described if not item[0]]
+
+    size = profile.get("row_estimate")
+    lines = [f"Column profile ({_size_bucket(size)}):" if size is not None else "Column profile:"]
+    for _, name, parts in ordered[:max_columns]:
+        lines.append(f"- {name}: {', '.join(parts)}")
+    if len(ordered) > max_columns:
+        lines.append(f"- ... {len(ordered) - max_columns} more columns")
+    return "\n".join(lines)
@@ -0,0 +1,285 @@
+import sqlite3
+from urllib.parse import quote
+from typing import Dict, List, Optional
+
+from schema_catalog import (
+    ColumnInfo, ForeignKeyInfo, IndexInfo, SchemaCatalog, TableInfo, load_schema_catalog
+)
+
+
+class SchemaBackend:
+    """Source of a database's schema catalog.
+
+    Backends introspect every table in a fixed number of bulk queries, so the
+    cost of loading a schema does not grow with the number of round trips
+    per table. ``round_trips`` counts the queries issued so far.
+    """
+
+    dialect = None
+
+    def __init__(self, source: str):
+        self.source = source
+        self.round_trips = 0
+
+    @property
+    def uri(self) -> str:
+        """SQLAlchemy URI of the database (used by the LangChain SQLDatabase)"""
+        raise NotImplementedError
+
+    def load_catalog(self) -> SchemaCatalog:
+        raise NotImplementedError
+
+
+class SQLiteBackend(SchemaBackend):
+    """SQLite file introspected through pragma table-valued functions"""
+
+    dialect = "sqlite"
+
+    def __init__(self, db_path: str):
+        super().__init__(db_path)
+        self.db_path = db_path
+
+    @property
+    def uri(self) -> str:
+        return f"sqlite:///{self.db_path}"
+
+    def load_catalog(self) -> SchemaCatalog:
+        self.round_trips += 1
+        return load_schema_catalog(self.db_path)
+
+
+def _quote(name: str) -> str:
+    return "`" + name.replace("`", "``") + "`"
+
+
+def render_create_table(table_name: str, columns: List[ColumnInfo], primary_keys: List[str],
+                        foreign_keys: List[ForeignKeyInfo]) -> str:
+    """CREATE TABLE text rebuilt from information_schema rows, one column per line"""
+    lines = []
+    for column in columns:
+        line = f"    {_quote(column.name)} {column.type}"
+        if column.not_null:
+            line += " NOT NULL"
+        if column.default is not None:
+            line += f" DEFAULT {column.default}"
+        lines.append(line)
+    if primary_keys:
+        lines.append(f"    PRIMARY KEY ({', '.join(_quote(c) for c in primary_keys)})")
+    for fk in foreign_keys:
+        lines.append(f"    FOREIGN KEY ({_quote(fk.child_column)}) REFERENCES "
+                     f"{_quote(fk.parent_table)}({_quote(fk.parent_column or '')})")
+    return f"CREATE TABLE {_quote(table_name)} (\n" + ",\n".join(lines) + "\n)"
+
+
+class InformationSchemaBackend(SchemaBackend):
+    """Bulk introspection through the standard information_schema views (MySQL and compatible).
+
+    Four queries load the whole schema regardless of its size: TABLES (with
+    row estimates), COLUMNS, KEY_COLUMN_USAGE (primary and foreign keys) and
+    STATISTICS (indexes). CREATE TABLE text is rebuilt from those rows rather
+    than fetched per table.
+    """
+
+    dialect = None
+    placeholder = "%s"
+
+    def __init__(self, schema_name: str, source: Optional[str] = None):
+        super().__init__(source or schema_name)
+        self.schema_name = schema_name
+
+    def connect(self):
+        raise NotImplementedError
+
+    def _fetch(self, conn, sql: str) -> List[tuple]:
+        self.round_trips += 1
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql.replace("?", self.placeholder), (self.schema_name,))
+            return list(cursor.fetchall())
+        finally:
+            cursor.close()
+
+    def load_catalog(self) -> SchemaCatalog:
+        conn = self.connect()
+        try:
+            table_rows = self._fetch(conn, """
+                SELECT TABLE_NAME, TABLE_ROWS FROM information_schema.TABLES
+                WHERE TABLE_SCHEMA = ? AND TABLE_TYPE = 'BASE TABLE'
+                ORDER BY TABLE_NAME
+            """)
+            column_rows = self._fetch(conn, """
+                SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE, COLUMN_DEFAULT
+                FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = ?
+                ORDER BY TABLE_NAME, ORDINAL_POSITION
+            """)
+            key_rows = self._fetch(conn, """
+                SELECT TABLE_NAME, COLUMN_NAME, CONSTRAINT_NAME, REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME
+                FROM information_schema.KEY_COLUMN_USAGE
+                WHERE TABLE_SCHEMA = ?
+                ORDER BY TABLE_NAME, CONSTRAINT_NAME, ORDINAL_POSITION
+            """)
+            index_rows = self._fetch(conn, """
+                SELECT TABLE_NAME, INDEX_NAME, NON_UNIQUE, COLUMN_NAME
+                FROM information_schema.STATISTICS
+                WHERE TABLE_SCHEMA = ?
+                ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+            """)
+        finally:
+            conn.close()
+        return self._build_catalog(table_rows, column_rows, key_rows, index_rows)
+
+    def _build_catalog(self, table_rows, column_rows, key_rows, index_rows) -> SchemaCatalog:
+        tables = [name for name, _ in table_rows]
+        primary_keys = {name: [] for name in tables}
+        foreign_keys = {name: [] for name in tables}
+        fk_ids: Dict[str, Dict[str, int]] = {}
+        for table_name, column, constraint, parent_table, parent_column in key_rows:
+            if table_name not in primary_keys:
+                continue
+            if constraint == "PRIMARY":
+                primary_keys[table_name].append(column)
+            elif parent_table:
+                constraint_ids = fk_ids.setdefault(table_name, {})
+                fk_id = constraint_ids.setdefault(constraint, len(constraint_ids))
+                foreign_keys[table_name].append(
+                    ForeignKeyInfo(table_name, column, parent_table, parent_column, fk_id)
+                )
+
+        columns = {name: [] for name in tables}
+        for table_name, column, column_type, nullable, default in column_rows:
+            if table_name not in columns:
+                continue
+            pk = primary_keys[table_name]
+            columns[table_name].append(ColumnInfo(
+                column, column_type or "", nullable == "NO", default,
+                pk.index(column) + 1 if column in pk else 0
+            ))
+
+        index_columns: Dict[tuple, List[str]] = {}
+        index_unique = {}
+        for table_name, index_name, non_unique, column in index_rows:
+            if table_name not in columns:
+                continue
+            index_columns.setdefault((table_name, index_name), []).append(column)
+            index_unique[(table_name, index_name)] = not non_unique
+        indexes = {name: [] for name in tables}
+        for (table_name, index_name), cols in index_columns.items():
+            unique = index_unique[(table_name, index_name)]
+            origin = "pk" if index_name == "PRIMARY" else ("u" if unique else "c")
+            indexes[table_name].append(IndexInfo(index_name, tuple(cols), unique, origin, False))
+
+        row_estimates = dict(table_rows)
+        return SchemaCatalog.from_tables(self.source, [
+            TableInfo(
+                name=name,
+                ddl=render_create_table(name, columns[name], primary_keys[name], foreign_keys[name]),
+                columns=tuple(columns[name]),
+                primary_keys=tuple(primary_keys[name]),
+                foreign_keys=tuple(foreign_keys[name]),
+                indexes=tuple(indexes[name]),
+                row_estimate=int(row_estimates[name]) if row_estimates[name] is not None else None
+            )
+            for name in tables
+        ])
+
+
+class MySQLBackend(InformationSchemaBackend):
+    """MySQL / MariaDB over pymysql (imported on first connection)"""
+
+    dialect = "mysql"
+
+    def __init__(self, host: str, user: str, password: str, database: str, port: int = 3306):
+        super().__init__(database, source=f"mysql://{host}:{port}/{database}")
+        self.host = host
+        self.user = user
+        self.password = password
+        self.port = port
+
+    @property
+    def uri(self) -> str:
+        return f"mysql+pymysql://{self.user}:{quote(self.password)}@{self.host}:{self.port}/{self.schema_name}"
+
+    def connect(self):
+        import pymysql
+        return pymysql.connect(host=self.host, user=self.user, password=self.password,
+                               database=self.schema_name, port=self.port)
+
+
+class FakeInformationSchemaBackend(InformationSchemaBackend):
+    """In-memory SQLite stand-in for a server's information_schema, for tests.
+
+    The four information_schema tables the backend reads are created in an
+    attached ``:memory:`` database named ``information_schema`` and filled
+    with ``add_table`` or ``load_from_catalog``.
+    """
+
+    dialect = "fake"
+    placeholder = "?"
+
+    def __init__(self, schema_name: str = "fake"):
+        super().__init__(schema_name)
+        self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self._conn.execute("ATTACH DATABASE ':memory:' AS information_schema")
+        self._conn.executescript("""
+            CREATE TABLE information_schema.TABLES (
+                TABLE_SCHEMA TEXT, TABLE_NAME TEXT, TABLE_TYPE TEXT, TABLE_ROWS INTEGER);
+            CREATE TABLE information_schema.COLUMNS (
+                TABLE_SCHEMA TEXT, TABLE_NAME TEXT, COLUMN_NAME TEXT, ORDINAL_POSITION INTEGER,
+                COLUMN_TYPE TEXT, IS_NULLABLE TEXT, COLUMN_DEFAULT TEXT);
+            CREATE TABLE information_schema.KEY_COLUMN_USAGE (
+                TABLE_SCHEMA TEXT, TABLE_NAME TEXT, COLUMN_NAME TEXT, CONSTRAINT_NAME TEXT,
+                ORDINAL_POSITION INTEGER, REFERENCED_TABLE_NAME TEXT, REFERENCED_COLUMN_NAME TEXT);
+            CREATE TABLE information_schema.STATISTICS (
+                TABLE_SCHEMA TEXT, TABLE_NAME TEXT, INDEX_NAME TEXT, NON_UNIQUE INTEGER,
+                SEQ_IN_INDEX INTEGER, COLUMN_NAME TEXT);
+        """)
+
+    @property
+    def uri(self) -> str:
+        return "sqlite://"
+
+    def connect(self):
+        # The shared in-memory connection must outlive each load_catalog call
+        return _UnclosableConnection(self._conn)
+
+    def add_table(self, table: TableInfo) -> None:
+        schema = self.schema_name
+        conn = self._conn
+        conn.execute("INSERT INTO information_schema.TABLES VALUES (?, ?, 'BASE TABLE', ?)",
+                     (schema, table.name, table.row_estimate))
+        conn.executemany("INSERT INTO information_schema.COLUMNS VALUES (?, ?, ?, ?, ?, ?, ?)", [
+            (schema, table.name, c.name, i + 1, c.type, "NO" if c.not_null else "YES", c.default)
+            for i, c in enumerate(table.columns)
+        ])
+        conn.executemany(
+            "INSERT INTO information_schema.KEY_COLUMN_USAGE VALUES (?, ?, ?, 'PRIMARY', ?, NULL, NULL)", [
+                (schema, table.name, column, i + 1) for i, column in enumerate(table.primary_keys)
+            ])
+        conn.executemany("INSERT INTO information_schema.KEY_COLUMN_USAGE VALUES (?, ?, ?, ?, ?, ?, ?)", [
+            (schema, table.name, fk.child_column, f"fk_{table.name}_{fk.fk_id}", i + 1, fk.parent_table,
+             fk.parent_column)
+            for i, fk in enumerate(table.foreign_keys)
+        ])
+        conn.executemany("INSERT INTO information_schema.STATISTICS VALUES (?, ?, ?, ?, ?, ?)", [
+            (schema, table.name, index.name, int(not index.unique), i + 1, column)
+            for index in table.indexes for i, column in enumerate(index.columns)
+        ])
+        conn.commit()
+
+    def load_from_catalog(self, catalog: SchemaCatalog) -> "FakeInformationSchemaBackend":
+        """Mirror an existing catalog (e.g. of a SQLite file) into the fake information_schema"""
+        for table in catalog.tables:
+            self.add_table(table)
+        return self
+
+
+class _UnclosableConnection:
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self):
+        return self._conn.cursor()
+
+    def close(self):
+        pass
@@ -1,64 +1,42 @@
 import json
-from typing import Dict, List
-import sqlite3
+from typing import Dict, List, Optional
+
+from schema_catalog import SchemaCatalog, load_schema_catalog
 
 class DatabaseVisualizer:
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, catalog: Optional[SchemaCatalog] = None):
         self.db_path = db_path
+        # Shared schema catalog; loaded on first use when not supplied
+        self.catalog = catalog
 
     def get_table_info(self) -> Dict:
         """Get detailed table information including primary and foreign keys"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Get all tables
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")
-        tables = [row[0] for row in cursor.fetchall()]
-        
+        if self.catalog is None:
+            self.catalog = load_schema_catalog(self.db_path)
+
         table_info = {}
-        
-        for table_name in tables:
-            # Get column information
-            cursor.execute(f"PRAGMA table_info({table_name})")
-            columns = cursor.fetchall()
-            
-            # Get foreign key information
-            cursor.execute(f"PRAGMA foreign_key_list({table_name})")
-            foreign_keys = cursor.fetchall()
-            
-            # Get indices to identify primary keys
-            cursor.execute(f"PRAGMA index_list({table_name})")
-            indices = cursor.fetchall()
-            
-            primary_keys = []
-            for idx in indices:
-                if idx[2] == 1:  # is_primary
-                    cursor.execute(f"PRAGMA index_info({idx[1]})")
-                    pk_cols = cursor.fetchall()
-                    primary_keys.extend(col[2] for col in pk_cols)
-            
-            table_info[table_name] = {
+        for table in self.catalog.tables:
+            primary_keys = list(table.primary_keys)
+            table_info[table.name] = {
                 "columns": [
                     {
-                        "name": col[1],
-                        "type": col[2],
-                        "is_primary": col[1] in primary_keys,
-                        "is_nullable": not col[3]
+                        "name": col.name,
+                        "type": col.type,
+                        "is_primary": col.name in primary_keys,
+                        "is_nullable": not col.not_null
                     }
-                    for col in columns
+                    for col in table.columns
                 ],
                 "foreign_keys": [
                     {
-                        "from_column": fk[3],
-                        "to_table": fk[2],
-                        "to_column": fk[4]
+                        "from_column": fk.child_column,
+                        "to_table": fk.parent_table,
+                        "to_column": fk.parent_column
                     }
-                    for fk in foreign_keys
+                    for fk in table.foreign_keys
                 ],
                 "primary_keys": primary_keys
             }
-        
-        conn.close()
         return table_info
 
     def generate_cytoscape_elements(self) -> Dict:
@@ -0,0 +1,136 @@
+import glob
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from purge_estimator import PurgeEstimator, summarize_by_rcc
+from schema_catalog import SchemaCatalog, load_schema_catalog
+
+
+def discover_databases(source: str) -> List[str]:
+    """Database paths from a glob pattern or a manifest file.
+
+    A manifest is either a JSON list (or ``{"databases": [...]}``) or a text
+    file with one path per line; relative paths are resolved against the
+    manifest's directory.
+    """
+    if os.path.isfile(source) and source.endswith((".json", ".txt", ".manifest")):
+        with open(source) as f:
+            text = f.read()
+        if source.endswith(".json"):
+            data = json.loads(text)
+            paths = data.get("databases", []) if isinstance(data, dict) else data
+        else:
+            paths = [line.strip() for line in text.splitlines() if line.strip() and not line.startswith("#")]
+        base = os.path.dirname(os.path.abspath(source))
+        return [p if os.path.isabs(p) else os.path.join(base, p) for p in paths]
+    return sorted(glob.glob(source, recursive=True))
+
+
+def _introspect(db_path: str) -> SchemaCatalog:
+    return load_schema_catalog(db_path)
+
+
+def _estimate_shard(db_path: str, table_analysis: Dict[str, Dict], full_scan: bool) -> Dict[str, Dict]:
+    catalog = load_schema_catalog(db_path)
+    profiles = {t: info.get("column_profile") for t, info in table_analysis.items() if info.get("column_profile")}
+    return PurgeEstimator(full_scan=full_scan).estimate(db_path, catalog, table_analysis, profiles)
+
+
+def group_by_schema(catalogs: Dict[str, SchemaCatalog]) -> Dict[str, List[str]]:
+    """Databases grouped by schema hash, in input order; the first of each group is its representative"""
+    groups = {}
+    for db_path, catalog in catalogs.items():
+        groups.setdefault(catalog.schema_hash, []).append(db_path)
+    return groups
+
+
+def run_fleet_scan(sources: List[str], report_path: Optional[str] = "fleet_report.json",
+                   max_workers: Optional[int] = None, purge_full_scan: bool = False,
+                   **analyzer_kwargs) -> Dict:
+    """Analyze a fleet of SQLite databases, sending each distinct schema to the LLM once.
+
+    Every database is introspected in a process pool and grouped by schema
+    hash. The first database of each group is analyzed with the LLM (all
+    analyses share the LLM response cache, so tables defined identically in
+    different schemas also hit the cache); its results are applied to every
+    database with that schema, and purge volumes are estimated per database
+    in the pool. ``analyzer_kwargs`` go to GroqLangChainTableAnalyzer.
+    """
+    from groq_langchain_analyzer import GroqLangChainTableAnalyzer
+
+    databases = []
+    for source in sources:
+        databases.extend(path for path in discover_databases(source) if path not in databases)
+    if not databases:
+        return {"error": "No databases matched", "sources": sources}
+
+    print(f"Fleet scan: introspecting {len(databases)} databases...")
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        catalogs = dict(zip(databases, pool.map(_introspect, databases)))
+    schema_groups = group_by_schema(catalogs)
+    print(f"Fleet scan: {len(schema_groups)} distinct schemas across {len(databases)} databases")
+
+    schema_reports = {}
+    for schema_hash, members in schema_groups.items():
+        representative = members[0]
+        print(f"Fleet scan: analyzing schema {schema_hash} via {representative} ({len(members)} databases)")
+        analyzer = GroqLangChainTableAnalyzer(representative, estimate_purge=False, **analyzer_kwargs)
+        schema_reports[schema_hash] = analyzer.create_comprehensive_report()
+
+    # Purge volumes depend on each database's data, so they are estimated per database
+    database_detail = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {}
+        for schema_hash, members in schema_groups.items():
+            table_analysis = schema_reports[schema_hash].get("table_analysis")
+            if not table_analysis:
+                continue
+            for db_path in members:
+                futures[db_path] = pool.submit(_estimate_shard, db_path, table_analysis, purge_full_scan)
+        for db_path in databases:
+            catalog = catalogs[db_path]
+            detail = {
+                "schema_hash": catalog.schema_hash,
+                "representative": schema_groups[catalog.schema_hash][0],
+                "total_tables": len(catalog.tables),
+                "total_rows": sum(t.row_estimate or 0 for t in catalog.tables)
+            }
+            if db_path in futures:
+                try:
+                    estimates = futures[db_path].result()
+                    detail["purge_estimates"] = estimates
+                    detail["purge_estimates_by_rcc"] = summarize_by_rcc(estimates)
+                except Exception as e:
+                    print(f"WARNING: Purge estimation failed for {db_path}: {e}")
+                    detail["error"] = str(e)
+            else:
+                detail["error"] = schema_reports[catalog.schema_hash].get("error", "Schema analysis failed")
+            database_detail[db_path] = detail
+
+    fleet_totals = {}
+    for detail in database_detail.values():
+        for rcc, totals in detail.get("purge_estimates_by_rcc", {}).items():
+            entry = fleet_totals.setdefault(rcc, {"databases": 0, "eligible_rows": 0, "estimated_freed_bytes": 0})
+            entry["databases"] += 1
+            entry["eligible_rows"] += totals["eligible_rows"]
+            entry["estimated_freed_bytes"] += totals["estimated_freed_bytes"]
+
+    report = {
+        "analysis_timestamp": datetime.now().isoformat(),
+        "analysis_type": "Fleet scan",
+        "total_databases": len(databases),
+        "distinct_schemas": len(schema_groups),
+        "schemas": {
+            schema_hash: {"databases": members, "report": schema_reports[schema_hash]}
+            for schema_hash, members in schema_groups.items()
+        },
+        "database_detail": database_detail,
+        "purge_estimates_by_rcc": fleet_totals
+    }
+    if report_path:
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+    return report
@@ -5,7 +5,9 @@ import os
 from datetime import datetime
 import json
 import re
-from typing import Dict, List, Tuple, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple, Any, Callable, Optional
 
 # LangChain imports for ChatGroq
 from langchain_community.utilities.sql_database import SQLDatabase
@@ -18,21 +20,125 @@ from dotenv import load_dotenv
 
 # Local imports
 from retention_manager import RetentionManager, RetentionClassCode, RetentionType
+from llm_cache import LLMResponseCache
+from llm_scheduler import LLMScheduler, estimate_tokens, DEFAULT_OUTPUT_TOKENS
+from rcc_rules import RuleBasedRCCClassifier, extract_column_names
+from streaming_json import IncrementalJSONEntryParser
+from schema_catalog import SchemaCatalog
+from db_backends import SchemaBackend, SQLiteBackend
+from column_profiler import ColumnProfiler, format_profile_hint
+from purge_estimator import PurgeEstimator, summarize_by_rcc
+from index_advisor import IndexAdvisor, recommended_indexes
+from schema_fingerprint import compute_table_fingerprints, tables_needing_analysis
+from schema_graph import (
+    build_fk_adjacency, connected_components, split_component, pack_partitions,
+    compute_purge_ranks, find_cross_group_edges, merge_fk_linked_groups
+)
 
 load_dotenv()
 
+
 class GroqLangChainTableAnalyzer:
     """
     LangChain implementation using ChatGroq for database table categorization
     Fixed JSON parsing issues and removed fallback approaches
     """
 
-    def __init__(self, db_path: str, mock_mode: bool = False):
+    def __init__(self, db_path: str, mock_mode: bool = False, max_concurrency: int = 1,
+                 cache_path: Optional[str] = None, batch_rcc: bool = False,
+                 rcc_batch_token_budget: int = 6000, rcc_batch_max_tables: int = 25,
+                 incremental: bool = False, report_path: Optional[str] = None,
+                 categorization_token_budget: int = 8000, priority_mode: str = "graph",
+                 llm_tie_break: bool = False, rule_based_rcc: bool = False,
+                 rcc_rule_threshold: float = 0.75, rcc_name_patterns: Optional[Dict[str, List[str]]] = None,
+                 streaming: bool = False, on_stream_entry: Optional[Callable[[str, str, Dict], None]] = None,
+                 requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                 latency_target: Optional[float] = None, rcc_mode: str = "fused",
+                 schema_source: str = "ddl", sample_rows: int = 0,
+                 column_profiling: bool = True, profile_sample_threshold: int = 1_000_000,
+                 estimate_purge: bool = True, purge_full_scan: bool = False,
+                 backend: Optional[SchemaBackend] = None, index_advice: bool = True):
         self.db_path = db_path
+        # Where the schema comes from; profiling, sampling and purge estimates need a SQLite backend
+        self.backend = backend or SQLiteBackend(db_path)
         self.mock_mode = mock_mode
+        # Upper bound on LLM requests in flight at once (1 = sequential)
+        self.max_concurrency = max(1, int(max_concurrency))
+        # Every LLM call goes through the scheduler: RPM/TPM buckets, retries, adaptive concurrency
+        self.llm_scheduler = None if mock_mode else LLMScheduler(
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+            max_concurrency=self.max_concurrency,
+            latency_target=latency_target
+        )
+        # Optional disk cache of LLM responses (None disables caching)
+        self.llm_cache = LLMResponseCache(cache_path) if cache_path and not mock_mode else None
+        # Batched RCC classification: several tables per prompt, sized by a token budget
+        self.batch_rcc = batch_rcc
+        self.rcc_batch_token_budget = rcc_batch_token_budget
+        self.rcc_batch_max_tables = rcc_batch_max_tables
+        # Incremental mode: reuse results for tables whose fingerprint is unchanged
+        # since the report stored at report_path
+        self.incremental = incremental
+        self.report_path = report_path
+        self.table_fingerprints = {}
+        self.reanalyzed_tables = []
+        # Schema catalog and FK relationships, refreshed at the start of every analysis run
+        self._catalog = None
+        self._relationships = None
+        # Categorization prompts are split along FK components to stay under this size
+        self.categorization_token_budget = categorization_token_budget
+        # "graph": purge ranks from a topological sort of the FK graph (no LLM call);
+        # "llm": one priority prompt per group. llm_tie_break lets the LLM order
+        # tables that share a graph rank.
+        if priority_mode not in ("graph", "llm"):
+            raise ValueError(f"Unknown priority_mode: {priority_mode}")
+        self.priority_mode = priority_mode
+        self.llm_tie_break = llm_tie_break
+        self.cross_group_edges = []
+        self.group_merges = {}
+        # "fused": one prompt returns both the RCC and the retention lookup columns;
+        # "two_step": separate RCC and retention-column prompts (kept for A/B comparison)
+        if rcc_mode not in ("fused", "two_step"):
+            raise ValueError(f"Unknown rcc_mode: {rcc_mode}")
+        self.rcc_mode = "two_step" if mock_mode else rcc_mode
+        if batch_rcc and self.rcc_mode == "fused":
+            # A batched RCC answer still needs a column prompt per table: more calls than one fused prompt each
+            print("WARNING: --batch-rcc has no effect with rcc_mode='fused'; use rcc_mode='two_step' to batch")
+            self.batch_rcc = False
+        # RCC prompts sent by batched classification in the current run
+        self.rcc_batch_calls = 0
+        # Stream categorization/priority replies and act on each table entry as soon as it is complete
+        self.streaming = streaming and not mock_mode
+        # Optional hook called as on_stream_entry(stage, table_name, entry) for every streamed entry
+        self.on_stream_entry = on_stream_entry
+        # Optional rule-based RCC fast path; only ambiguous tables reach the LLM
+        self.rcc_rule_classifier = (
+            RuleBasedRCCClassifier(name_patterns=rcc_name_patterns, threshold=rcc_rule_threshold)
+            if rule_based_rcc else None
+        )
+
+        # "ddl": table definitions straight from sqlite_master (one query, no sampling);
+        # "langchain": SQLDatabase reflection with its per-table sample rows
+        if schema_source not in ("ddl", "langchain"):
+            raise ValueError(f"Unknown schema_source: {schema_source}")
+        self.schema_source = schema_source
+        # Sample rows shown to the LLM in DDL mode (0 = none); fetched lazily, only
+        # for tables whose archival analysis actually reaches the LLM
+        self.sample_rows = max(0, int(sample_rows))
+        self._sample_text = {}
+        # Per-column statistics (one aggregate query per table, block-sampled above
+        # profile_sample_threshold rows) fed to the RCC and retention prompts
+        self.column_profiler = (
+            ColumnProfiler(sample_threshold_rows=profile_sample_threshold) if column_profiling else None
+        )
+        self.column_profiles = {}
+        # Profiles by table fingerprint, reused while a table's schema is unchanged
+        self._profile_cache = {}
 
-        # Initialize LangChain SQLDatabase
-        self.db = SQLDatabase.from_uri(f"sqlite:///{db_path}")
+        # LangChain SQLDatabase and toolkit reflect the whole database, so they are built on first use
+        self._db = None
+        self._toolkit = None
 
         if not mock_mode:
             # Initialize ChatGroq LLM
@@ -40,15 +146,9 @@ class GroqLangChainTableAnalyzer:
                 model="llama-3.3-70b-versatile",  # or use "mixtral-8x7b-32768"
                 temperature=0
             )
-
-            # Create SQL toolkit
-            self.toolkit = SQLDatabaseToolkit(db=self.db, llm=self.llm)
-            self.tools = self.toolkit.get_tools()
         else:
             # Mock mode doesn't need LLM or toolkit initialization
             self.llm = None
-            self.toolkit = None
-            self.tools = []
             
             # Import mock methods dynamically to avoid circular imports
             from run_mock_analysis import (
@@ -71,10 +171,18 @@ class GroqLangChainTableAnalyzer:
         
         # Initialize retention manager
         self.retention_manager = RetentionManager()
+        # Eligible-row and freed-bytes estimates per table; full scans only when purge_full_scan is set
+        self.purge_estimator = (
+            PurgeEstimator(self.retention_manager, sample_threshold_rows=profile_sample_threshold,
+                           full_scan=purge_full_scan)
+            if estimate_purge else None
+        )
+        # EXPLAIN QUERY PLAN check of each retention predicate, with index suggestions for full scans
+        self.index_advisor = IndexAdvisor(self.retention_manager) if index_advice else None
 
         # Step 1: Relationship-based table categorization prompt
         self.categorization_prompt = PromptTemplate(
-            input_variables=["table_schemas", "relationships_data"],
+            input_variables=["table_schemas", "relationships_data", "existing_groups"],
             template="""You are a database analyst. Create groups of related tables that should be purged together.
 
 GROUPING RULES:
@@ -84,6 +192,7 @@ GROUPING RULES:
 4. Keep number of groups minimal (ideally 3-5 groups) by combining related business concepts
 5. Each table MUST belong to exactly one group
 6. Name groups based on the primary business entity or process they represent
+7. A table linked by a foreign key to an already-grouped table MUST use that table's existing group name; reuse existing group names wherever they fit
 
 Table Definitions and Relationships:
 {table_schemas}
@@ -91,6 +200,9 @@ Table Definitions and Relationships:
 Relationship Data:
 {relationships_data}
 
+Existing Groups (tables grouped by an earlier analysis, not re-grouped now):
+{existing_groups}
+
 IMPORTANT: Return ONLY valid JSON in this exact format with no additional text:
 
 {{
@@ -109,6 +221,39 @@ IMPORTANT: Return ONLY valid JSON in this exact format with no additional text:
 }}"""
         )
 
+        # Step 1 (partitioned): merge groups created independently for each schema partition
+        self.group_reconciliation_prompt = PromptTemplate(
+            input_variables=["partition_groups", "cross_partition_relationships"],
+            template="""You are a database analyst. A large database was split into partitions and the tables of each partition were grouped separately. Merge these partition groups into one consistent set of final groups of tables that should be purged together.
+
+MERGING RULES:
+1. Partition groups that represent the same business entity or process MUST map to the same final group
+2. Partition groups linked by a cross-partition foreign key MUST map to the same final group
+3. Keep the number of final groups minimal while keeping unrelated business concepts apart
+4. Every partition group MUST be mapped to exactly one final group
+5. Name final groups based on the primary business entity or process they represent
+
+Partition Groups:
+{partition_groups}
+
+Cross-Partition Foreign Keys:
+{cross_partition_relationships}
+
+IMPORTANT: Return ONLY valid JSON in this exact format with no additional text:
+
+{{
+  "groups": {{
+    "FINAL_GROUP_NAME": {{
+      "description": "Brief description of what this group represents",
+      "primary_entity": "The main business entity or process this group revolves around"
+    }}
+  }},
+  "group_mapping": {{
+    "PARTITION_GROUP_ID": "FINAL_GROUP_NAME"
+  }}
+}}"""
+        )
+
         # Step 2.1 RCC Classification prompt
         self.rcc_classification_prompt = PromptTemplate(
             input_variables=["table_schema", "table_content", "available_rccs"],
@@ -137,6 +282,75 @@ Return ONLY valid JSON in this exact format:
 """
         )
 
+        # Step 2.1 (batched) RCC Classification prompt for several tables at once
+        self.rcc_batch_classification_prompt = PromptTemplate(
+            input_variables=["table_schemas", "available_rccs"],
+            template="""You are a data retention expert. Classify EACH of the database tables below into the most appropriate Retention Class Code (RCC) based on its schema.
+
+Available RCCs:
+{available_rccs}
+
+CLASSIFICATION RULES:
+1. Analyze the table name, column names, and data types to determine the business purpose
+2. Match the table's purpose to the most appropriate RCC category
+3. Consider the data sensitivity and retention requirements
+4. Look for key indicators like: financial data, audit logs, customer data, HR records, etc.
+5. Classify every table independently and use ONLY RCC codes from the list above
+6. Return exactly one entry per table, keyed by the exact table name
+
+Tables:
+{table_schemas}
+
+Return ONLY valid JSON in this exact format:
+
+{{
+    "classifications": {{
+        "table_name": {{
+            "assigned_rcc": "RCC_CODE",
+            "reasoning": "Short explanation of why this RCC was chosen"
+        }}
+    }}
+}}
+"""
+        )
+
+        # Step 2 (fused) RCC classification and retention lookup columns in one prompt
+        self.rcc_fused_prompt = PromptTemplate(
+            input_variables=["table_schema", "table_content", "available_rccs"],
+            template="""You are a data retention expert. Classify this database table into the most appropriate Retention Class Code (RCC), then pick the columns to use as retention lookup keys for that RCC.
+
+Table Schema:
+{table_schema}
+
+Table Content Hint: {table_content}
+
+Available RCCs (code: description (retention type, years) [lookup column hints]):
+{available_rccs}
+
+CLASSIFICATION RULES:
+1. Analyze the table name, column names, and data types to determine the business purpose
+2. Match the table's purpose to the most appropriate RCC category
+3. Consider the data sensitivity and retention requirements
+4. Look for key indicators like: financial data, audit logs, customer data, HR records, etc.
+
+RETENTION LOOKUP COLUMN RULES:
+1. Use ONLY column names that exist in the table schema above
+2. For Creation-Based Retention: columns recording when the record was created (e.g., `created_at`, `creation_date`)
+3. For Active-Plus Retention: the column indicating whether the record is active (e.g., `is_active`) plus a date column
+4. For Event-Based Retention: columns tracking the triggering event (e.g., `termination_date`, `last_updated`)
+5. Prioritize columns that align with the lookup column hints of the chosen RCC
+
+Return ONLY valid JSON in this exact format:
+
+{{
+    "assigned_rcc": "RCC_CODE",
+    "reasoning": "Why this RCC was chosen based on table characteristics",
+    "retention_lookup_columns": ["created_at", "is_active"],
+    "retention_reasoning": "Why these columns determine retention for the chosen RCC"
+}}
+"""
+        )
+
         # Step 2.2 Prompt for finding the retention lookup column
 #         self.retention_column_prompt = PromptTemplate(
 #             input_variables=["table_schema", "rcc_type", "retention_context", "retention_years", "rcc_hints"],
@@ -248,8 +462,30 @@ Return ONLY valid JSON:
         )
         
 
+    @property
+    def db(self) -> SQLDatabase:
+        """LangChain SQLDatabase, created on first use"""
+        if self._db is None:
+            self._db = SQLDatabase.from_uri(self.backend.uri)
+        return self._db
+
+    @property
+    def toolkit(self) -> Optional[SQLDatabaseToolkit]:
+        """LangChain SQL toolkit, created on first use (None in mock mode)"""
+        if self._toolkit is None and self.llm is not None:
+            self._toolkit = SQLDatabaseToolkit(db=self.db, llm=self.llm)
+        return self._toolkit
+
+    @property
+    def tools(self) -> List:
+        return self.toolkit.get_tools() if self.toolkit is not None else []
+
     def get_table_schemas(self):
-        """Get table definitions using LangChain SQLDatabase"""
+        """Get table definitions, from sqlite_master DDL or LangChain SQLDatabase"""
+        if self.schema_source == "ddl":
+            self._sample_text = {}
+            return {table.name: f"\n{table.ddl}\n" for table in self.catalog.tables if table.ddl}
+
         table_names = self.db.get_usable_table_names()
         schemas = {}
 
@@ -262,46 +498,182 @@ Return ONLY valid JSON:
 
         return schemas
 
-    def analyze_foreign_key_relationships(self):
-        """Analyze foreign key relationships using database introspection"""
+    def get_sample_rows_text(self, table_name: str) -> str:
+        """A few sample rows of a table for the LLM prompt, fetched once per run (DDL mode only)"""
+        if self.schema_source != "ddl" or not self.sample_rows or self.backend.dialect != "sqlite":
+            return ""
+        if table_name in self._sample_text:
+            return self._sample_text[table_name]
+
+        text = ""
         conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Get all tables
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")
-        tables = [row[0] for row in cursor.fetchall()]
-        
-        relationships = {}
-        
-        for table_name in tables:
-            # Get foreign keys for this table
-            cursor.execute(f"PRAGMA foreign_key_list({table_name})")
-            foreign_keys = cursor.fetchall()
-            
-            # Find what tables reference this table
-            referenced_by = []
-            for other_table in tables:
-                if other_table != table_name:
-                    cursor.execute(f"PRAGMA foreign_key_list({other_table})")
-                    other_fks = cursor.fetchall()
-                    for fk in other_fks:
-                        if fk[2] == table_name:  # Referenced table
-                            referenced_by.append({
-                                "child_table": other_table,
-                                "child_column": fk[3],
-                                "parent_column": fk[4]
-                            })
-            
-            relationships[table_name] = {
-                "foreign_keys": [{"parent_table": fk[2], "parent_column": fk[4], "child_column": fk[3]} for fk in foreign_keys],
-                "referenced_by": referenced_by,
-                "has_foreign_keys": len(foreign_keys) > 0,
-                "is_referenced": len(referenced_by) > 0
-            }
-        
-        conn.close()
-        return relationships
+        try:
+            cursor = conn.execute(f'SELECT * FROM "{table_name}" LIMIT {self.sample_rows}')
+            columns = [d[0] for d in cursor.description]
+            rows = ["\t".join(str(v)[:100] for v in row) for row in cursor.fetchall()]
+            text = f"{len(rows)} rows from {table_name} table:\n" + "\t".join(columns) + "\n" + "\n".join(rows)
+        except sqlite3.Error as e:
+            print(f"Warning: Could not sample rows from {table_name}: {e}")
+        finally:
+            conn.close()
+        self._sample_text[table_name] = text
+        return text
+
+    def profile_columns(self, table_names: List[str], previous_report: Optional[Dict] = None) -> Dict[str, Dict]:
+        """Column profiles of the given tables, reusing any whose table fingerprint is unchanged"""
+        if self.column_profiler is None or self.backend.dialect != "sqlite":
+            return {}
+        previous_analysis = (previous_report or {}).get("table_analysis", {})
+        previous_fingerprints = (previous_report or {}).get("table_fingerprints", {})
+
+        profiles = {}
+        to_profile = []
+        for table_name in table_names:
+            fingerprint = self.table_fingerprints.get(table_name)
+            previous_profile = previous_analysis.get(table_name, {}).get("column_profile")
+            if fingerprint in self._profile_cache:
+                profiles[table_name] = self._profile_cache[fingerprint]
+            elif previous_profile and fingerprint and previous_fingerprints.get(table_name) == fingerprint:
+                profiles[table_name] = previous_profile
+            else:
+                table = self.catalog.table(table_name)
+                if table is not None:
+                    to_profile.append(table)
+
+        profiles.update(self.column_profiler.profile_tables(self.db_path, to_profile))
+        for table_name, profile in profiles.items():
+            fingerprint = self.table_fingerprints.get(table_name)
+            if fingerprint:
+                self._profile_cache[fingerprint] = profile
+        print(f"Profiled {len(to_profile)} tables ({len(profiles) - len(to_profile)} profiles reused)")
+        return profiles
+
+    def estimate_purge_volumes(self, analysis_results: Dict[str, Dict]) -> Dict[str, Dict]:
+        """Rows eligible for purging and bytes freed per table, from its RCC and lookup columns"""
+        if self.purge_estimator is None or self.backend.dialect != "sqlite":
+            return {}
+        print("Estimating purge volumes...")
+        return self.purge_estimator.estimate(self.db_path, self.catalog, analysis_results, self.column_profiles)
+
+    def advise_indexes(self, analysis_results: Dict[str, Dict],
+                       purge_estimates: Dict[str, Dict]) -> Dict[str, Dict]:
+        """Whether each table's retention predicate uses an index, with a suggested index if not"""
+        if self.index_advisor is None or self.backend.dialect != "sqlite":
+            return {}
+        print("Checking retention predicate indexes...")
+        return self.index_advisor.advise(self.db_path, self.catalog, analysis_results, self.column_profiles,
+                                         purge_estimates)
+
+    def _content_hint(self, table_name: str) -> str:
+        """Table content shown to the LLM: the column profile plus any sample rows"""
+        parts = [format_profile_hint(self.column_profiles.get(table_name)), self.get_sample_rows_text(table_name)]
+        return "\n".join(part for part in parts if part)
+
+    @property
+    def catalog(self) -> SchemaCatalog:
+        """Schema catalog of the database, loaded once per analysis run"""
+        if self._catalog is None:
+            self._catalog = self.backend.load_catalog()
+        return self._catalog
+
+    def get_table_ddl(self) -> Dict[str, str]:
+        """Get the CREATE TABLE statement of every user table"""
+        return {table.name: table.ddl for table in self.catalog.tables}
+
+    def analyze_foreign_key_relationships(self):
+        """Analyze foreign key relationships using database introspection
+
+        The FK graph comes from the shared schema catalog, which reads every
+        FK with a single query; the result is memoized until the next
+        analysis run.
+        """
+        if self._relationships is None:
+            self._relationships = self.catalog.relationships()
+        return self._relationships
     
+    def _cache_key(self, prompt: PromptTemplate, inputs: Dict) -> Optional[str]:
+        """Content address of a prompt invocation, or None when caching is off"""
+        if self.llm_cache is None:
+            return None
+        return LLMResponseCache.make_key(
+            prompt.template, inputs,
+            getattr(self.llm, "model_name", ""),
+            self.retention_manager.catalog_version
+        )
+
+    def _schedule(self, call: Callable[[], Any], prompt: PromptTemplate, inputs: Dict) -> Any:
+        """Run an LLM call through the rate-limit scheduler"""
+        if self.llm_scheduler is None:
+            return call()
+        estimated = estimate_tokens(prompt.format(**inputs)) + DEFAULT_OUTPUT_TOKENS
+        return self.llm_scheduler.run(call, estimated)
+
+    def _invoke_json(self, prompt: PromptTemplate, **inputs) -> Dict:
+        """Run a prompt through the LLM and parse the JSON reply, consulting the response cache.
+
+        Only replies that parse to a non-empty object are cached, so a malformed
+        answer is retried on the next run instead of being replayed.
+        """
+        cache_key = self._cache_key(prompt, inputs)
+        if cache_key is not None:
+            cached = self.llm_cache.get(cache_key)
+            if cached is not None:
+                return self.parse_json_response(cached)
+
+        chain = LLMChain(prompt=prompt, llm=self.llm)
+        response = self._schedule(lambda: chain.run(**inputs), prompt, inputs)
+        result = self.parse_json_response(response)
+
+        if cache_key is not None and result:
+            self.llm_cache.put(cache_key, response, getattr(self.llm, "model_name", ""))
+        return result
+
+    def _invoke_json_streaming(self, prompt: PromptTemplate, entry_path: Tuple[str, ...],
+                               on_entry: Callable[[str, Any], None], **inputs) -> Dict:
+        """Like _invoke_json, but reads the LLM token stream.
+
+        ``on_entry(key, value)`` is called for every entry of the object at
+        ``entry_path`` (e.g. ``("analysis",)``) as soon as that entry is
+        complete, long before the full reply has arrived. Cached replies are
+        replayed through the same callback.
+        """
+        emitted = set()
+
+        def emit(entries):
+            for key, value in entries:
+                # A retried attempt streams the reply again from the start: deliver each entry once
+                if key in emitted:
+                    continue
+                emitted.add(key)
+                try:
+                    on_entry(key, value)
+                except Exception as e:
+                    print(f"ERROR: Streaming callback failed for {key}: {e}")
+
+        cache_key = self._cache_key(prompt, inputs)
+        if cache_key is not None:
+            cached = self.llm_cache.get(cache_key)
+            if cached is not None:
+                emit(IncrementalJSONEntryParser(entry_path).feed(cached))
+                return self.parse_json_response(cached)
+
+        def stream_reply():
+            parser = IncrementalJSONEntryParser(entry_path)
+            chunks = []
+            for chunk in self.llm.stream(prompt.format(**inputs)):
+                text = getattr(chunk, "content", chunk)
+                if not isinstance(text, str):
+                    continue
+                chunks.append(text)
+                emit(parser.feed(text))
+            return "".join(chunks)
+
+        response = self._schedule(stream_reply, prompt, inputs)
+        result = self.parse_json_response(response)
+        if cache_key is not None and result:
+            self.llm_cache.put(cache_key, response, getattr(self.llm, "model_name", ""))
+        return result
+
     def parse_json_response(self, response_text: str):
         """Parse JSON from LLM response with comprehensive error handling"""
         try:
@@ -351,27 +723,29 @@ Return ONLY valid JSON:
                 print(f"ERROR: JSON parsing failed: {e}")
                 print(f"Response text: {response_text[:300]}...")
                 return {}
+    def _rcc_descriptions(self) -> str:
+        """Render the RCC catalog for inclusion in classification prompts"""
+        return "\n".join([
+            f"{code}: {rule.description} ({rule.retention_type.value}, {rule.years} years)"
+            for code, rule in self.retention_manager.available_rccs.items()
+        ])
+
     # Step 2.1
     def classify_table_rcc(self, table_name: str, schema: str, content_hint: str = "") -> Dict:
         """Classify a table into a Retention Class Code using LLM"""
         try:
             # Get available RCCs and their rules
             rccs = self.retention_manager.available_rccs
-            rcc_descriptions = "\n".join([
-                f"{code}: {rule.description} ({rule.retention_type.value}, {rule.years} years)"
-                for code, rule in rccs.items()
-            ])
+            rcc_descriptions = self._rcc_descriptions()
             
             # Run LLM classification
-            chain = LLMChain(prompt=self.rcc_classification_prompt, llm=self.llm)
-            response = chain.run(
+            result = self._invoke_json(
+                self.rcc_classification_prompt,
                 table_schema=schema,
                 table_content=content_hint,
                 available_rccs=rcc_descriptions
             )
             
-            result = self.parse_json_response(response)
-            
             # Validate RCC exists
             assigned_rcc = result.get("assigned_rcc")
             if assigned_rcc and assigned_rcc not in rccs:
@@ -382,8 +756,75 @@ Return ONLY valid JSON:
         except Exception as e:
             print(f"ERROR: RCC classification failed for {table_name}: {e}")
             return {}
+    def _pack_rcc_batches(self, table_schemas: Dict[str, str]) -> List[List[str]]:
+        """Greedily pack tables into batches that fit the RCC batch token budget"""
+        overhead = estimate_tokens(self.rcc_batch_classification_prompt.template + self._rcc_descriptions())
+        batches = []
+        current = []
+        current_tokens = overhead
+        for table_name, schema in table_schemas.items():
+            table_tokens = estimate_tokens(f"\nTable: {table_name}\n{schema}\n")
+            if current and (current_tokens + table_tokens > self.rcc_batch_token_budget
+                            or len(current) >= self.rcc_batch_max_tables):
+                batches.append(current)
+                current = []
+                current_tokens = overhead
+            current.append(table_name)
+            current_tokens += table_tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def classify_tables_rcc_batch(self, table_schemas: Dict[str, str]) -> Dict[str, Dict]:
+        """Classify many tables with one prompt per batch instead of one per table.
+
+        Batches are sized by ``rcc_batch_token_budget``. Tables that are missing
+        from a batch answer, or whose answer names an unknown RCC, are retried
+        individually with ``classify_table_rcc``.
+        """
+        rccs = self.retention_manager.available_rccs
+        rcc_descriptions = self._rcc_descriptions()
+        batches = self._pack_rcc_batches(table_schemas)
+        print(f"Step 2.1: Classifying {len(table_schemas)} tables into RCCs in {len(batches)} batched prompts...")
+
+        def run_batch(batch):
+            schema_text = "".join(f"\nTable: {name}\n{table_schemas[name]}\n" for name in batch)
+            result = self._invoke_json(
+                self.rcc_batch_classification_prompt,
+                table_schemas=schema_text,
+                available_rccs=rcc_descriptions
+            )
+            return result.get("classifications", {})
+
+        batch_answers = self._run_isolated({f"rcc batch {i + 1}": (lambda b=batch: run_batch(b))
+                                            for i, batch in enumerate(batches)})
+        self.rcc_batch_calls += len(batches)
+
+        results = {}
+        for batch, answer in zip(batches, batch_answers.values()):
+            if isinstance(answer, Exception) or not isinstance(answer, dict):
+                answer = {}
+            for table_name in batch:
+                entry = answer.get(table_name)
+                if isinstance(entry, dict) and entry.get("assigned_rcc") in rccs:
+                    results[table_name] = {**entry, "decided_by": "llm_batch"}
+
+        retry = [name for name in table_schemas if name not in results]
+        if retry:
+            print(f"Retrying RCC classification individually for {len(retry)} tables: {', '.join(retry)}")
+            self.rcc_batch_calls += len(retry)
+            retried = self._run_isolated({
+                name: (lambda n=name: self.classify_table_rcc(n, table_schemas[n], self._content_hint(n)))
+                for name in retry
+            })
+            for name, entry in retried.items():
+                results[name] = {**entry, "decided_by": "llm"} if isinstance(entry, dict) and entry else {}
+
+        return {name: results[name] for name in table_schemas}
+
     # Step 2.2
-    def analyze_retention_columns(self, table_name: str, schema: str, rcc_code: str) -> Dict:
+    def analyze_retention_columns(self, table_name: str, schema: str, rcc_code: str,
+                                  content_hint: str = "") -> Dict:
         """Find the appropriate retention lookup column based on RCC type"""
         try:
             # Get retention rule for this RCC
@@ -401,59 +842,204 @@ Return ONLY valid JSON:
                 context = f"Find the column that tracks the timing of: {rule.description}"
             # "table_schema", "rcc_type", "retention_context", "retention_years", "rcc_hints"
             # Run LLM analysis to find the retention lookup column
-            chain = LLMChain(prompt=self.retention_column_prompt, llm=self.llm)
-            response = chain.run(
-                table_schema=schema,
+            return self._invoke_json(
+                self.retention_column_prompt,
+                table_schema=f"{schema}\n{content_hint}" if content_hint else schema,
                 rcc_type=rule.retention_type.value,
                 retention_context=context,
                 retention_years=rule.years,
                 rcc_hints=rcc_hints
             )
-            
-            return self.parse_json_response(response)
         except Exception as e:
             print(f"ERROR: Retention column analysis failed for {table_name}: {e}")
             return {"error": str(e)}
+    def _format_relationship_text(self, tables: List[str], relationships: Dict[str, Dict]) -> str:
+        """Render the FK relationships of the given tables for the categorization prompt"""
+        relationship_text = ""
+        for table_name in tables:
+            rel_info = relationships.get(table_name)
+            if not rel_info:
+                continue
+            relationship_text += f"\nTable: {table_name}\n"
+            if rel_info["foreign_keys"]:
+                fk_list = [f"{fk['parent_table']} (via {fk['child_column']})" 
+                          for fk in rel_info["foreign_keys"]]
+                relationship_text += f"  References: {', '.join(fk_list)}\n"
+            if rel_info["referenced_by"]:
+                ref_list = [f"{ref['child_table']} (via {ref['child_column']})" 
+                          for ref in rel_info["referenced_by"]]
+                relationship_text += f"  Referenced by: {', '.join(ref_list)}\n"
+        return relationship_text
+
+    def _partition_tables_for_categorization(self, table_schemas: Dict[str, str],
+                                             relationships: Dict[str, Dict]) -> Tuple[List[List[str]], List[Tuple[str, str]]]:
+        """Split tables into FK-connected partitions that each fit the categorization token budget.
+
+        Returns the partitions and the FK edges that had to be cut to split
+        components larger than the budget.
+        """
+        tables = list(table_schemas)
+        budget = self.categorization_token_budget - estimate_tokens(self.categorization_prompt.template)
+
+        def table_cost(name):
+            return (estimate_tokens(f"\nTable: {name}\n{table_schemas[name]}\n")
+                    + estimate_tokens(self._format_relationship_text([name], relationships)))
+
+        for name in tables:
+            if table_cost(name) > budget:
+                print(f"WARNING: Definition of {name} alone exceeds the categorization token budget")
+
+        adjacency = build_fk_adjacency(tables, relationships)
+        pieces = []
+        cut_edges = []
+        for component in connected_components(tables, adjacency):
+            component_pieces, component_cut = split_component(component, adjacency, table_cost, budget)
+            pieces.extend(component_pieces)
+            cut_edges.extend(component_cut)
+
+        return pack_partitions(pieces, table_cost, budget), cut_edges
+
+    @staticmethod
+    def _format_existing_groups(tables: List[str], relationships: Dict[str, Dict],
+                                existing_groups: Optional[Dict[str, str]]) -> str:
+        """Groups carried over from the previous report, and which of them the given tables are FK-linked to"""
+        if not existing_groups:
+            return "None"
+        sizes = {}
+        for group in existing_groups.values():
+            sizes[group] = sizes.get(group, 0) + 1
+        text = "".join(f"{group} ({count} tables)\n" for group, count in sorted(sizes.items()))
+        links = ""
+        for table_name in tables:
+            rel = relationships.get(table_name, {})
+            for fk in rel.get("foreign_keys", []):
+                if fk["parent_table"] in existing_groups:
+                    links += (f"- {table_name} references {fk['parent_table']} "
+                              f"(group {existing_groups[fk['parent_table']]})\n")
+            for ref in rel.get("referenced_by", []):
+                if ref["child_table"] in existing_groups:
+                    links += (f"- {table_name} is referenced by {ref['child_table']} "
+                              f"(group {existing_groups[ref['child_table']]})\n")
+        if links:
+            text += f"Links to already-grouped tables:\n{links}"
+        return text
+
+    def _categorize_partition(self, partition: List[str], table_schemas: Dict[str, str],
+                              relationships: Dict[str, Dict], on_table: Optional[Callable] = None,
+                              existing_groups: Optional[Dict[str, str]] = None) -> Dict:
+        """Run the categorization prompt for one partition of tables"""
+        schema_text = ""
+        for table_name in partition:
+            schema_text += f"\nTable: {table_name}\n{table_schemas[table_name]}\n"
+
+        inputs = {
+            "table_schemas": schema_text,
+            "relationships_data": self._format_relationship_text(partition, relationships),
+            "existing_groups": self._format_existing_groups(partition, relationships, existing_groups)
+        }
+        if on_table is not None and self.streaming:
+            result = self._invoke_json_streaming(self.categorization_prompt, ("analysis",), on_table, **inputs)
+        else:
+            result = self._invoke_json(self.categorization_prompt, **inputs)
+        if not result.get("analysis"):
+            raise Exception("LLM returned no table analysis")
+        return result
+
+    def _reconcile_partition_groups(self, partitions: List[List[str]], partition_results: List[Dict],
+                                    relationships: Dict[str, Dict]) -> Dict:
+        """Merge the groups created per partition into one set of groups with a final LLM call"""
+        print(f"Step 1: Reconciling groups from {len(partitions)} partitions...")
+        partition_of = {name: i for i, partition in enumerate(partitions) for name in partition}
+
+        partition_groups_text = ""
+        for i, result in enumerate(partition_results):
+            members = {}
+            for table_name, info in result.get("analysis", {}).items():
+                members.setdefault(info.get("group"), []).append(table_name)
+            for group_name, definition in result.get("groups", {}).items():
+                partition_groups_text += (
+                    f"\nP{i + 1}:{group_name}\n"
+                    f"  Description: {definition.get('description', '')}\n"
+                    f"  Primary entity: {definition.get('primary_entity', '')}\n"
+                    f"  Tables: {', '.join(members.get(group_name, []))}\n"
+                )
+
+        cross_text = ""
+        for table_name, rel in relationships.items():
+            if table_name not in partition_of:
+                continue
+            for fk in rel.get("foreign_keys", []):
+                parent = fk["parent_table"]
+                if parent in partition_of and partition_of[parent] != partition_of[table_name]:
+                    cross_text += (f"{table_name} (P{partition_of[table_name] + 1}) references "
+                                   f"{parent} (P{partition_of[parent] + 1}) via {fk['child_column']}\n")
+
+        result = self._invoke_json(
+            self.group_reconciliation_prompt,
+            partition_groups=partition_groups_text,
+            cross_partition_relationships=cross_text or "None"
+        )
+        mapping = result.get("group_mapping", {})
+        final_groups = dict(result.get("groups", {}))
+
+        analysis = {}
+        for i, partition_result in enumerate(partition_results):
+            local_groups = partition_result.get("groups", {})
+            for table_name, info in partition_result.get("analysis", {}).items():
+                local_group = info.get("group")
+                # Unmapped groups keep their partition-local name, so equal names still merge
+                final_group = mapping.get(f"P{i + 1}:{local_group}", local_group)
+                if final_group not in final_groups:
+                    final_groups[final_group] = local_groups.get(local_group, {})
+                analysis[table_name] = {**info, "group": final_group}
+
+        return {"groups": final_groups, "analysis": analysis}
+
     # Step 1
-    def categorize_tables_with_llm(self, table_schemas):
-        """Step 1: Pure LLM table categorization based on relationships"""
+    def categorize_tables_with_llm(self, table_schemas, on_table: Optional[Callable[[str, Dict], None]] = None,
+                                   existing_groups: Optional[Dict[str, str]] = None):
+        """Step 1: Pure LLM table categorization based on relationships
+
+        Tables are split into FK-connected partitions that fit
+        ``categorization_token_budget``; partitions are categorized concurrently
+        and, when there is more than one, their groups are merged in a final
+        reconciliation prompt. ``existing_groups`` (table -> group of tables
+        not being categorized, in incremental mode) is shown in the prompt so
+        new tables join their FK neighbours' groups.
+
+        In streaming mode ``on_table(table_name, info)`` fires as each table's
+        entry arrives. The group name it carries is partition-local until the
+        final result is returned.
+        """
         print("Step 1: Analyzing table relationships and creating dynamic groups...")
 
         try:
             # Analyze relationships first
             relationships = self.analyze_foreign_key_relationships()
-            
-            # Format relationship data for LLM
-            relationship_text = ""
-            for table_name, rel_info in relationships.items():
-                relationship_text += f"\nTable: {table_name}\n"
-                if rel_info["foreign_keys"]:
-                    fk_list = [f"{fk['parent_table']} (via {fk['child_column']})" 
-                              for fk in rel_info["foreign_keys"]]
-                    relationship_text += f"  References: {', '.join(fk_list)}\n"
-                if rel_info["referenced_by"]:
-                    ref_list = [f"{ref['child_table']} (via {ref['child_column']})" 
-                              for ref in rel_info["referenced_by"]]
-                    relationship_text += f"  Referenced by: {', '.join(ref_list)}\n"
-
-            # Format schema text with column info for identifying common identifiers
-            schema_text = ""
-            for table_name, schema in list(table_schemas.items()):
-                schema_text += f"\nTable: {table_name}\n{schema[:400]}\n"
 
-            # Run LLM analysis
-            categorization_chain = LLMChain(
-                llm=self.llm, 
-                prompt=self.categorization_prompt
-            )
+            partitions, cut_edges = self._partition_tables_for_categorization(table_schemas, relationships)
+            if len(partitions) > 1:
+                print(f"Step 1: Categorizing {len(table_schemas)} tables in {len(partitions)} partitions "
+                      f"({len(cut_edges)} FK edges cut)...")
 
-            response = categorization_chain.run(
-                table_schemas=schema_text,
-                relationships_data=relationship_text
-            )
+            # Run LLM analysis
+            partition_results = self._run_isolated({
+                f"categorization partition {i + 1}": (
+                    lambda p=partition: self._categorize_partition(p, table_schemas, relationships, on_table,
+                                                                   existing_groups)
+                )
+                for i, partition in enumerate(partitions)
+            })
+            failed = [key for key, value in partition_results.items() if isinstance(value, Exception)]
+            if failed:
+                raise Exception(f"{', '.join(failed)} failed")
+            partition_results = list(partition_results.values())
+
+            if len(partition_results) == 1:
+                result = partition_results[0]
+            else:
+                result = self._reconcile_partition_groups(partitions, partition_results, relationships)
 
-            result = self.parse_json_response(response)
-            
             # Update group definitions with dynamically created groups
             self.group_definitions = result.get("groups", {})
             
@@ -462,14 +1048,86 @@ Return ONLY valid JSON:
         except Exception as e:
             print(f"ERROR: LLM categorization failed: {e}")
             raise Exception("Pure LLM approach failed - no fallback available")
+    def classify_and_select_columns(self, table_name: str, schema: str, content_hint: str = "") -> Dict:
+        """Classify a table into an RCC and pick its retention lookup columns with a single prompt.
+
+        Returns ``{"rcc_classification": ..., "retention_analysis": ...}``. The
+        RCC is validated against the catalog; when it is unknown both parts
+        are empty. When the columns are missing or not in the table,
+        ``retention_analysis`` is None so the caller can ask for them separately.
+        """
+        rccs = self.retention_manager.available_rccs
+        rcc_descriptions = "\n".join([
+            f"{code}: {rule.description} ({rule.retention_type.value}, {rule.years} years) "
+            f"[{', '.join(rule.lookup_column_hints or [])}]"
+            for code, rule in rccs.items()
+        ])
+        try:
+            result = self._invoke_json(
+                self.rcc_fused_prompt,
+                table_schema=schema,
+                table_content=content_hint,
+                available_rccs=rcc_descriptions
+            )
+        except Exception as e:
+            print(f"ERROR: Fused RCC analysis failed for {table_name}: {e}")
+            return {"rcc_classification": {}, "retention_analysis": None}
+
+        assigned_rcc = result.get("assigned_rcc")
+        if assigned_rcc not in rccs:
+            if assigned_rcc:
+                print(f"WARNING: RCC assigned by LLM ({assigned_rcc}) not in available RCCs")
+            return {"rcc_classification": {}, "retention_analysis": None}
+
+        rcc_classification = {
+            "assigned_rcc": assigned_rcc,
+            "reasoning": result.get("reasoning", ""),
+            "decided_by": "llm_fused"
+        }
+
+        columns = result.get("retention_lookup_columns")
+        known_columns = {c.lower() for c in extract_column_names(schema)}
+        columns_valid = (
+            isinstance(columns, list) and columns
+            and all(isinstance(c, str) and c.lower() in known_columns for c in columns)
+        )
+        retention_analysis = None
+        if columns_valid:
+            retention_analysis = {
+                "retention_lookup_columns": columns,
+                "reasoning": result.get("retention_reasoning", ""),
+                "source": "fused"
+            }
+        return {"rcc_classification": rcc_classification, "retention_analysis": retention_analysis}
+
     # Step 2
-    def analyze_archival_columns_with_llm(self, table_name, schema, group):
-        """Step 2: RCC-based archival column analysis"""
+    def analyze_archival_columns_with_llm(self, table_name, schema, group, rcc_result: Optional[Dict] = None):
+        """Step 2: RCC-based archival column analysis
+
+        ``rcc_result`` may carry a classification already obtained from the
+        batched RCC step; otherwise the table is classified here. In fused
+        mode classification and column selection share one prompt, and only
+        the part that came back invalid is asked for again separately.
+        """
         print(f"Step 2: Analyzing archival columns for {table_name}...")
 
         try:
+            retention_analysis = None
+            # RCC and column prompts sent for this table, for the RCC decision summary
+            calls = 0
+            if rcc_result is None and self.rcc_mode == "fused":
+                fused = self.classify_and_select_columns(table_name, schema, self._content_hint(table_name))
+                calls += 1
+                if fused["rcc_classification"]:
+                    rcc_result = fused["rcc_classification"]
+                    retention_analysis = fused["retention_analysis"]
+
             # First classify the table into an RCC
-            rcc_result = self.classify_table_rcc(table_name, schema, "")
+            if rcc_result is None:
+                rcc_result = self.classify_table_rcc(table_name, schema, self._content_hint(table_name))
+                calls += 1
+                if rcc_result:
+                    rcc_result = {**rcc_result, "decided_by": rcc_result.get("decided_by", "llm")}
             assigned_rcc = rcc_result.get("assigned_rcc")
             
             if not assigned_rcc:
@@ -478,11 +1136,24 @@ Return ONLY valid JSON:
                     # "retention_recommendation": "Manual review required",
                     # "confidence": 1,
                     "retention_reasoning": "Could not classify table into RCC",
-                    "rcc_classification": rcc_result
+                    "rcc_classification": rcc_result,
+                    "rcc_llm_calls": calls
+                }
+
+            if retention_analysis is None and rcc_result.get("lookup_columns"):
+                # The rules found columns named exactly like the RCC's hints: no column prompt needed
+                retention_analysis = {
+                    "retention_lookup_columns": rcc_result["lookup_columns"],
+                    "reasoning": "Columns named like the RCC's lookup hints",
+                    "source": "rules"
                 }
 
             # Get retention analysis based on the assigned RCC
-            retention_analysis = self.analyze_retention_columns(table_name, schema, assigned_rcc)
+            if retention_analysis is None:
+                retention_analysis = self.analyze_retention_columns(
+                    table_name, schema, assigned_rcc, format_profile_hint(self.column_profiles.get(table_name))
+                )
+                calls += 1
             
             # Get retention rule for strategy
             # rule = self.retention_manager.available_rccs.get(assigned_rcc)
@@ -495,15 +1166,21 @@ Return ONLY valid JSON:
                 # "confidence": rcc_result.get("confidence", 5),
                 "retention_reasoning": rcc_result.get("reasoning", "RCC classification based analysis"),
                 "rcc_classification": rcc_result,
-                "retention_analysis": retention_analysis
+                "retention_analysis": retention_analysis,
+                "rcc_llm_calls": calls
             }
 
         except Exception as e:
             print(f"ERROR: LLM archival analysis failed for {table_name}: {e}")
             raise Exception("Pure LLM approach failed - no fallback available")
     # Step 3
-    def determine_priorities_with_llm(self, group_name, group_tables, relationships):
-        """Step 3: Pure LLM relationship-based priority assignment"""
+    def determine_priorities_with_llm(self, group_name, group_tables, relationships,
+                                      on_table: Optional[Callable[[str, Dict], None]] = None):
+        """Step 3: Pure LLM relationship-based priority assignment
+
+        In streaming mode ``on_table(table_name, priority_info)`` fires as each
+        entry of ``priority_analysis`` arrives.
+        """
         print(f"Step 3: Determining priorities for {group_name} group...")
 
         try:
@@ -526,18 +1203,17 @@ Return ONLY valid JSON:
                         ref_list = [f"{ref['child_table']}({ref['child_column']})" for ref in rel['referenced_by']]
                         fk_details += f"{table_name} referenced by: {', '.join(ref_list)}\n"
 
-            priority_chain = LLMChain(
-                llm=self.llm,
-                prompt=self.relationship_priority_prompt
-            )
-
-            response = priority_chain.run(
-                group_name=group_name,
-                tables_with_relationships=tables_info,
-                foreign_key_details=fk_details
-            )
-
-            result = self.parse_json_response(response)
+            inputs = {
+                "group_name": group_name,
+                "tables_with_relationships": tables_info,
+                "foreign_key_details": fk_details
+            }
+            if on_table is not None and self.streaming:
+                result = self._invoke_json_streaming(
+                    self.relationship_priority_prompt, ("priority_analysis",), on_table, **inputs
+                )
+            else:
+                result = self._invoke_json(self.relationship_priority_prompt, **inputs)
             return result.get("priority_analysis", {})
 
         except Exception as e:
@@ -545,44 +1221,253 @@ Return ONLY valid JSON:
             raise Exception("Pure LLM approach failed - no fallback available")
 
     
-    def analyze_database_pure_llm(self):
-        """Main analysis using ONLY LLM - NO fallback approaches"""
+    def determine_priorities_with_graph(self, group_name, group_tables, relationships):
+        """Step 3: Deterministic purge ranks from a topological sort of the group's FK graph
+
+        Children are ranked before the parents they reference at any depth, and
+        tables in an FK cycle share one rank. Tables that share a rank are only
+        sent to the LLM for ordering when ``llm_tie_break`` is enabled.
+        """
+        print(f"Step 3: Computing purge ranks for {group_name} group...")
+        group_set = set(group_tables)
+        ranks = compute_purge_ranks(list(group_tables), relationships)
+
+        tie_order = {}
+        rank_sizes = {}
+        for info in ranks.values():
+            rank_sizes[info["purge_rank"]] = rank_sizes.get(info["purge_rank"], 0) + 1
+        if self.llm_tie_break and not self.mock_mode and any(size > 1 for size in rank_sizes.values()):
+            llm_priorities = self.determine_priorities_with_llm(group_name, group_tables, relationships)
+            tie_order = {t: info.get("intra_group_priority", 2) for t, info in llm_priorities.items()}
+
+        results = {}
+        for table_name in group_tables:
+            rel = relationships.get(table_name, {})
+            parents = sorted({fk["parent_table"] for fk in rel.get("foreign_keys", [])
+                              if fk["parent_table"] in group_set and fk["parent_table"] != table_name})
+            children = sorted({ref["child_table"] for ref in rel.get("referenced_by", [])
+                               if ref["child_table"] in group_set and ref["child_table"] != table_name})
+            rank = ranks[table_name]["purge_rank"]
+            cycle = ranks[table_name]["cycle_members"]
+
+            if cycle:
+                priority_type = "CYCLE"
+                reasoning = f"Part of an FK cycle with {', '.join(cycle)}; these tables are purged together"
+            elif parents and children:
+                priority_type = "BRIDGE"
+                reasoning = f"References {', '.join(parents)} and is referenced by {', '.join(children)}"
+            elif children:
+                priority_type = "PARENT"
+                reasoning = f"Referenced by {', '.join(children)}; purged after them"
+            elif parents:
+                priority_type = "CHILD"
+                reasoning = f"References {', '.join(parents)} and is not referenced; purged first"
+            else:
+                priority_type = "INDEPENDENT"
+                reasoning = "No foreign key relationships within the group"
+
+            results[table_name] = {
+                "intra_group_priority": rank,
+                "priority_type": priority_type,
+                "foreign_keys": parents,
+                "referenced_by": children,
+                "cycle_members": cycle,
+                "reasoning": f"Purge rank {rank}: {reasoning}"
+            }
+
+        ordered = sorted(group_tables, key=lambda t: (ranks[t]["purge_rank"], tie_order.get(t, 0), t))
+        for position, table_name in enumerate(ordered, start=1):
+            results[table_name]["purge_order"] = position
+        return results
+
+    def _analyze_table_archival(self, table_name, schema, group, rcc_result: Optional[Dict] = None,
+                                rules_checked: bool = False):
+        """Step 2 for one table, trying the rule-based RCC fast path first unless the caller already has"""
+        if rcc_result is None and not rules_checked and self.rcc_rule_classifier is not None:
+            rcc_result = self.rcc_rule_classifier.classify(table_name, schema)
+        return self.analyze_archival_columns_with_llm(table_name, schema, group, rcc_result)
+
+    def _run_isolated(self, tasks: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+        """Run keyed tasks with at most max_concurrency in flight.
+
+        Results come back in the insertion order of ``tasks`` regardless of
+        completion order. A task that raises yields its exception instead of
+        a result, so one failing table cannot abort the others.
+        """
+        results = {}
+        if self.max_concurrency == 1 or len(tasks) <= 1:
+            for key, task in tasks.items():
+                try:
+                    results[key] = task()
+                except Exception as e:
+                    print(f"ERROR: {key} failed: {e}")
+                    results[key] = e
+            return results
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            futures = {key: pool.submit(task) for key, task in tasks.items()}
+            for key, future in futures.items():
+                try:
+                    results[key] = future.result()
+                except Exception as e:
+                    print(f"ERROR: {key} failed: {e}")
+                    results[key] = e
+        return results
+
+    def analyze_database_pure_llm(self, previous_report: Optional[Dict] = None):
+        """Main analysis using ONLY LLM - NO fallback approaches
+
+        With ``previous_report`` (incremental mode) only tables whose fingerprint
+        or FK neighborhood changed go through the LLM steps; every other table's
+        results are carried over from the previous report.
+        """
         print("Starting PURE LLM ChatGroq analysis...")
         print("WARNING: No fallback approaches - LLM must succeed or analysis fails")
 
+        # Fresh schema snapshot for this run, shared by every step below
+        self._catalog = None
+        self._relationships = None
+
         # Get table definitions
         print("Extracting table definitions...")
         table_schemas = self.get_table_schemas()
         if not table_schemas:
             raise Exception("Could not extract table definitions")
 
-        # Analyze foreign key relationships
+        # Analyze foreign key relationships (shared by all steps)
         print("Analyzing foreign key relationships...")
         relationships = self.analyze_foreign_key_relationships()
-        # Step 1: LLM categorization
-        categorization_results = self.categorize_tables_with_llm(table_schemas)
-        if not categorization_results:
-            raise Exception("LLM categorization failed")
 
-        print(f"SUCCESS: Categorized {len(categorization_results)} tables")
+        # Fingerprint tables so this and later runs can skip unchanged ones
+        self.table_fingerprints = compute_table_fingerprints(
+            self.get_table_ddl(), relationships, self.retention_manager.catalog_version
+        )
+        reused_results = {}
+        previous_groups = {}
+        if previous_report:
+            previous_analysis = previous_report.get("table_analysis", {})
+            failed = [t for t, info in previous_analysis.items() if info.get("error") or info.get("priority_error")]
+            dirty = tables_needing_analysis(
+                self.table_fingerprints, previous_report.get("table_fingerprints", {}), relationships, force=failed
+            )
+            reused_results = {
+                t: dict(previous_analysis[t]) for t in table_schemas
+                if t not in dirty and t in previous_analysis
+            }
+            previous_groups = previous_report.get("group_definitions", {})
+            print(f"Incremental mode: re-analyzing {len(table_schemas) - len(reused_results)} tables, "
+                  f"reusing {len(reused_results)}")
+
+        pending_schemas = {t: s for t, s in table_schemas.items() if t not in reused_results}
+        self.reanalyzed_tables = list(pending_schemas)
+        self.rcc_batch_calls = 0
+
+        # Column profiles for every table (cheap, and cached by fingerprint)
+        self.column_profiles = self.profile_columns(list(table_schemas), previous_report)
+
+        # In streaming mode, archival analysis of a table starts as soon as its
+        # categorization entry has streamed in (RCC work does not need the group).
+        # Batched RCC classification needs the full table list, so it disables early starts.
+        early_pool = None
+        early_futures = {}
+        on_table = None
+        if self.streaming and pending_schemas:
+            early_pool = None if self.batch_rcc else ThreadPoolExecutor(max_workers=self.max_concurrency)
+            early_lock = threading.Lock()
+
+            def on_table(table_name, info):
+                if self.on_stream_entry is not None:
+                    self.on_stream_entry("categorization", table_name, info)
+                if early_pool is None or table_name not in pending_schemas or not isinstance(info, dict):
+                    return
+                with early_lock:
+                    if table_name not in early_futures:
+                        early_futures[table_name] = early_pool.submit(
+                            self._analyze_table_archival, table_name, pending_schemas[table_name],
+                            info.get("group")
+                        )
 
-        # Step 2: LLM archival column analysis for each table
-        final_results = {}
-        for table_name, cat_info in categorization_results.items():
-            if table_name in table_schemas:
-                print(f"Analyzing {table_name}...")
-
-                # Get archival columns with RCC-based analysis
-                archival_info = self.analyze_archival_columns_with_llm(
-                    table_name, 
-                    table_schemas[table_name], 
-                    cat_info["group"]
+        try:
+            # Step 1: LLM categorization
+            categorization_results = {}
+            if pending_schemas:
+                categorization_results = self.categorize_tables_with_llm(
+                    pending_schemas, on_table, {t: info["group"] for t, info in reused_results.items()}
                 )
+                if not categorization_results:
+                    raise Exception("LLM categorization failed")
+                print(f"SUCCESS: Categorized {len(categorization_results)} tables")
+            self.group_definitions = {**previous_groups, **self.group_definitions} if pending_schemas else dict(previous_groups)
+
+            # Step 2: LLM archival column analysis for each table
+            tables_to_analyze = [t for t in categorization_results if t in pending_schemas]
+            rcc_results = {}
+            if self.rcc_rule_classifier is not None:
+                # Early-started tables already went through the rules in _analyze_table_archival
+                rule_tables = [t for t in tables_to_analyze if t not in early_futures]
+                for table_name in rule_tables:
+                    rule_result = self.rcc_rule_classifier.classify(table_name, table_schemas[table_name])
+                    if rule_result:
+                        rcc_results[table_name] = rule_result
+                print(f"Step 2.1: Rule-based RCC fast path decided {len(rcc_results)} of {len(rule_tables)} tables")
+
+            llm_tables = [t for t in tables_to_analyze if t not in rcc_results and t not in early_futures]
+            if self.batch_rcc and not self.mock_mode and llm_tables:
+                rcc_results.update(self.classify_tables_rcc_batch({t: table_schemas[t] for t in llm_tables}))
+
+            archival_tasks = {}
+            for table_name in tables_to_analyze:
+                if table_name in early_futures:
+                    archival_tasks[table_name] = early_futures[table_name].result
+                else:
+                    archival_tasks[table_name] = (
+                        lambda t=table_name: self._analyze_table_archival(
+                            t, table_schemas[t], categorization_results[t]["group"], rcc_results.get(t),
+                            rules_checked=True
+                        )
+                    )
+            archival_results = self._run_isolated(archival_tasks)
+        finally:
+            if early_pool is not None:
+                early_pool.shutdown(wait=True)
+
+        new_results = {}
+        for table_name, archival_info in archival_results.items():
+            if isinstance(archival_info, Exception):
+                # Keep the failure local to this table instead of aborting the report
+                archival_info = {
+                    "retention_reasoning": f"Archival analysis failed: {archival_info}",
+                    "error": str(archival_info)
+                }
 
-                # Combine categorization and archival info (RCC classification is already included in archival_info)
-                combined = {**cat_info, **archival_info}
+            # Combine categorization and archival info (RCC classification is already included in archival_info)
+            new_results[table_name] = {**categorization_results[table_name], **archival_info}
 
-                final_results[table_name] = combined
+        final_results = {}
+        for table_name in table_schemas:
+            if table_name in reused_results:
+                final_results[table_name] = reused_results[table_name]
+            elif table_name in new_results:
+                final_results[table_name] = new_results[table_name]
+            if table_name in final_results and table_name in self.column_profiles:
+                final_results[table_name]["column_profile"] = self.column_profiles[table_name]
+
+        # FK edges the categorization split across groups break independent purging: merge those groups
+        table_groups = {t: info["group"] for t, info in final_results.items()}
+        self.cross_group_edges = find_cross_group_edges(table_groups, relationships)
+        self.group_merges = merge_fk_linked_groups(
+            table_groups, relationships, keep={info["group"] for info in reused_results.values()}
+        )
+        moved_tables = set()
+        if self.group_merges:
+            print(f"WARNING: {len(self.cross_group_edges)} foreign keys crossed group boundaries; merged groups "
+                  + ", ".join(f"{old} -> {new}" for old, new in sorted(self.group_merges.items())))
+            for table_name, info in final_results.items():
+                if info["group"] in self.group_merges:
+                    info["group"] = self.group_merges[info["group"]]
+                    moved_tables.add(table_name)
+            for old_group in self.group_merges:
+                self.group_definitions.pop(old_group, None)
 
         # Step 3: Group tables and determine priorities with LLM
         grouped_tables = {}
@@ -592,14 +1477,44 @@ Return ONLY valid JSON:
                 grouped_tables[group] = []
             grouped_tables[group].append(table_name)
 
-        # LLM priority analysis for each group
-        for group_name, group_table_list in grouped_tables.items():
-            priority_results = self.determine_priorities_with_llm(
-                group_name, group_table_list, relationships
+        if self.priority_mode == "graph":
+            # Graph ranks are cheap, so every group is recomputed from the current FK graph
+            stale_groups = grouped_tables
+            determine_priorities = self.determine_priorities_with_graph
+        else:
+            # Only groups that gained a re-analyzed table need new priorities
+            stale_groups = {
+                group_name: group_table_list for group_name, group_table_list in grouped_tables.items()
+                if any(t in new_results or t in moved_tables for t in group_table_list)
+            }
+            determine_priorities = self.determine_priorities_with_llm
+            if self.streaming and self.on_stream_entry is not None:
+                def determine_priorities(g, tables, rels):
+                    return self.determine_priorities_with_llm(
+                        g, tables, rels, on_table=lambda t, info: self.on_stream_entry("priority", t, info)
+                    )
+
+        # Priority analysis for each group
+        priority_tasks = {
+            group_name: (
+                lambda g=group_name, tables=group_table_list: determine_priorities(
+                    g, tables, relationships
+                )
             )
+            for group_name, group_table_list in stale_groups.items()
+        }
+        group_priorities = self._run_isolated(priority_tasks)
+
+        for group_name, group_table_list in stale_groups.items():
+            priority_results = group_priorities[group_name]
+            if isinstance(priority_results, Exception):
+                for table_name in group_table_list:
+                    final_results[table_name]["priority_error"] = str(priority_results)
+                continue
 
             # Apply priority results
             for table_name in group_table_list:
+                final_results[table_name].pop("priority_error", None)
                 if table_name in priority_results:
                     priority_info = priority_results[table_name]
                     final_results[table_name].update({
@@ -608,15 +1523,70 @@ Return ONLY valid JSON:
                         "priority_reasoning": priority_info.get("reasoning", "LLM analysis"),
                         "relationship_info": relationships.get(table_name, {})
                     })
+                    if "purge_order" in priority_info:
+                        final_results[table_name]["purge_order"] = priority_info["purge_order"]
+                        final_results[table_name]["cycle_members"] = priority_info.get("cycle_members", [])
+
+        # Carried-over tables still get the current relationship snapshot
+        for table_name in reused_results:
+            if "relationship_info" in final_results[table_name]:
+                final_results[table_name]["relationship_info"] = relationships.get(table_name, {})
 
         return final_results
 
+    @staticmethod
+    def summarize_rcc_decisions(analysis_results: Dict[str, Dict], analyzed_tables: Optional[List[str]] = None,
+                                calls_per_table: int = 1, batch_calls: int = 0) -> Dict:
+        """Count which path (rules, batched LLM, per-table LLM) decided each table's RCC.
+
+        ``llm_calls`` are the RCC and column prompts actually sent for the
+        tables analyzed in this run; the saving is measured against
+        ``calls_per_table`` prompts per table (1 fused, 2 two-step).
+        """
+        counts = {}
+        for info in analysis_results.values():
+            path = (info.get("rcc_classification") or {}).get("decided_by", "undecided")
+            counts[path] = counts.get(path, 0) + 1
+        analyzed = [t for t in (analyzed_tables if analyzed_tables is not None else analysis_results)
+                    if t in analysis_results]
+        made = batch_calls + sum(analysis_results[t].get("rcc_llm_calls", 0) for t in analyzed)
+        return {
+            "by_path": counts,
+            "llm_calls": made,
+            "llm_calls_saved": calls_per_table * len(analyzed) - made
+        }
+
+    def load_previous_report(self) -> Optional[Dict]:
+        """Load the report stored at report_path, if it exists and is usable for incremental mode"""
+        if not self.report_path or not os.path.exists(self.report_path):
+            return None
+        try:
+            with open(self.report_path) as f:
+                report = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"WARNING: Could not read previous report {self.report_path}: {e}")
+            return None
+        if "error" in report or not report.get("table_fingerprints"):
+            return None
+        return report
+
+    def save_report(self, report: Dict) -> None:
+        """Write the report to report_path as JSON"""
+        if not self.report_path:
+            return
+        with open(self.report_path, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+
     def create_comprehensive_report(self):
         """Generate comprehensive pure LLM analysis report"""
 
         try:
+            previous_report = self.load_previous_report() if self.incremental else None
+
             # Perform pure LLM analysis
-            analysis_results = self.analyze_database_pure_llm()
+            analysis_results = self.analyze_database_pure_llm(previous_report)
+            purge_estimates = self.estimate_purge_volumes(analysis_results)
+            index_advice = self.advise_indexes(analysis_results, purge_estimates)
 
             # Group results for display
             grouped_results = {}
@@ -627,20 +1597,25 @@ Return ONLY valid JSON:
                 grouped_results[group].append({
                     "table_name": table_name,
                     "intra_group_priority": info.get("intra_group_priority", 2),
+                    "purge_order": info.get("purge_order"),
                     "priority_type": info.get("priority_type", "UNKNOWN"),
                     "rcc_classification": info.get("rcc_classification"),
                     "retention_analysis": info.get("retention_analysis"),
                     "retention_strategy": info.get("archival_strategy", ""),
                     "confidence": info.get("confidence", 0),
                     "priority_reasoning": info.get("priority_reasoning", ""),
-                    "retention_reasoning": info.get("archival_reasoning", "")
+                    "retention_reasoning": info.get("archival_reasoning", ""),
+                    "purge_estimate": purge_estimates.get(table_name),
+                    "index_advice": index_advice.get(table_name)
                 })
 
             # Sort by priority within groups
             for group_name in grouped_results:
-                grouped_results[group_name].sort(key=lambda x: x["intra_group_priority"])
+                grouped_results[group_name].sort(
+                    key=lambda x: (x["intra_group_priority"], x["purge_order"] or 0)
+                )
 
-            return {
+            report = {
                 "analysis_timestamp": datetime.now().isoformat(),
                 "total_tables": len(analysis_results),
                 "total_groups": len(grouped_results),
@@ -648,8 +1623,28 @@ Return ONLY valid JSON:
                 "analysis_type": "Pure LLM: Categorization + Archival Analysis + Relationship-Based Priorities",
                 "table_analysis": analysis_results,
                 "grouped_by_priority": grouped_results,
-                "group_definitions": self.group_definitions
+                "group_definitions": self.group_definitions,
+                "priority_mode": self.priority_mode,
+                "cross_group_fk_edges": self.cross_group_edges,
+                "group_merges": self.group_merges,
+                "rcc_decision_summary": self.summarize_rcc_decisions(
+                    analysis_results, self.reanalyzed_tables,
+                    1 if self.rcc_mode == "fused" else 2, self.rcc_batch_calls
+                ),
+                "purge_estimates_by_rcc": summarize_by_rcc(purge_estimates),
+                "index_recommendations": recommended_indexes(index_advice),
+                "llm_cache_stats": self.llm_cache.stats() if self.llm_cache else None,
+                "llm_scheduler_stats": self.llm_scheduler.stats() if self.llm_scheduler else None,
+                "rcc_catalog_version": self.retention_manager.catalog_version,
+                "table_fingerprints": self.table_fingerprints,
+                "incremental_summary": {
+                    "incremental": previous_report is not None,
+                    "reanalyzed_tables": self.reanalyzed_tables,
+                    "reused_tables": len(analysis_results) - len(self.reanalyzed_tables)
+                }
             }
+            self.save_report(report)
+            return report
 
         except Exception as e:
             return {
@@ -660,17 +1655,39 @@ Return ONLY valid JSON:
             }
 
 # Example usage with ChatGroq
-def demonstrate_groq_langchain(mock_mode: bool = False):
+def demonstrate_groq_langchain(mock_mode: bool = False, max_concurrency: int = 1,
+                               cache_path: Optional[str] = "llm_cache.sqlite", batch_rcc: bool = False,
+                               incremental: bool = False, report_path: Optional[str] = "analysis_report.json",
+                               priority_mode: str = "graph", llm_tie_break: bool = False,
+                               rule_based_rcc: bool = False, streaming: bool = False,
+                               requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                               rcc_mode: str = "fused", schema_source: str = "ddl", sample_rows: int = 0,
+                               column_profiling: bool = True, purge_full_scan: bool = False,
+                               db_path: str = "table_group_archival_demo.sqlite"):
     """Demonstrate ChatGroq LangChain implementation
 
     Args:
         mock_mode (bool): If True, runs analysis with mock data without LLM calls
+        max_concurrency (int): Maximum number of LLM requests in flight at once
+        cache_path (str): SQLite file for the LLM response cache, or None to disable it
+        batch_rcc (bool): If True, classify several tables per RCC prompt
+        incremental (bool): If True, only re-analyze tables changed since the report at report_path
+        report_path (str): Where the JSON report is written (and read from in incremental mode)
+        priority_mode (str): "graph" for FK topological ranks, "llm" for one priority prompt per group
+        llm_tie_break (bool): In graph mode, ask the LLM to order tables that share a rank
+        rule_based_rcc (bool): Assign obvious RCCs from name/column rules and only send the rest to the LLM
+        streaming (bool): Stream LLM replies and start per-table work as soon as each entry arrives
+        requests_per_minute (float): Provider request limit enforced before sending (None = unlimited)
+        tokens_per_minute (float): Provider token limit enforced before sending (None = unlimited)
+        rcc_mode (str): "fused" (one prompt for RCC + lookup columns) or "two_step" (separate prompts)
+        schema_source (str): "ddl" (sqlite_master, one query) or "langchain" (SQLDatabase reflection)
+        sample_rows (int): Sample rows shown to the LLM per analyzed table in DDL mode
+        column_profiling (bool): Profile column statistics and show them to the RCC and retention prompts
+        purge_full_scan (bool): Count purge-eligible rows exactly even on large tables without an index
+        db_path (str): SQLite database to analyze (defaults to the sample database)
     """
-    # Use existing sample database
-    db_path = "table_group_archival_demo.sqlite"
-
     if not os.path.exists(db_path):
-        print("ERROR: Sample database not found")
+        print(f"ERROR: Database not found: {db_path}")
         return
 
     if not mock_mode:
@@ -683,7 +1700,15 @@ def demonstrate_groq_langchain(mock_mode: bool = False):
             return
     
     # Initialize analyzer with appropriate mode
-    analyzer = GroqLangChainTableAnalyzer(db_path, mock_mode=mock_mode)
+    analyzer = GroqLangChainTableAnalyzer(db_path, mock_mode=mock_mode, max_concurrency=max_concurrency,
+                                          cache_path=cache_path, batch_rcc=batch_rcc,
+                                          incremental=incremental, report_path=report_path,
+                                          priority_mode=priority_mode, llm_tie_break=llm_tie_break,
+                                          rule_based_rcc=rule_based_rcc, streaming=streaming,
+                                          requests_per_minute=requests_per_minute,
+                                          tokens_per_minute=tokens_per_minute, rcc_mode=rcc_mode,
+                                          schema_source=schema_source, sample_rows=sample_rows,
+                                          column_profiling=column_profiling, purge_full_scan=purge_full_scan)
 
     # Generate report using ChatGroq
     report = analyzer.create_comprehensive_report()
@@ -698,6 +1723,17 @@ def demonstrate_groq_langchain(mock_mode: bool = False):
     print(f"LLM Used: {report.get('llm_used', 'ChatGroq')}")
     print(f"Total Tables: {report.get('total_tables', 0)}")
     print(f"Total Groups: {report.get('total_groups', 0)}")
+    if rule_based_rcc:
+        decisions = report.get("rcc_decision_summary", {})
+        print(f"RCC Decisions: {decisions.get('by_path', {})} ({decisions.get('llm_calls', 0)} RCC/column LLM calls, "
+              f"{decisions.get('llm_calls_saved', 0)} saved)")
+    if incremental:
+        summary = report.get("incremental_summary", {})
+        print(f"Re-analyzed Tables: {len(summary.get('reanalyzed_tables', []))} "
+              f"(reused {summary.get('reused_tables', 0)})")
+    if report.get("llm_cache_stats"):
+        stats = report["llm_cache_stats"]
+        print(f"LLM Cache: {stats['hits']} hits / {stats['misses']} misses ({stats['entries']} entries)")
 
     # Display results
     print("\nTABLE ANALYSIS:")
@@ -708,7 +1744,9 @@ def demonstrate_groq_langchain(mock_mode: bool = False):
         print(f"\nTABLE: {table_name}")
         print(f"   Group: {info['group']}")
         print(f"   Retention Lookup Columns: {cols_str}")
-        print(f"   Priority: {info['intra_group_priority']}")
+        print(f"   Priority: {info.get('intra_group_priority', 'n/a')}")
+        if info.get("priority_error"):
+            print(f"   Priority Error: {info['priority_error']}")
         print(f"   Confidence: {info.get('confidence', 0)}/10")
 
     # Display intra-group priorities
@@ -716,8 +1754,18 @@ def demonstrate_groq_langchain(mock_mode: bool = False):
     for group_name, tables in report.get("grouped_by_priority", {}).items():
         print(f"\nGROUP: {group_name}")
         for table_info in tables:
-            priority_desc = {1: "HIGH", 2: "MEDIUM", 3: "LOW"}[table_info["intra_group_priority"]]
+            priority_desc = {1: "HIGH", 2: "MEDIUM"}.get(table_info["intra_group_priority"], "LOW")
             print(f"   Priority {table_info['intra_group_priority']} ({priority_desc}): {table_info['table_name']}")
+            estimate = table_info.get("purge_estimate") or {}
+            if estimate.get("status") == "estimated":
+                print(f"      Eligible: {estimate['eligible_rows']} of {estimate['total_rows']} rows "
+                      f"(~{estimate['estimated_freed_bytes']} bytes, {estimate['method']})")
+            advice = table_info.get("index_advice") or {}
+            if advice.get("status") == "full_scan":
+                used = "" if advice.get("verified") else " (the planner would not use it for chunk lookups)"
+                print(f"      Full scan for retention predicate; suggested: {advice['suggested_index']['sql']}{used}")
+            for suggestion in advice.get("guard_indexes") or []:
+                print(f"      Reference guard scans {suggestion['table']}; suggested: {suggestion['sql']}")
 
     return report
 
@@ -726,7 +1774,211 @@ if __name__ == "__main__":
     
     parser = argparse.ArgumentParser(description="Run database analysis with GroqLangChain")
     parser.add_argument("--mock", action="store_true", help="Run in mock mode without LLM calls")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="Maximum number of concurrent LLM requests (default: 1, sequential)")
+    parser.add_argument("--cache", default="llm_cache.sqlite",
+                        help="SQLite file used to cache LLM responses (default: llm_cache.sqlite)")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the LLM response cache")
+    parser.add_argument("--batch-rcc", action="store_true",
+                        help="Classify several tables per RCC prompt to reduce request count")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only re-analyze tables whose schema changed since the previous report")
+    parser.add_argument("--report", default="analysis_report.json",
+                        help="Path of the JSON report to write (and to read in --incremental mode)")
+    parser.add_argument("--priority-mode", choices=["graph", "llm"], default="graph",
+                        help="Derive purge priorities from the FK graph (default) or with one LLM call per group")
+    parser.add_argument("--llm-tie-break", action="store_true",
+                        help="In graph mode, let the LLM order tables that share a purge rank")
+    parser.add_argument("--rule-rcc", action="store_true",
+                        help="Assign obvious RCCs with name/column rules and send only ambiguous tables to the LLM")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream LLM replies and start per-table analysis as soon as each entry arrives")
+    parser.add_argument("--rpm", type=float, default=None, help="Provider requests-per-minute limit")
+    parser.add_argument("--tpm", type=float, default=None, help="Provider tokens-per-minute limit")
+    parser.add_argument("--rcc-mode", choices=["fused", "two_step"], default="fused",
+                        help="Classify RCC and pick lookup columns in one prompt (default) or two prompts")
+    parser.add_argument("--schema-source", choices=["ddl", "langchain"], default="ddl",
+                        help="Read table definitions from sqlite_master (default) or via LangChain reflection")
+    parser.add_argument("--sample-rows", type=int, default=0,
+                        help="Sample rows per table sent to the LLM in DDL mode (fetched only for analyzed tables)")
+    parser.add_argument("--no-profile", action="store_true",
+                        help="Skip column profiling (statistics shown to the RCC and retention prompts)")
+    parser.add_argument("--purge-full-scan", action="store_true",
+                        help="Count purge-eligible rows exactly, even where that needs a full table scan")
+    parser.add_argument("--db", default="table_group_archival_demo.sqlite", help="SQLite database to analyze")
+    parser.add_argument("--fleet", nargs="+", metavar="GLOB_OR_MANIFEST",
+                        help="Analyze many databases: glob patterns or manifest files (.json/.txt)")
+    parser.add_argument("--fleet-workers", type=int, default=None,
+                        help="Processes used to introspect fleet databases (default: CPU count)")
+    parser.add_argument("--fleet-report", default="fleet_report.json",
+                        help="Path of the aggregated fleet report (default: fleet_report.json)")
+    parser.add_argument("--archive-to", metavar="ARCHIVE_DB",
+                        help="After the analysis, move purge-eligible rows into this SQLite archive database")
+    parser.add_argument("--chunk-size", type=int, default=5000,
+                        help="Keys covered by one archival chunk (default: 5000)")
+    parser.add_argument("--chunks-per-txn", type=int, default=4,
+                        help="Archival chunks committed per write transaction (default: 4)")
+    parser.add_argument("--rows-per-second", type=float, default=None,
+                        help="Throttle archival to about this many rows per second")
+    parser.add_argument("--cascade", action="store_true",
+                        help="Archive the rows that reference archived rows through foreign keys as well")
+    parser.add_argument("--adaptive-batches", action="store_true",
+                        help="Size archival transactions to --max-lock-ms and --wal-budget-mb (starts at --chunk-size)")
+    parser.add_argument("--max-lock-ms", type=float, default=250,
+                        help="Target write-lock hold time per archival transaction (default: 250)")
+    parser.add_argument("--wal-budget-mb", type=float, default=64,
+                        help="WAL size the adaptive archival run should stay under (default: 64)")
+    parser.add_argument("--writers", type=int, default=4,
+                        help="With --fleet and --archive-to DIR: databases archived concurrently (default: 4)")
+    parser.add_argument("--create-indexes", action="store_true",
+                        help="Create the indexes recommended for retention predicates before archiving (with --fleet, in every database)")
+    parser.add_argument("--journal", default=None,
+                        help="SQLite progress journal for archival jobs (makes --archive-to resumable)")
+    parser.add_argument("--job-id", default=None, help="Name of the archival job recorded in the journal")
+    parser.add_argument("--resume", metavar="JOB_ID",
+                        help="Resume a journaled archival job without re-running the analysis")
+    parser.add_argument("--progress", metavar="JOB_ID", help="Print progress and ETA of a journaled job")
+    parser.add_argument("--legal-holds", metavar="REGISTRY_DB", default=None,
+                        help="Legal-hold registry (see legal_hold.py); held rows are never archived")
     args = parser.parse_args()
-    
+
+    if (args.resume or args.progress) and not args.journal:
+        parser.error("--resume and --progress need --journal")
+
+    def make_batch_controller():
+        if not args.adaptive_batches:
+            return None
+        from batch_controller import AdaptiveBatchController
+        return AdaptiveBatchController(
+            target_lock_seconds=args.max_lock_ms / 1000,
+            wal_budget_bytes=int(args.wal_budget_mb * 1024 * 1024),
+            initial_rows=args.chunk_size * args.chunks_per_txn
+        )
+
+    if args.progress:
+        from purge_journal import PurgeJournal
+        journal = PurgeJournal(args.journal).open()
+        progress = journal.progress(args.progress)
+        journal.close()
+        print(json.dumps(progress, indent=2, default=str))
+        raise SystemExit(0 if "error" not in progress else 1)
+
+    if args.resume:
+        from archival_executor import ArchivalExecutor
+        executor = ArchivalExecutor.resume(
+            args.journal,
+            args.resume,
+            chunk_size=args.chunk_size,
+            chunks_per_transaction=args.chunks_per_txn,
+            rows_per_second=args.rows_per_second,
+            cascade=args.cascade,
+            controller=make_batch_controller(),
+            legal_hold_path=args.legal_holds
+        )
+        if executor is None:
+            raise SystemExit(1)
+        summary = executor.run()
+        print(f"Archived {summary.get('total_rows_archived', 0)} rows for job {args.resume}")
+        raise SystemExit(0 if "error" not in summary else 1)
+
+    if args.fleet:
+        from fleet_scan import run_fleet_scan
+
+        if not args.mock and not os.getenv("GROQ_API_KEY"):
+            print("ERROR: GROQ_API_KEY environment variable not set")
+            raise SystemExit(1)
+        fleet_report = run_fleet_scan(
+            args.fleet,
+            report_path=args.fleet_report,
+            max_workers=args.fleet_workers,
+            purge_full_scan=args.purge_full_scan,
+            mock_mode=args.mock,
+            max_concurrency=args.concurrency,
+            cache_path=None if args.no_cache else args.cache,
+            batch_rcc=args.batch_rcc,
+            priority_mode=args.priority_mode,
+            llm_tie_break=args.llm_tie_break,
+            rule_based_rcc=args.rule_rcc,
+            requests_per_minute=args.rpm,
+            tokens_per_minute=args.tpm,
+            rcc_mode=args.rcc_mode,
+            column_profiling=not args.no_profile
+        )
+        if "error" in fleet_report:
+            print(f"ERROR: {fleet_report['error']}")
+        else:
+            print(f"Fleet scan: {fleet_report['total_databases']} databases, "
+                  f"{fleet_report['distinct_schemas']} distinct schemas -> {args.fleet_report}")
+            if args.create_indexes:
+                from index_advisor import create_recommended_indexes
+                # Shards share their schema's recommendations; IF NOT EXISTS skips ones already built
+                for schema in fleet_report["schemas"].values():
+                    recommendations = schema["report"].get("index_recommendations")
+                    if not recommendations:
+                        continue
+                    for db_path in schema["databases"]:
+                        create_recommended_indexes(db_path, recommendations)
+            if args.archive_to:
+                from purge_scheduler import PurgeScheduler, fleet_jobs
+                # In fleet mode --archive-to and --journal name directories holding one file per database
+                os.makedirs(args.archive_to, exist_ok=True)
+                if args.journal:
+                    os.makedirs(args.journal, exist_ok=True)
+                scheduler = PurgeScheduler(
+                    max_writers=args.writers,
+                    executor_kwargs={
+                        "chunk_size": args.chunk_size,
+                        "chunks_per_transaction": args.chunks_per_txn,
+                        "rows_per_second": args.rows_per_second,
+                        "cascade": args.cascade,
+                        "legal_hold_path": args.legal_holds
+                    },
+                    controller_factory=make_batch_controller
+                )
+                summary = scheduler.run(fleet_jobs(fleet_report, args.archive_to, args.journal, args.job_id))
+                print(f"Archived {summary['total_rows_archived']} rows from {len(summary['jobs'])} group jobs "
+                      f"in {summary['seconds']}s (peak {summary['peak_concurrency']} writers)")
+        raise SystemExit(0)
+
     # Run with appropriate mode
-    report = demonstrate_groq_langchain(mock_mode=args.mock)
+    report = demonstrate_groq_langchain(
+        mock_mode=args.mock,
+        max_concurrency=args.concurrency,
+        cache_path=None if args.no_cache else args.cache,
+        batch_rcc=args.batch_rcc,
+        incremental=args.incremental,
+        report_path=args.report,
+        priority_mode=args.priority_mode,
+        llm_tie_break=args.llm_tie_break,
+        rule_based_rcc=args.rule_rcc,
+        streaming=args.stream,
+        requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm,
+        rcc_mode=args.rcc_mode,
+        schema_source=args.schema_source,
+        sample_rows=args.sample_rows,
+        column_profiling=not args.no_profile,
+        purge_full_scan=args.purge_full_scan,
+        db_path=args.db
+    )
+
+    if args.create_indexes and report and report.get("index_recommendations"):
+        from index_advisor import create_recommended_indexes
+        create_recommended_indexes(args.db, report["index_recommendations"])
+
+    if args.archive_to and report and "error" not in report:
+        from archival_executor import ArchivalExecutor
+        executor = ArchivalExecutor(
+            args.db,
+            args.archive_to,
+            chunk_size=args.chunk_size,
+            chunks_per_transaction=args.chunks_per_txn,
+            rows_per_second=args.rows_per_second,
+            cascade=args.cascade,
+            journal_path=args.journal,
+            job_id=args.job_id,
+            controller=make_batch_controller(),
+            legal_hold_path=args.legal_holds
+        )
+        summary = executor.run(report)
+        print(f"Archived {summary['total_rows_archived']} rows into {args.archive_to} in {summary['seconds']}s")
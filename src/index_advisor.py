@@ -0,0 +1,222 @@
+import re
+import sqlite3
+from datetime import date
+from typing import Dict, List, Optional
+
+from archival_executor import chunk_filter_sql, chunk_keys_sql, next_chunk_sql
+from cascade_planner import key_column, reference_guard
+from column_profiler import bounded_row_count, quote_identifier
+from retention_manager import RetentionManager
+from retention_sql import predicate_for_table
+from schema_catalog import SchemaCatalog, TableInfo
+
+_USING_INDEX = re.compile(r"USING (?:COVERING )?INDEX (\S+)")
+
+
+def explain_access(conn: sqlite3.Connection, sql: str, params: List) -> Dict:
+    """How SQLite would read the tables for ``sql``: the plan lines, the index used and the tables scanned.
+
+    A SEARCH by rowid or primary key range is no better than a scan for
+    the next-chunk lookup (it walks every later row), so ``full_scan``
+    means no secondary index serves the statement.
+    """
+    details = [str(row[-1]) for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()]
+    searched = [d for d in details if d.startswith("SEARCH")]
+    index = next((m.group(1) for m in (_USING_INDEX.search(d) for d in searched) if m), None)
+    return {"plan": details, "full_scan": index is None, "index": index,
+            "scans": [d for d in details if d.startswith("SCAN")]}
+
+
+class IndexAdvisor:
+    """Check whether the archival executor's chunk statements are served by an index and suggest one if not.
+
+    EXPLAIN QUERY PLAN is run on the statements the executor actually
+    issues for the table's retention predicate: the lookup of the next
+    eligible key above a chunk boundary, which walks the table unless an
+    index serves the predicate, and the chunk's key-range SELECT, whose
+    reference guards probe the referencing tables. Tables below
+    ``min_rows`` rows are skipped, since scanning them is cheap. When the
+    lookup needs a full scan the advisor suggests an index on the date
+    column: a partial index limited to inactive rows when the rule also
+    tests an integer activity flag, otherwise an index that covers every
+    column the predicate reads. The suggestion is checked against an empty
+    temp copy of the table, so nothing is built on the live data, and the
+    cost avoided comes from the purge estimate.
+    """
+
+    def __init__(self, retention_manager: Optional[RetentionManager] = None, min_rows: int = 10_000):
+        self.retention_manager = retention_manager or RetentionManager()
+        self.min_rows = min_rows
+
+    def suggest_index(self, table: TableInfo, predicate: Dict) -> Dict:
+        """CREATE INDEX for a retention predicate (partial for integer flags, else covering)"""
+        date_column = predicate["date_column"]
+        flag_column = predicate.get("flag_column")
+        columns = [date_column]
+        where = None
+        if flag_column and not predicate.get("flag_params"):
+            kind = "partial"
+            # The predicate's own flag test, so the planner can match the index to it
+            where = predicate["flag_clause"]
+        else:
+            kind = "covering"
+            if flag_column:
+                columns.append(flag_column)
+        name = re.sub(r"\W+", "_", f"ix_retention_{table.name}_{'_'.join(columns)}")
+        sql = (f"CREATE INDEX IF NOT EXISTS {quote_identifier(name)} ON {quote_identifier(table.name)} "
+               f"({', '.join(quote_identifier(c) for c in columns)})" + (f" WHERE {where}" if where else ""))
+        return {"name": name, "kind": kind, "table": table.name, "columns": columns, "where": where, "sql": sql}
+
+    def _verify(self, conn: sqlite3.Connection, table: TableInfo, suggestion: Dict, predicate: Dict) -> bool:
+        """Whether the planner picks the suggested index, tried on an empty temp copy of the table"""
+        clone = quote_identifier(f"_advisor_{table.name}")
+        try:
+            conn.execute(f"DROP TABLE IF EXISTS temp.{clone}")
+            conn.execute(f"CREATE TEMP TABLE {clone} AS SELECT * FROM main.{quote_identifier(table.name)} WHERE 0")
+            index_sql = suggestion["sql"].replace(
+                f"{quote_identifier(suggestion['name'])} ON {quote_identifier(table.name)}",
+                f"temp.{quote_identifier(suggestion['name'])} ON {clone}", 1
+            )
+            conn.execute(index_sql)
+            access = explain_access(conn, f"SELECT min(rowid) FROM temp.{clone} WHERE rowid > ? AND {predicate['sql']}",
+                                    [0] + predicate["params"])
+            return access["index"] == suggestion["name"]
+        except sqlite3.Error:
+            return False
+        finally:
+            conn.execute(f"DROP TABLE IF EXISTS temp.{clone}")
+
+    @staticmethod
+    def _guard_indexes(conn: sqlite3.Connection, catalog: SchemaCatalog, table_name: str) -> List[Dict]:
+        """Indexes for the referencing foreign keys whose reference-guard probe scans the child table"""
+        suggestions = []
+        for child in catalog.tables:
+            groups: Dict[int, List[str]] = {}
+            for fk in child.foreign_keys:
+                if fk.parent_table == table_name:
+                    groups.setdefault(fk.fk_id, []).append(fk.child_column)
+            for columns in groups.values():
+                probe = " AND ".join(f"c.{quote_identifier(column)} = ?" for column in columns)
+                access = explain_access(conn, f"SELECT 1 FROM main.{quote_identifier(child.name)} AS c WHERE {probe}",
+                                        [0] * len(columns))
+                if not access["scans"]:
+                    continue
+                name = re.sub(r"\W+", "_", f"ix_fk_{child.name}_{'_'.join(columns)}")
+                suggestions.append({
+                    "name": name, "kind": "foreign_key", "table": child.name, "columns": columns, "where": None,
+                    "sql": f"CREATE INDEX IF NOT EXISTS {quote_identifier(name)} ON {quote_identifier(child.name)} "
+                           f"({', '.join(quote_identifier(c) for c in columns)})"
+                })
+        return suggestions
+
+    def advise_table(self, conn: sqlite3.Connection, table: TableInfo, rcc_code: Optional[str], lookup_columns,
+                     profile: Optional[Dict] = None, purge_estimate: Optional[Dict] = None,
+                     as_of: Optional[date] = None, catalog: Optional[SchemaCatalog] = None) -> Dict:
+        predicate, reason = predicate_for_table(
+            self.retention_manager, table.column_names, rcc_code, lookup_columns, profile, as_of
+        )
+        if predicate is None:
+            return {"status": "skipped", "reason": reason}
+        key = key_column(table)
+        if key is None:
+            return {"status": "skipped", "reason": "no single-column key to chunk by"}
+        rows = bounded_row_count(conn, table, self.min_rows)
+        if rows is not None and rows < self.min_rows:
+            return {"status": "skipped", "reason": f"fewer than {self.min_rows} rows"}
+
+        # The executor's own statements for this table, with placeholder bounds
+        step = {"table": table.name, "key": key, "predicate": predicate["sql"], "params": predicate["params"],
+                "reference_guard": reference_guard(catalog, table.name) if catalog is not None else None}
+        access = explain_access(conn, *next_chunk_sql(step, 0))
+        where, params = chunk_filter_sql(step, 0, 0)
+        # The chunk reads a bounded key range, so only scans inside it (reference guards) are costly
+        guard_indexes = (self._guard_indexes(conn, catalog, table.name)
+                         if explain_access(conn, chunk_keys_sql(step, where), params)["scans"] else [])
+        if not access["full_scan"]:
+            result = {"status": "indexed", "predicate": predicate["sql"], "index": access["index"],
+                      "plan": access["plan"]}
+            if guard_indexes:
+                result["guard_indexes"] = guard_indexes
+            return result
+
+        suggestion = self.suggest_index(table, predicate)
+        total = table.row_estimate
+        estimate = purge_estimate if (purge_estimate or {}).get("status") == "estimated" else {}
+        eligible = estimate.get("eligible_rows")
+        avoided = total - eligible if total is not None and eligible is not None else None
+        return {
+            "status": "full_scan",
+            "predicate": predicate["sql"],
+            "plan": access["plan"],
+            "suggested_index": suggestion,
+            "guard_indexes": guard_indexes,
+            "verified": self._verify(conn, table, suggestion, predicate),
+            "cost": {
+                "rows_examined_full_scan": total,
+                "rows_examined_with_index": eligible,
+                "rows_avoided": avoided,
+                "bytes_read_avoided": (int(avoided * estimate["bytes_per_row"])
+                                       if avoided is not None and estimate.get("bytes_per_row") else None)
+            }
+        }
+
+    def advise(self, db_path: str, catalog: SchemaCatalog, table_analysis: Dict[str, Dict],
+               profiles: Optional[Dict[str, Dict]] = None, purge_estimates: Optional[Dict[str, Dict]] = None,
+               as_of: Optional[date] = None) -> Dict[str, Dict]:
+        """Index advice for every analyzed table; failures are reported per table"""
+        profiles = profiles or {}
+        purge_estimates = purge_estimates or {}
+        advice = {}
+        conn = sqlite3.connect(db_path)
+        try:
+            for table_name, info in table_analysis.items():
+                table = catalog.table(table_name)
+                if table is None:
+                    continue
+                rcc = (info.get("rcc_classification") or {}).get("assigned_rcc")
+                columns = (info.get("retention_analysis") or {}).get("retention_lookup_columns")
+                try:
+                    advice[table_name] = self.advise_table(
+                        conn, table, rcc, columns, profiles.get(table_name), purge_estimates.get(table_name), as_of,
+                        catalog
+                    )
+                except sqlite3.Error as e:
+                    print(f"WARNING: Could not check indexes for {table_name}: {e}")
+                    advice[table_name] = {"status": "failed", "reason": str(e)}
+        finally:
+            conn.close()
+        return advice
+
+
+def recommended_indexes(advice: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Indexes worth building before a purge run, by name.
+
+    A retention index is recommended only when the planner was verified to
+    use it for the executor's next-chunk lookup; reference-guard indexes
+    always are, since without them every guarded row scans the child table.
+    """
+    recommended = {}
+    for entry in advice.values():
+        if entry.get("suggested_index") and entry.get("verified"):
+            recommended[entry["suggested_index"]["name"]] = entry["suggested_index"]
+        for suggestion in entry.get("guard_indexes") or []:
+            recommended[suggestion["name"]] = suggestion
+    return recommended
+
+
+def create_recommended_indexes(db_path: str, recommendations: Dict[str, Dict]) -> List[str]:
+    """Build the recommended indexes (opt-in, before a purge run); returns the names created"""
+    created = []
+    conn = sqlite3.connect(db_path)
+    try:
+        for name, suggestion in recommendations.items():
+            try:
+                conn.execute(suggestion["sql"])
+                conn.commit()
+                created.append(name)
+                print(f"Created index {name} on {suggestion['table']}")
+            except sqlite3.Error as e:
+                print(f"ERROR: Could not create index {name} on {suggestion['table']}: {e}")
+    finally:
+        conn.close()
+    return created
@@ -0,0 +1,304 @@
+import argparse
+import math
+import os
+import re
+import sqlite3
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+from urllib.parse import quote
+
+from cascade_planner import key_column
+from column_profiler import quote_identifier
+from schema_catalog import SchemaCatalog, TableInfo, load_schema_catalog
+
+# Name the registry is attached under on a purge connection
+HOLDS_SCHEMA = "holds"
+# Keys per statement when placing, releasing or looking up holds
+_BATCH = 500
+# A well-formed integer or real literal, which SQLite stores as a number in a numeric column
+_NUMBER = re.compile(r"\s*[+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?\s*")
+
+
+def hold_column(table: TableInfo) -> Optional[str]:
+    """Column whose values identify held rows: the single-column primary key, else rowid"""
+    if len(table.primary_keys) == 1:
+        return quote_identifier(table.primary_keys[0])
+    return key_column(table)
+
+
+def column_affinity(declared_type: str) -> str:
+    """SQLite's type affinity for a declared column type: INTEGER, TEXT, BLOB, REAL or NUMERIC"""
+    declared = (declared_type or "").upper()
+    if "INT" in declared:
+        return "INTEGER"
+    if any(word in declared for word in ("CHAR", "CLOB", "TEXT")):
+        return "TEXT"
+    if "BLOB" in declared or not declared:
+        return "BLOB"
+    if any(word in declared for word in ("REAL", "FLOA", "DOUB")):
+        return "REAL"
+    return "NUMERIC"
+
+
+def hold_key_affinity(table: TableInfo) -> str:
+    """Affinity of the column named by ``hold_column`` (rowid is an integer)"""
+    if len(table.primary_keys) == 1:
+        return column_affinity(next((c.type for c in table.columns if c.name == table.primary_keys[0]), ""))
+    return "INTEGER"
+
+
+def coerce_hold_key(key, affinity: str):
+    """A key converted the way SQLite converts a value stored in a column of ``affinity``.
+
+    Held rows are found by comparing stored keys with the column's values
+    as they are, so 42 never matches a TEXT key '42' and "00042" held as
+    text never matches the INTEGER key 42; keys must be stored as the
+    column would store them.
+    """
+    if affinity == "TEXT" and isinstance(key, (int, float)) and not isinstance(key, bool):
+        return str(key)
+    if affinity in ("INTEGER", "REAL", "NUMERIC") and isinstance(key, str) and _NUMBER.fullmatch(key):
+        number = float(key)
+        if affinity != "REAL" and "." not in key and "e" not in key.lower():
+            number = int(key)
+        return _canonical(number)
+    return _canonical(key)
+
+
+def _canonical(key):
+    # SQLite compares 42.0 equal to 42, so store them alike
+    if isinstance(key, float) and key.is_integer():
+        return int(key)
+    return key
+
+
+class BloomFilter:
+    """Fixed-size in-memory Bloom filter over hashable keys (no false negatives, ``error_rate`` false positives).
+
+    Positions come from Python's own hash, which is fast but seeded per
+    process for strings, so a filter is never persisted or shared.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(1, capacity)
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key) -> range:
+        # Double hashing; tuple hashes mix well even for consecutive integer keys
+        h1 = hash((key,)) % self.size
+        h2 = hash((key, 1)) % self.size or 1
+        return range(h1, h1 + self.hashes * h2, h2)
+
+    def add(self, key) -> None:
+        bits, size = self.bits, self.size
+        for position in self._positions(key):
+            position %= size
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key) -> bool:
+        bits, size = self.bits, self.size
+        for position in self._positions(key):
+            position %= size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class LegalHoldRegistry:
+    """Rows under legal hold, kept in a small SQLite side database and consulted by every purge.
+
+    Holds are stored per table as key values (see ``hold_column``) in a
+    WITHOUT ROWID table whose primary key is (table_name, hold_key), so a
+    lookup is one index probe however many millions of keys are held. The
+    archival executor ATTACHes the registry read-only as ``holds`` (it then
+    takes no write lock, and concurrent purge jobs can share it) and joins
+    it into the purge statements as an anti-join; a chunk first checks
+    whether any held key falls inside its key range, so chunks without held
+    rows run the plain statements. In-process callers screen keys with
+    ``is_held`` and ``screen``, which consult a per-table Bloom filter
+    before the index and only look up the keys it cannot rule out.
+
+    Keys given to ``place``, ``release`` and ``screen`` are converted to the
+    held column's type from ``catalog`` (see ``coerce_hold_key``), so a
+    hold on 42 covers the TEXT key '42' and "00042" stays text when the
+    key column is TEXT; those methods refuse tables missing from it.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS legal_holds (
+            table_name TEXT NOT NULL,
+            hold_key NOT NULL,
+            reason TEXT,
+            placed_at TEXT NOT NULL,
+            PRIMARY KEY (table_name, hold_key)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path: str, error_rate: float = 0.01, catalog: Optional[SchemaCatalog] = None):
+        self.path = path
+        self.error_rate = error_rate
+        self.catalog = catalog
+        self.conn = None
+        self._filters: Dict[str, BloomFilter] = {}
+        self._data_version = None
+
+    def open(self) -> "LegalHoldRegistry":
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.path, isolation_level=None)
+            self.conn.executescript(self.SCHEMA)
+        return self
+
+    def close(self) -> None:
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+        self._filters = {}
+
+    def attach(self, conn: sqlite3.Connection) -> None:
+        """Attach the registry read-only to a purge connection as ``holds``"""
+        if not os.path.exists(self.path):
+            self.open().close()
+        uri = f"file:{quote(os.path.abspath(self.path))}?mode=ro"
+        conn.execute(f"ATTACH DATABASE ? AS {HOLDS_SCHEMA}", (uri,))
+
+    def _keys(self, table_name: str, keys: Iterable) -> List:
+        """Keys as the held column stores them; raises ValueError when the column's type is unknown"""
+        table = self.catalog.table(table_name) if self.catalog is not None else None
+        if table is None:
+            raise ValueError(f"Table {table_name} is not in the registry's schema catalog, "
+                             f"so its key type is unknown")
+        affinity = hold_key_affinity(table)
+        return [coerce_hold_key(k, affinity) for k in keys]
+
+    def place(self, table_name: str, keys: Iterable, reason: Optional[str] = None) -> int:
+        """Hold rows of a table by key; returns how many holds are new"""
+        keys = self._keys(table_name, keys)
+        conn = self.open().conn
+        placed_at = datetime.now().isoformat()
+        added = 0
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for i in range(0, len(keys), _BATCH):
+                added += conn.executemany(
+                    "INSERT OR IGNORE INTO legal_holds VALUES (?, ?, ?, ?)",
+                    [(table_name, k, reason, placed_at) for k in keys[i:i + _BATCH]]
+                ).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        bloom = self._filters.get(table_name)
+        if bloom is not None:
+            for key in keys:
+                bloom.add(key)
+        return added
+
+    def release(self, table_name: str, keys: Optional[Iterable] = None) -> int:
+        """Lift holds on the given keys (or on the whole table); returns how many were lifted"""
+        if keys is not None:
+            keys = self._keys(table_name, keys)
+        conn = self.open().conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if keys is None:
+                released = conn.execute("DELETE FROM legal_holds WHERE table_name = ?", (table_name,)).rowcount
+            else:
+                released = conn.executemany("DELETE FROM legal_holds WHERE table_name = ? AND hold_key = ?",
+                                            [(table_name, k) for k in keys]).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        # A Bloom filter cannot forget keys: rebuild it on next use
+        self._filters.pop(table_name, None)
+        return released
+
+    def counts(self) -> Dict[str, int]:
+        """Number of held keys per table"""
+        return dict(self.open().conn.execute(
+            "SELECT table_name, count(*) FROM legal_holds GROUP BY table_name"
+        ).fetchall())
+
+    def _filter(self, table_name: str) -> BloomFilter:
+        conn = self.open().conn
+        # data_version moves when another connection commits, so holds placed elsewhere are seen
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            self._filters = {}
+            self._data_version = version
+        bloom = self._filters.get(table_name)
+        if bloom is None:
+            held = conn.execute("SELECT count(*) FROM legal_holds WHERE table_name = ?", (table_name,)).fetchone()[0]
+            # Headroom so holds placed through this registry keep the error rate
+            bloom = BloomFilter(2 * held + 1_000, self.error_rate)
+            for (key,) in conn.execute("SELECT hold_key FROM legal_holds WHERE table_name = ?", (table_name,)):
+                bloom.add(key)
+            self._filters[table_name] = bloom
+        return bloom
+
+    def is_held(self, table_name: str, key) -> bool:
+        return bool(self.screen(table_name, [key]))
+
+    def screen(self, table_name: str, keys: Iterable) -> Set:
+        """The held keys among ``keys``; only Bloom filter hits are looked up in the index"""
+        keys = list(keys)
+        stored = dict(zip(keys, self._keys(table_name, keys)))
+        bloom = self._filter(table_name)
+        candidates = [k for k in keys if stored[k] in bloom]
+        held = set()
+        for i in range(0, len(candidates), _BATCH):
+            batch = [stored[k] for k in candidates[i:i + _BATCH]]
+            held.update(key for (key,) in self.conn.execute(
+                f"SELECT hold_key FROM legal_holds WHERE table_name = ? "
+                f"AND hold_key IN ({', '.join('?' * len(batch))})", [table_name] + batch
+            ))
+        return {k for k in candidates if stored[k] in held}
+
+
+def held_condition(column_sql: str) -> str:
+    """SQL true for a row whose ``column_sql`` is held; bind the table name as its one parameter"""
+    # Unary + drops the column's affinity, which would otherwise keep hold_key out of the index probe
+    return (f"EXISTS (SELECT 1 FROM {HOLDS_SCHEMA}.legal_holds AS h "
+            f"WHERE h.table_name = ? AND h.hold_key = +{column_sql})")
+
+
+def held_keys_sql(upper_bound: bool) -> str:
+    """Held keys of a table within [lo, hi]; bind the table name, lo and (with ``upper_bound``) hi"""
+    return (f"SELECT hold_key FROM {HOLDS_SCHEMA}.legal_holds WHERE table_name = ? AND hold_key >= ?"
+            + (" AND hold_key <= ?" if upper_bound else ""))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Place, release or count legal holds")
+    parser.add_argument("registry", help="SQLite legal-hold registry")
+    parser.add_argument("action", choices=["place", "release", "count"])
+    parser.add_argument("table", nargs="?", help="Table the keys belong to")
+    parser.add_argument("key_file", nargs="?", help="File with one key per line")
+    parser.add_argument("--db", default=None,
+                        help="Database the table lives in; its declared key type decides how keys are stored")
+    parser.add_argument("--reason", default=None, help="Why the rows are held (e.g. the matter or case number)")
+    args = parser.parse_args()
+
+    if args.action != "count" and not (args.table and args.key_file and args.db):
+        parser.error(f"{args.action} needs a table, a key file and --db")
+    registry = LegalHoldRegistry(args.registry, catalog=load_schema_catalog(args.db) if args.db else None)
+    try:
+        if args.action == "count":
+            for table_name, held in sorted(registry.counts().items()):
+                print(f"{table_name}: {held}")
+        elif registry.catalog.table(args.table) is None:
+            print(f"ERROR: Table {args.table} not found in {args.db}")
+        else:
+            with open(args.key_file) as f:
+                # Kept as text; the registry converts them to the key column's type
+                keys = [line.strip() for line in f if line.strip()]
+            if args.action == "place":
+                print(f"Placed {registry.place(args.table, keys, args.reason)} new holds on {args.table}")
+            else:
+                print(f"Released {registry.release(args.table, keys)} holds on {args.table}")
+    finally:
+        registry.close()
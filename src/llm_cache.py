@@ -0,0 +1,147 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+
+class LLMResponseCache:
+    """Disk-backed, content-addressed cache for raw LLM responses.
+
+    Entries are keyed by a hash of the prompt template, the rendered prompt
+    inputs, the model name and the RCC catalog version, so any change to the
+    schema text, the prompt wording or the retention catalog is a miss.
+    Entries older than ``max_age_seconds`` are dropped on read, and the
+    least recently used entries are evicted once ``max_entries`` or
+    ``max_bytes`` is exceeded.
+    """
+
+    def __init__(self, path: str = "llm_cache.sqlite", max_entries: int = 50000,
+                 max_bytes: int = 256 * 1024 * 1024, max_age_seconds: Optional[float] = 30 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                cache_key TEXT PRIMARY KEY,
+                model_name TEXT,
+                response TEXT NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache(last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(template: str, inputs: Dict, model_name: str, catalog_version: str = "") -> str:
+        """Build the content address for one prompt invocation"""
+        payload = json.dumps({
+            "template": template,
+            "inputs": inputs,
+            "model": model_name,
+            "rcc_catalog": catalog_version
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM llm_cache WHERE cache_key = ?", (key,)
+            ).fetchone()
+
+            if row and self.max_age_seconds is not None and now - row[1] > self.max_age_seconds:
+                self._conn.execute("DELETE FROM llm_cache WHERE cache_key = ?", (key,))
+                self._conn.commit()
+                self.evictions += 1
+                row = None
+
+            if not row:
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE cache_key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, response: str, model_name: str = "") -> None:
+        """Store a response and evict old entries if the cache is over budget"""
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model_name, response, size, now, now)
+            )
+            self.writes += 1
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then least recently used ones until within budget"""
+        if self.max_age_seconds is not None:
+            cursor = self._conn.execute(
+                "DELETE FROM llm_cache WHERE created_at < ?", (now - self.max_age_seconds,)
+            )
+            self.evictions += cursor.rowcount
+
+        count, total_bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM llm_cache"
+        ).fetchone()
+        if count <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+
+        freed_entries = 0
+        freed_bytes = 0
+        victims = []
+        for key, size in self._conn.execute("SELECT cache_key, size_bytes FROM llm_cache ORDER BY last_access"):
+            if count - freed_entries <= self.max_entries and total_bytes - freed_bytes <= self.max_bytes:
+                break
+            victims.append((key,))
+            freed_entries += 1
+            freed_bytes += size
+
+        self._conn.executemany("DELETE FROM llm_cache WHERE cache_key = ?", victims)
+        self.evictions += len(victims)
+
+    def clear(self) -> None:
+        """Remove every cached response"""
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and current cache size"""
+        with self._lock:
+            count, total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM llm_cache"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "entries": count,
+            "size_bytes": total_bytes
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
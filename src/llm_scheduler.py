@@ -0,0 +1,222 @@
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+# Expected completion size added to every request's token estimate
+DEFAULT_OUTPUT_TOKENS = 512
+
+_RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) used for prompt budgeting"""
+    return len(text) // 4 + 1
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    for candidate in (error, getattr(error, "response", None)):
+        if candidate is None:
+            continue
+        for attr in ("status_code", "status", "code"):
+            value = getattr(candidate, attr, None)
+            if isinstance(value, int):
+                return value
+    return None
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """True for HTTP 429 / provider rate-limit errors"""
+    if _status_code(error) == 429:
+        return True
+    message = str(error).lower()
+    return "rate limit" in message or "rate_limit" in message or "too many requests" in message
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """Rate limits, transient server errors and connection problems are worth retrying"""
+    if is_rate_limit_error(error):
+        return True
+    if _status_code(error) in _RETRYABLE_STATUS:
+        return True
+    name = type(error).__name__.lower()
+    return "timeout" in name or "connection" in name
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Delay requested by the provider via a Retry-After header or a "try again in Xs" message"""
+    for candidate in (error, getattr(error, "response", None)):
+        headers = getattr(candidate, "headers", None)
+        if not headers:
+            continue
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        if value is not None:
+            try:
+                return max(0.0, float(value))
+            except (TypeError, ValueError):
+                pass
+    match = re.search(r"try again in\s+(?:(\d+)m)?\s*([\d.]+)\s*(ms|s)", str(error), re.IGNORECASE)
+    if match:
+        minutes = int(match.group(1) or 0)
+        seconds = float(match.group(2))
+        if match.group(3).lower() == "ms":
+            seconds /= 1000.0
+        return minutes * 60 + seconds
+    return None
+
+
+class TokenBucket:
+    """Continuously refilling bucket holding at most ``per_minute`` units"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.available = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount: float) -> float:
+        """Take ``amount`` units, sleeping until they are available; returns the time waited"""
+        amount = min(float(amount), self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.available >= amount:
+                    self.available -= amount
+                    return waited
+                delay = (amount - self.available) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def drain(self) -> None:
+        """Empty the bucket, e.g. after the provider reported the limit as exhausted"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.available = 0.0
+
+
+class LLMScheduler:
+    """Admission control for LLM calls: rate buckets, retries and adaptive concurrency.
+
+    Every call waits for a request token and its estimated tokens in the
+    requests-per-minute and tokens-per-minute buckets, and for a free slot
+    under the current concurrency limit. Rate-limit and transient errors are
+    retried after the provider's Retry-After delay (or an exponential
+    backoff) plus jitter. The concurrency limit follows AIMD: it grows by
+    about one slot per limit's worth of successful calls and is halved on
+    a 429 or cut by a quarter when latency exceeds ``latency_target``.
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                 max_concurrency: int = 4, min_concurrency: int = 1, max_retries: int = 6,
+                 base_backoff: float = 1.0, max_backoff: float = 60.0, latency_target: Optional[float] = None):
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.latency_target = latency_target
+
+        self.limit = float(self.max_concurrency)
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+        self.requests = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.failures = 0
+        self.throttle_seconds = 0.0
+        self.avg_latency = None
+
+    def _acquire_slot(self) -> None:
+        with self._cond:
+            while self.in_flight >= max(self.min_concurrency, int(self.limit)):
+                self._cond.wait()
+            self.in_flight += 1
+            self.requests += 1
+
+    def _release_slot(self) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def _on_success(self, latency: float) -> None:
+        with self._cond:
+            self.avg_latency = latency if self.avg_latency is None else 0.8 * self.avg_latency + 0.2 * latency
+            if self.latency_target is not None and latency > self.latency_target:
+                self.limit = max(float(self.min_concurrency), self.limit * 0.75)
+            else:
+                self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+    def _on_rate_limited(self) -> None:
+        with self._cond:
+            self.rate_limited += 1
+            self.limit = max(float(self.min_concurrency), self.limit / 2.0)
+        # The provider counts both limits; either may be the one exhausted
+        for bucket in (self.request_bucket, self.token_bucket):
+            if bucket is not None:
+                bucket.drain()
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        if retry_after is not None:
+            return retry_after + random.uniform(0, self.base_backoff)
+        return random.uniform(0, min(self.max_backoff, self.base_backoff * (2 ** attempt)))
+
+    def run(self, call: Callable[[], Any], estimated_tokens: int = 0) -> Any:
+        """Run ``call`` under the rate limits, retrying rate-limit and transient failures"""
+        attempt = 0
+        while True:
+            waited = 0.0
+            if self.request_bucket is not None:
+                waited += self.request_bucket.acquire(1)
+            if self.token_bucket is not None and estimated_tokens:
+                waited += self.token_bucket.acquire(estimated_tokens)
+
+            self._acquire_slot()
+            started = time.monotonic()
+            try:
+                result = call()
+            except Exception as e:
+                self._release_slot()
+                with self._cond:
+                    self.throttle_seconds += waited
+                    if not is_retryable_error(e) or attempt >= self.max_retries:
+                        self.failures += 1
+                        raise
+                    self.retries += 1
+                if is_rate_limit_error(e):
+                    self._on_rate_limited()
+                delay = self._backoff(attempt, retry_after_seconds(e))
+                print(f"WARNING: LLM call failed ({type(e).__name__}), retrying in {delay:.1f}s "
+                      f"(attempt {attempt + 1}/{self.max_retries})")
+                attempt += 1
+                time.sleep(delay)
+                continue
+
+            self._release_slot()
+            with self._cond:
+                self.throttle_seconds += waited
+            self._on_success(time.monotonic() - started)
+            return result
+
+    def stats(self) -> Dict:
+        """Counters describing how the scheduler has behaved so far"""
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "failures": self.failures,
+            "throttle_seconds": round(self.throttle_seconds, 2),
+            "concurrency_limit": round(self.limit, 2),
+            "avg_latency_seconds": round(self.avg_latency, 3) if self.avg_latency is not None else None
+        }
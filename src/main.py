@@ -1,27 +1,25 @@
-import pymysql
 import pandas as pd
 from sentence_transformers import SentenceTransformer
 from sklearn.cluster import KMeans
 
+from db_backends import MySQLBackend
+
 # DB connection setup
-conn = pymysql.connect(
+backend = MySQLBackend(
     host='localhost',
     user='root',
     password='dheeraJ@0502',
     database='sample_archival'
 )
 
-# Step 1: Get all table names
-with conn.cursor() as cursor:
-    cursor.execute("SHOW TABLES")
-    tables = [row[0] for row in cursor.fetchall()]
+# Step 1: Load every table's columns in a few information_schema queries
+catalog = backend.load_catalog()
+tables = catalog.table_names
 
 # Step 2: Get table definitions as strings
 def get_table_schema(table):
-    with conn.cursor() as cursor:
-        cursor.execute(f"DESCRIBE {table}")
-        schema = cursor.fetchall()
-    schema_str = f"{table}: " + ", ".join(f"{col[0]} {col[1]}" for col in schema)
+    schema = catalog.table(table).columns
+    schema_str = f"{table}: " + ", ".join(f"{col.name} {col.type}" for col in schema)
     return schema_str
 
 table_descriptions = [get_table_schema(tbl) for tbl in tables]
@@ -39,10 +37,8 @@ for i, table in enumerate(tables):
 
 # Optional: Identify datetime columns (archival candidate)
 def find_datetime_columns(table):
-    with conn.cursor() as cursor:
-        cursor.execute(f"DESCRIBE {table}")
-        schema = cursor.fetchall()
-    return [col[0] for col in schema if 'datetime' in col[1]]
+    schema = catalog.table(table).columns
+    return [col.name for col in schema if 'datetime' in col.type]
 
 print("\nSuggested archival columns:")
 for table in tables:
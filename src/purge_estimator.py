@@ -0,0 +1,163 @@
+import sqlite3
+from datetime import date
+from typing import Dict, Optional
+
+from column_profiler import bounded_row_count, quote_identifier, rowid_sample_source
+from retention_manager import RetentionManager
+from retention_sql import predicate_for_table
+from schema_catalog import SchemaCatalog, TableInfo
+
+
+class PurgeEstimator:
+    """Estimate how many rows each table's retention rule makes eligible and the bytes freed.
+
+    Counting picks the cheapest sound method: an exact count for small
+    tables (or when ``full_scan`` is requested), an index range count when
+    EXPLAIN QUERY PLAN shows the predicate is served by an index, and
+    otherwise extrapolation from ``sample_blocks`` rowid-range blocks spread
+    over the table's rowid span (a sample that hits no rows is replaced by
+    an exact count).
+    Freed bytes come from the dbstat page statistics when SQLite has them
+    and the table is small enough for dbstat's page walk to be cheap, else
+    from the average row size of a small sample.
+    """
+
+    def __init__(self, retention_manager: Optional[RetentionManager] = None,
+                 sample_threshold_rows: int = 1_000_000, sample_blocks: int = 20,
+                 block_rows: int = 5_000, full_scan: bool = False):
+        self.retention_manager = retention_manager or RetentionManager()
+        self.sample_threshold_rows = sample_threshold_rows
+        self.sample_blocks = sample_blocks
+        self.block_rows = block_rows
+        self.full_scan = full_scan
+        self._dbstat = None
+
+    def _uses_index(self, conn: sqlite3.Connection, table_name: str, predicate: Dict) -> bool:
+        plan = conn.execute(
+            f"EXPLAIN QUERY PLAN SELECT count(*) FROM {quote_identifier(table_name)} WHERE {predicate['sql']}",
+            predicate["params"]
+        ).fetchall()
+        return any(str(row[-1]).startswith("SEARCH") for row in plan)
+
+    def count_eligible(self, conn: sqlite3.Connection, table: TableInfo, predicate: Dict) -> Dict:
+        """Eligible row count and how it was obtained (exact, index_range or sampled)"""
+        name = quote_identifier(table.name)
+        total = bounded_row_count(conn, table, self.sample_threshold_rows)
+        small = total is not None and total <= self.sample_threshold_rows
+        sample = None
+        if not (self.full_scan or small or self._uses_index(conn, table.name, predicate)):
+            if total is None:
+                # WITHOUT ROWID and no usable index: a bounded prefix is the only cheap sample
+                sample = (f"(SELECT * FROM {name} LIMIT {self.sample_threshold_rows})", None)
+            else:
+                sample = rowid_sample_source(conn, table.name, self.sample_blocks, self.block_rows)
+
+        if sample is not None:
+            source, coverage = sample
+            sampled, matching = conn.execute(
+                f"SELECT count(*), coalesce(sum({predicate['sql']}), 0) FROM {source}", predicate["params"]
+            ).fetchone()
+            if sampled:
+                if coverage is None:
+                    total_rows = self.sample_threshold_rows
+                elif table.row_estimate_is_upper_bound:
+                    # Scale by the share of the rowid span read rather than trust max(rowid)
+                    total_rows = sampled / coverage
+                else:
+                    total_rows = total
+                return {"eligible_rows": int(round(total_rows * matching / sampled)), "method": "sampled",
+                        "sampled_rows": sampled}
+
+        method = "exact" if (self.full_scan or small or sample is not None) else "index_range"
+        count = conn.execute(f"SELECT count(*) FROM {name} WHERE {predicate['sql']}",
+                             predicate["params"]).fetchone()[0]
+        return {"eligible_rows": count, "method": method}
+
+    def _has_dbstat(self, conn: sqlite3.Connection) -> bool:
+        if self._dbstat is None:
+            try:
+                conn.execute("SELECT 1 FROM dbstat LIMIT 1").fetchall()
+                self._dbstat = True
+            except sqlite3.Error:
+                self._dbstat = False
+        return self._dbstat
+
+    def bytes_per_row(self, conn: sqlite3.Connection, table: TableInfo) -> Dict:
+        """Average on-disk bytes per row, including the table's indexes when dbstat is used"""
+        small = table.row_estimate is not None and table.row_estimate <= self.sample_threshold_rows
+        if table.row_estimate and (small or self.full_scan) and self._has_dbstat(conn):
+            names = [table.name] + [index.name for index in table.indexes]
+            placeholders = ", ".join("?" for _ in names)
+            total_bytes = conn.execute(
+                f"SELECT coalesce(sum(pgsize), 0) FROM dbstat WHERE name IN ({placeholders})", names
+            ).fetchone()[0]
+            return {"bytes_per_row": round(total_bytes / table.row_estimate, 1), "bytes_source": "dbstat"}
+
+        lengths = " + ".join(f"coalesce(length({quote_identifier(c)}), 0)" for c in table.column_names) or "0"
+        avg = conn.execute(
+            f"SELECT avg({lengths}) FROM (SELECT * FROM {quote_identifier(table.name)} LIMIT 1000)"
+        ).fetchone()[0]
+        return {"bytes_per_row": round(avg or 0.0, 1), "bytes_source": "row_sample"}
+
+    def estimate_table(self, conn: sqlite3.Connection, table: TableInfo, rcc_code: Optional[str],
+                       lookup_columns, profile: Optional[Dict] = None, as_of: Optional[date] = None) -> Dict:
+        """Purge estimate for one table from its RCC and retention lookup columns"""
+        predicate, reason = predicate_for_table(
+            self.retention_manager, table.column_names, rcc_code, lookup_columns, profile, as_of
+        )
+        if predicate is None:
+            return {"status": "skipped", "reason": reason}
+
+        counted = self.count_eligible(conn, table, predicate)
+        size = self.bytes_per_row(conn, table)
+        total = table.row_estimate
+        return {
+            "status": "estimated",
+            "rcc": rcc_code,
+            "predicate": predicate["sql"],
+            "predicate_params": predicate["params"],
+            "cutoff": predicate["cutoff"],
+            "total_rows": total,
+            "total_rows_is_upper_bound": table.row_estimate_is_upper_bound,
+            "eligible_fraction": round(counted["eligible_rows"] / total, 4) if total else None,
+            "estimated_freed_bytes": int(counted["eligible_rows"] * size["bytes_per_row"]),
+            **counted,
+            **size
+        }
+
+    def estimate(self, db_path: str, catalog: SchemaCatalog, table_analysis: Dict[str, Dict],
+                 profiles: Optional[Dict[str, Dict]] = None, as_of: Optional[date] = None) -> Dict[str, Dict]:
+        """Purge estimates for every analyzed table; failures are reported per table"""
+        profiles = profiles or {}
+        estimates = {}
+        conn = sqlite3.connect(db_path)
+        try:
+            for table_name, info in table_analysis.items():
+                table = catalog.table(table_name)
+                if table is None:
+                    continue
+                rcc = (info.get("rcc_classification") or {}).get("assigned_rcc")
+                columns = (info.get("retention_analysis") or {}).get("retention_lookup_columns")
+                try:
+                    estimates[table_name] = self.estimate_table(
+                        conn, table, rcc, columns, profiles.get(table_name), as_of
+                    )
+                except sqlite3.Error as e:
+                    print(f"WARNING: Could not estimate purge volume for {table_name}: {e}")
+                    estimates[table_name] = {"status": "failed", "reason": str(e)}
+        finally:
+            conn.close()
+        return estimates
+
+
+def summarize_by_rcc(estimates: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Eligible rows and freed bytes totalled per RCC"""
+    summary = {}
+    for table_name, estimate in estimates.items():
+        if estimate.get("status") != "estimated":
+            continue
+        entry = summary.setdefault(estimate["rcc"], {"tables": [], "eligible_rows": 0, "estimated_freed_bytes": 0})
+        entry["tables"].append(table_name)
+        entry["eligible_rows"] += estimate["eligible_rows"]
+        entry["estimated_freed_bytes"] += estimate["estimated_freed_bytes"]
+    return summary
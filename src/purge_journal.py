@@ -0,0 +1,190 @@
+import json
+import sqlite3
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Chunks used for the recent-throughput figure behind the ETA
+THROUGHPUT_WINDOW = 50
+
+
+class PurgeJournal:
+    """Progress journal of archival jobs, kept in a small SQLite side database.
+
+    The executor ATTACHes the journal to its own connection as ``journal``,
+    so a chunk's progress row is written inside the same transaction that
+    moves the chunk: after a crash, the journal and the data agree on the
+    last committed chunk. (In WAL mode SQLite commits attached databases
+    separately; the journal can then trail by one transaction, which is
+    harmless because rows that were already moved no longer match and rows
+    the job already archived are not copied again.) A job stores its plan, so a
+    resume needs neither the report nor a re-plan, and each table restarts
+    after its last committed key.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS {p}jobs (
+            job_id TEXT PRIMARY KEY,
+            db_path TEXT NOT NULL,
+            archive_path TEXT NOT NULL,
+            as_of TEXT NOT NULL,
+            plan TEXT NOT NULL,
+            status TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            finished_at TEXT
+        );
+        CREATE TABLE IF NOT EXISTS {p}table_progress (
+            job_id TEXT NOT NULL,
+            step INTEGER NOT NULL,
+            table_name TEXT NOT NULL,
+            last_key,
+            rows_moved INTEGER NOT NULL DEFAULT 0,
+            chunks INTEGER NOT NULL DEFAULT 0,
+            estimated_rows INTEGER,
+            done INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (job_id, step, table_name)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS {p}chunk_log (
+            job_id TEXT NOT NULL,
+            step INTEGER NOT NULL,
+            table_name TEXT NOT NULL,
+            lo,
+            hi,
+            rows INTEGER NOT NULL,
+            seconds REAL NOT NULL,
+            committed_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS {p}chunk_log_job ON chunk_log (job_id, committed_at);
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = None
+        self.prefix = ""
+
+    def attach(self, conn: sqlite3.Connection) -> "PurgeJournal":
+        """Use the journal through another connection (attached as ``journal``)"""
+        conn.execute("ATTACH DATABASE ? AS journal", (self.path,))
+        self.conn = conn
+        self.prefix = "journal."
+        conn.executescript(self.SCHEMA.format(p=self.prefix))
+        return self
+
+    def open(self) -> "PurgeJournal":
+        """Use the journal on its own connection (for progress read-outs)"""
+        self.conn = sqlite3.connect(self.path, isolation_level=None)
+        self.prefix = ""
+        self.conn.executescript(self.SCHEMA.format(p=""))
+        return self
+
+    def close(self) -> None:
+        if self.conn is not None and not self.prefix:
+            self.conn.close()
+        self.conn = None
+
+    def create_job(self, job_id: str, db_path: str, archive_path: str, as_of: str, steps: List[Dict]) -> None:
+        p = self.prefix
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.execute(f"INSERT INTO {p}jobs VALUES (?, ?, ?, ?, ?, 'running', ?, NULL)", (
+                job_id, db_path, archive_path, as_of, json.dumps(steps, default=str), datetime.now().isoformat()
+            ))
+            self.conn.executemany(
+                f"INSERT INTO {p}table_progress (job_id, step, table_name, estimated_rows) VALUES (?, ?, ?, ?)",
+                [(job_id, i, step["table"], step.get("estimated_rows")) for i, step in enumerate(steps)]
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def load_job(self, job_id: str) -> Optional[Dict]:
+        """The stored job with its plan and per-step progress, or None if unknown"""
+        p = self.prefix
+        row = self.conn.execute(
+            f"SELECT db_path, archive_path, as_of, plan, status, created_at, finished_at FROM {p}jobs WHERE job_id = ?",
+            (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        progress = {}
+        for step, table_name, last_key, rows_moved, chunks, estimated, done in self.conn.execute(
+            f"SELECT step, table_name, last_key, rows_moved, chunks, estimated_rows, done "
+            f"FROM {p}table_progress WHERE job_id = ? ORDER BY step", (job_id,)
+        ):
+            progress.setdefault(step, {})[table_name] = {
+                "last_key": last_key, "rows_moved": rows_moved, "chunks": chunks,
+                "estimated_rows": estimated, "done": bool(done)
+            }
+        return {
+            "job_id": job_id, "db_path": row[0], "archive_path": row[1], "as_of": row[2],
+            "steps": json.loads(row[3]), "status": row[4], "created_at": row[5], "finished_at": row[6],
+            "progress": progress
+        }
+
+    def record_chunk(self, job_id: str, step: int, table_name: str, lo, hi, rows: int, seconds: float,
+                     done: bool = False) -> None:
+        """Log one moved chunk; call inside the transaction that moved it"""
+        p = self.prefix
+        self.conn.execute(f"INSERT INTO {p}chunk_log VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                          (job_id, step, table_name, lo, hi, rows, seconds, time.time()))
+        self.conn.execute(f"""
+            INSERT INTO {p}table_progress (job_id, step, table_name, last_key, rows_moved, chunks, done)
+            VALUES (?, ?, ?, ?, ?, 1, ?)
+            ON CONFLICT (job_id, step, table_name) DO UPDATE SET
+                last_key = coalesce(excluded.last_key, last_key),
+                rows_moved = rows_moved + excluded.rows_moved,
+                chunks = chunks + 1,
+                done = excluded.done
+        """, (job_id, step, table_name, hi, rows, int(done)))
+
+    def mark_done(self, job_id: str, step: int, table_name: str) -> None:
+        self.conn.execute(f"""
+            INSERT INTO {self.prefix}table_progress (job_id, step, table_name, done) VALUES (?, ?, ?, 1)
+            ON CONFLICT (job_id, step, table_name) DO UPDATE SET done = 1
+        """, (job_id, step, table_name))
+
+    def finish_job(self, job_id: str, status: str) -> None:
+        self.conn.execute(f"UPDATE {self.prefix}jobs SET status = ?, finished_at = ? WHERE job_id = ?",
+                          (status, datetime.now().isoformat(), job_id))
+
+    def progress(self, job_id: str) -> Dict:
+        """Rows moved against the estimates, recent throughput and the resulting ETA"""
+        job = self.load_job(job_id)
+        if job is None:
+            return {"error": f"Unknown job {job_id}"}
+        p = self.prefix
+        recent = self.conn.execute(f"""
+            SELECT coalesce(sum(rows), 0), coalesce(sum(seconds), 0), min(committed_at), max(committed_at), count(*)
+            FROM (SELECT rows, seconds, committed_at FROM {p}chunk_log WHERE job_id = ?
+                  ORDER BY committed_at DESC LIMIT {THROUGHPUT_WINDOW})
+        """, (job_id,)).fetchone()
+        rows, busy_seconds, first, last, count = recent
+        # Wall-clock span includes throttling and commit time; a single chunk only has its own timing
+        elapsed = (last - first) if count > 1 else busy_seconds
+        rows_per_second = rows / elapsed if elapsed else None
+
+        tables = []
+        remaining = 0
+        for step, entries in job["progress"].items():
+            for table_name, entry in entries.items():
+                left = max((entry["estimated_rows"] or 0) - entry["rows_moved"], 0) if not entry["done"] else 0
+                remaining += left
+                tables.append({"step": step, "table": table_name, **entry, "remaining_estimate": left})
+        moved = sum(t["rows_moved"] for t in tables)
+        eta = None
+        if not remaining:
+            eta = 0
+        elif rows_per_second:
+            eta = round(remaining / rows_per_second)
+        return {
+            "job_id": job_id,
+            "status": job["status"],
+            "tables_done": sum(1 for t in tables if t["done"]),
+            "tables_total": len(tables),
+            "rows_moved": moved,
+            "rows_remaining_estimate": remaining,
+            "rows_per_second": round(rows_per_second, 1) if rows_per_second else None,
+            "eta_seconds": eta,
+            "tables": tables
+        }
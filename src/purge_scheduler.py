@@ -0,0 +1,152 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Callable, Dict, List, Optional
+
+from archival_executor import ArchivalExecutor
+
+
+def group_jobs(db_path: str, archive_path: str, report: Dict, journal_path: Optional[str] = None,
+               job_prefix: Optional[str] = None, run_id: Optional[str] = None) -> List[Dict]:
+    """One archival job per group of a report, in the report's group order.
+
+    Journaled jobs are named ``<job_prefix>:<run_id>:<group>`` (the prefix
+    defaults to the database file name, the run id to today's date), so an
+    interrupted run is resumed by running it again the same day and the
+    next night's run gets jobs of its own.
+    """
+    prefix = f"{job_prefix or os.path.basename(db_path)}:{run_id or date.today().isoformat()}"
+    return [
+        {
+            "key": f"{db_path}::{group_name}",
+            "db_path": db_path,
+            "archive_path": archive_path,
+            "journal_path": journal_path,
+            "job_id": f"{prefix}:{group_name}" if journal_path else None,
+            "report": report,
+            "group": group_name
+        }
+        for group_name, tables in report.get("grouped_by_priority", {}).items() if tables
+    ]
+
+
+def fleet_jobs(fleet_report: Dict, archive_dir: str, journal_dir: Optional[str] = None,
+               job_prefix: Optional[str] = None, run_id: Optional[str] = None) -> List[Dict]:
+    """Group jobs for every database of a fleet report, each database archiving into its own file"""
+    jobs = []
+    for schema in fleet_report.get("schemas", {}).values():
+        report = schema["report"]
+        if "error" in report:
+            continue
+        for db_path in schema["databases"]:
+            stem = os.path.splitext(os.path.basename(db_path))[0]
+            jobs.extend(group_jobs(
+                db_path,
+                os.path.join(archive_dir, f"{stem}.archive.sqlite"),
+                report,
+                os.path.join(journal_dir, f"{stem}.journal.sqlite") if journal_dir else None,
+                f"{job_prefix}:{stem}" if job_prefix else None,
+                run_id
+            ))
+    return jobs
+
+
+class PurgeScheduler:
+    """Run independent archival jobs at the same time within writer limits.
+
+    FK-related tables always share a group, so different groups can be
+    purged independently; each job archives one group, on its own thread
+    and its own connection, and the executor keeps the group's priority
+    order. At most ``max_writers`` jobs run at once, and at most
+    ``per_database_limit`` of them write to the same file. A job writes its
+    live database, its archive and its journal, and needs a slot on each.
+    SQLite allows one writer per file, so SQLite jobs keep the default
+    limit of 1: groups of the same database run one after another, while
+    groups in different database files run in parallel. A legal-hold
+    registry is attached read-only, so jobs share it without a slot. The
+    sqlite3 module releases the GIL while a statement runs, so threads use
+    several cores.
+
+    Jobs start in the order given whenever their files are free, so a
+    busy database does not hold up jobs for the others.
+    """
+
+    def __init__(self, max_writers: int = 4, per_database_limit: int = 1,
+                 executor_kwargs: Optional[Dict] = None,
+                 controller_factory: Optional[Callable[[], object]] = None):
+        self.max_writers = max(1, max_writers)
+        self.per_database_limit = max(1, per_database_limit)
+        self.executor_kwargs = executor_kwargs or {}
+        # Batch controllers keep per-run state, so every job gets its own
+        self.controller_factory = controller_factory
+        self._condition = threading.Condition()
+        self._writers = {}
+        self._running = 0
+        self.peak_concurrency = 0
+
+    @staticmethod
+    def _resources(job: Dict) -> List[str]:
+        paths = [job["db_path"], job["archive_path"], job.get("journal_path")]
+        return sorted({os.path.realpath(p) for p in paths if p})
+
+    def _available(self, job: Dict) -> bool:
+        return all(self._writers.get(r, 0) < self.per_database_limit for r in self._resources(job))
+
+    def _acquire(self, job: Dict) -> None:
+        for resource in self._resources(job):
+            self._writers[resource] = self._writers.get(resource, 0) + 1
+        self._running += 1
+        self.peak_concurrency = max(self.peak_concurrency, self._running)
+
+    def _release(self, job: Dict) -> None:
+        with self._condition:
+            for resource in self._resources(job):
+                self._writers[resource] -= 1
+            self._running -= 1
+            self._condition.notify_all()
+
+    def _run_job(self, job: Dict) -> Dict:
+        try:
+            executor = ArchivalExecutor(
+                job["db_path"], job["archive_path"],
+                journal_path=job.get("journal_path"),
+                job_id=job.get("job_id"),
+                controller=self.controller_factory() if self.controller_factory else None,
+                **self.executor_kwargs
+            )
+            return executor.run(job["report"], groups=[job["group"]])
+        except Exception as e:
+            print(f"ERROR: Archival job {job['key']} failed: {e}")
+            return {"error": str(e)}
+        finally:
+            self._release(job)
+
+    def run(self, jobs: List[Dict]) -> Dict:
+        """Run every job and return each job's executor summary with overall totals"""
+        started = time.monotonic()
+        pending = list(jobs)
+        futures = {}
+        with ThreadPoolExecutor(max_workers=self.max_writers) as pool:
+            while pending:
+                with self._condition:
+                    job = None
+                    while job is None:
+                        if self._running < self.max_writers:
+                            job = next((j for j in pending if self._available(j)), None)
+                        if job is None:
+                            self._condition.wait()
+                    pending.remove(job)
+                    self._acquire(job)
+                futures[job["key"]] = pool.submit(self._run_job, job)
+            results = {key: future.result() for key, future in futures.items()}
+        return {
+            "jobs": results,
+            "total_rows_archived": sum(r.get("total_rows_archived", 0) for r in results.values()),
+            "failed_jobs": [key for key, r in results.items()
+                            if "error" in r or any(t.get("status") == "failed" for t in r.get("tables", {}).values())],
+            "max_writers": self.max_writers,
+            "peak_concurrency": self.peak_concurrency,
+            "seconds": round(time.monotonic() - started, 3)
+        }
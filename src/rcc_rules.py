@@ -0,0 +1,140 @@
+import re
+from typing import Dict, List, Optional
+
+from retention_manager import RetentionClassCode, RetentionType
+
+# Table-name patterns that point at a Retention Class Code. Each pattern
+# must match whole words of the table name (split on "_" and camelCase), so
+# "log" matches "audit_log" and "logs" but not "catalog" or "blog_posts".
+DEFAULT_NAME_PATTERNS: Dict[str, List[str]] = {
+    "ADM150": [r"logs?", r"logging", r"audits?", r"debug", r"traces?"],
+    "BNK460": [r"invoices?", r"payments?", r"transactions?", r"billing", r"settlements?"],
+    "CFA360": [r"statements?", r"ledgers?", r"financial_reports?", r"balance_sheets?"],
+    "CFA340": [r"customers?", r"clients?", r"contacts?", r"persons?", r"people"],
+    "LEG460": [r"contracts?", r"agreements?", r"legal"],
+    "LEG120": [r"compliance", r"polic(y|ies)", r"regulat[a-z]*"],
+}
+
+_CONSTRAINT_KEYWORDS = {"primary", "foreign", "unique", "constraint", "check", "create", "references"}
+
+
+def extract_column_names(schema: str) -> List[str]:
+    """Pull column names out of a CREATE TABLE definition"""
+    start = schema.find("(")
+    body = schema[start + 1:] if start != -1 else schema
+
+    # Split the column list on top-level commas so single-line DDL works too
+    parts, depth, current = [], 0, []
+    for ch in body:
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            if depth == 0:
+                break
+            depth -= 1
+        elif ch in ",\n" and depth == 0:
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(ch)
+    parts.append("".join(current))
+
+    columns = []
+    for line in parts:
+        match = re.match(r'\s*[`"\[]?(\w+)[`"\]]?\s+\w+', line)
+        if match and match.group(1).lower() not in _CONSTRAINT_KEYWORDS:
+            columns.append(match.group(1))
+    return columns
+
+
+def normalize_table_name(table_name: str) -> str:
+    """Lower-cased table name with words separated by "_" ("AuditLog" / "audit-log" -> "audit_log")"""
+    name = re.sub(r"(?<=[a-z0-9])(?=[A-Z])", "_", table_name)
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+def compile_name_pattern(pattern: str):
+    """A name pattern anchored to whole words of a normalized table name"""
+    return re.compile(rf"(?:^|_)(?:{pattern})(?:_|$)")
+
+
+def _hint_stem(hint: str) -> str:
+    # "creation_date" / "created_at" -> "creat", "active_flag" -> "activ"
+    return hint.lower().split("_")[0][:5]
+
+
+class RuleBasedRCCClassifier:
+    """Scores tables against each RCC from name patterns and lookup column hints.
+
+    The name score (``name_weight``) is earned when a name pattern for the RCC
+    matches whole words of the table name; the column score (``column_weight``) is the share
+    of the rule's ``lookup_column_hints`` found among the table's columns.
+    A table is only assigned when the best score reaches ``threshold`` and
+    beats the runner-up by ``min_margin``; anything else is left for the LLM.
+    """
+
+    def __init__(self, name_patterns: Optional[Dict[str, List[str]]] = None, threshold: float = 0.75,
+                 min_margin: float = 0.2, name_weight: float = 0.7, column_weight: float = 0.3):
+        self.name_patterns = {
+            code: [compile_name_pattern(p) for p in patterns]
+            for code, patterns in (name_patterns or DEFAULT_NAME_PATTERNS).items()
+        }
+        self.threshold = threshold
+        self.min_margin = min_margin
+        self.name_weight = name_weight
+        self.column_weight = column_weight
+
+    def score_table(self, table_name: str, schema: str) -> Dict[str, float]:
+        """Score every RCC for a table; higher is a better match"""
+        name = normalize_table_name(table_name)
+        column_tokens = set()
+        for column in extract_column_names(schema):
+            column_tokens.update(token[:5] for token in column.lower().split("_") if token)
+
+        scores = {}
+        for rcc in RetentionClassCode:
+            hints = rcc.rule.lookup_column_hints or []
+            name_hit = any(p.search(name) for p in self.name_patterns.get(rcc.code, []))
+            hint_hits = sum(1 for hint in hints if _hint_stem(hint) in column_tokens)
+            column_share = hint_hits / len(hints) if hints else 0.0
+            scores[rcc.code] = round(self.name_weight * name_hit + self.column_weight * column_share, 3)
+        return scores
+
+    def classify(self, table_name: str, schema: str) -> Optional[Dict]:
+        """Return an RCC classification when the rules are confident, else None"""
+        scores = self.score_table(table_name, schema)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        best_code, best_score = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+
+        if best_score < self.threshold or best_score - runner_up < self.min_margin:
+            return None
+
+        rule = RetentionClassCode[best_code].rule
+        result = {
+            "assigned_rcc": best_code,
+            "confidence": best_score,
+            "reasoning": (f"Rule-based match: table name matches {best_code} patterns and columns cover "
+                          f"its lookup hints ({rule.description})"),
+            "decided_by": "rules",
+            "rule_scores": scores
+        }
+        lookup_columns = self.lookup_columns(rule, schema)
+        if lookup_columns:
+            result["lookup_columns"] = lookup_columns
+        return result
+
+    @staticmethod
+    def lookup_columns(rule, schema: str) -> Optional[List[str]]:
+        """Retention lookup columns named exactly like the rule's hints, when they settle the choice.
+
+        ACTIVE_PLUS needs every hint (the activity flag and the date); the
+        other types need one. Anything less is left to the LLM column prompt.
+        """
+        by_name = {c.lower(): c for c in extract_column_names(schema)}
+        found = [by_name[h.lower()] for h in rule.lookup_column_hints or [] if h.lower() in by_name]
+        if not found:
+            return None
+        if rule.retention_type == RetentionType.ACTIVE_PLUS and len(found) < len(rule.lookup_column_hints):
+            return None
+        return found
@@ -1,3 +1,5 @@
+import hashlib
+import json
 from dataclasses import dataclass
 from enum import Enum
 from typing import List, Dict, Optional
@@ -108,4 +110,13 @@ class RetentionManager:
     @property
     def available_rccs(self) -> Dict[str, RetentionRule]:
         """Get all available RCCs and their rules"""
-        return self._rcc_map
\ No newline at end of file
+        return self._rcc_map
+
+    @property
+    def catalog_version(self) -> str:
+        """Short content hash of the RCC catalog; changes whenever any rule changes"""
+        catalog = {
+            code: [rule.years, rule.retention_type.value, rule.description, rule.lookup_column_hints or []]
+            for code, rule in sorted(self._rcc_map.items())
+        }
+        return hashlib.sha256(json.dumps(catalog, sort_keys=True).encode("utf-8")).hexdigest()[:16]
\ No newline at end of file
@@ -0,0 +1,324 @@
+import re
+import sqlite3
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from retention_manager import RetentionManager, RetentionRule, RetentionType
+from column_profiler import quote_identifier
+
+_DATE_NAME = re.compile(r"(date|time|_at$|_on$|^created|^updated|^modified)")
+_FLAG_NAME = re.compile(r"(^is_|active|flag|enabled|deleted|archived|disabled|removed)")
+
+_EVENT_NAME = re.compile(r"(end|terminat|closed|expir|cancel|event|resign|settle)")
+_CREATION_NAME = re.compile(r"(creat|insert|^added|opened)")
+
+# Flags set on rows that are no longer active (is_deleted, archived, ...) and flags set on active rows
+_INACTIVE_FLAG_NAME = re.compile(
+    r"(inactiv|deactiv|delet|archiv|disabl|remov|closed|terminat|cancel|expir|suspend|retired|obsolet|purg)")
+_ACTIVE_FLAG_NAME = re.compile(r"(activ|enabl|current|live)")
+
+# Text values of an activity flag (is_active) that mean "no longer active"
+INACTIVE_TEXT_VALUES = ("0", "n", "no", "false", "inactive")
+# Text values of an inactivity flag (is_deleted) that mean it is set
+SET_TEXT_VALUES = ("1", "y", "yes", "true")
+
+
+def years_before(as_of: date, years: int) -> date:
+    """``as_of`` minus whole years (29 February falls back to the 28th)"""
+    try:
+        return as_of.replace(year=as_of.year - years)
+    except ValueError:
+        return as_of.replace(year=as_of.year - years, day=28)
+
+
+def classify_lookup_columns(columns: List[str], profile: Optional[Dict] = None) -> Tuple[List[str], List[str]]:
+    """Split retention lookup columns into date columns and activity-flag columns.
+
+    Column profiles win over names: mostly ISO-date values mean a date, an
+    integer column with at most two distinct values is a flag.
+    """
+    stats = (profile or {}).get("columns", {})
+    date_columns, flag_columns = [], []
+    for column in columns:
+        column_stats = stats.get(column, {})
+        kinds = column_stats.get("kinds", {})
+        name = column.lower()
+        if kinds.get("date", 0) >= 0.5:
+            date_columns.append(column)
+        elif kinds.get("integer", 0) >= 0.5 and (column_stats.get("distinct_estimate") or 0) <= 2 and column_stats:
+            flag_columns.append(column)
+        elif _FLAG_NAME.search(name):
+            flag_columns.append(column)
+        elif _DATE_NAME.search(name):
+            date_columns.append(column)
+    return date_columns, flag_columns
+
+
+def date_encoding(column: str, profile: Optional[Dict] = None) -> str:
+    """How a date column stores its values: iso_text, unix_seconds, unix_millis or julian_day"""
+    stats = (profile or {}).get("columns", {}).get(column, {})
+    kinds = stats.get("kinds", {})
+    low = stats.get("min")
+    if kinds.get("date", 0) >= 0.5 or not isinstance(low, (int, float)):
+        return "iso_text"
+    if kinds.get("real", 0) >= 0.5 and 1_000_000 < low < 5_000_000:
+        return "julian_day"
+    if low > 100_000_000_000:
+        return "unix_millis"
+    return "unix_seconds"
+
+
+def encode_cutoff(cutoff: date, encoding: str):
+    """The cutoff as a literal comparable with the column's stored values (keeps the predicate sargable)"""
+    if encoding == "iso_text":
+        return cutoff.isoformat()
+    days = (cutoff - date(1970, 1, 1)).days
+    if encoding == "julian_day":
+        return days + 2440587.5
+    if encoding == "unix_millis":
+        return days * 86_400_000
+    return days * 86_400
+
+
+def flag_marks_inactive(flag_column: str) -> Optional[bool]:
+    """Whether a flag is set on inactive rows (is_deleted), set on active rows (is_active), or None if unknown"""
+    name = flag_column.lower()
+    if _INACTIVE_FLAG_NAME.search(name):
+        return True
+    if _ACTIVE_FLAG_NAME.search(name):
+        return False
+    return None
+
+
+def retention_columns(rule: RetentionRule, lookup_columns: List[str],
+                      profile: Optional[Dict] = None) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """The date column and activity flag a rule is evaluated on, or a reason it cannot be.
+
+    EVENT_BASED rules anchor on the event date (termination, end, ...), never
+    on a creation date; ACTIVE_PLUS rules need an activity flag whose name
+    tells which value means inactive (``is_active = 0`` or ``is_deleted =
+    1``), since without one every old row, or every live one, would look
+    expired.
+    """
+    date_columns, flag_columns = classify_lookup_columns(lookup_columns or [], profile)
+    if not date_columns:
+        return None, None, "no date column among the retention lookup columns"
+    date_column = date_columns[0]
+    if rule.retention_type == RetentionType.EVENT_BASED:
+        date_column = next((c for c in date_columns if _EVENT_NAME.search(c.lower())), None) or next(
+            (c for c in date_columns if not _CREATION_NAME.search(c.lower())), None)
+        if date_column is None:
+            return None, None, "event-based rule but no event date column among the retention lookup columns"
+    flag_column = None
+    if rule.retention_type == RetentionType.ACTIVE_PLUS:
+        if not flag_columns:
+            return None, None, "active-plus rule but no activity flag among the retention lookup columns"
+        flag_column = next((c for c in flag_columns if flag_marks_inactive(c) is not None), None)
+        if flag_column is None:
+            return None, None, (f"active-plus rule but cannot tell whether flag {flag_columns[0]} "
+                                f"is set on active or inactive rows")
+    return date_column, flag_column, None
+
+
+def _flag_clause(flag_column: str, profile: Optional[Dict]) -> Tuple[str, List]:
+    """SQL test that a flag says "inactive" (unset is_active, set is_deleted); NULL flags count as active"""
+    kinds = (profile or {}).get("columns", {}).get(flag_column, {}).get("kinds", {})
+    quoted = quote_identifier(flag_column)
+    inactive_when_set = flag_marks_inactive(flag_column)
+    if kinds.get("text", 0) >= 0.5:
+        values = SET_TEXT_VALUES if inactive_when_set else INACTIVE_TEXT_VALUES
+        placeholders = ", ".join("?" for _ in values)
+        return f"lower({quoted}) IN ({placeholders})", list(values)
+    return f"{quoted} = {1 if inactive_when_set else 0}", []
+
+
+def julianday_sql(column: str, encoding: str, years: int = 0) -> str:
+    """SQL julian day number of a date column plus ``years`` (NULL for NULL or unparseable values)"""
+    quoted = quote_identifier(column)
+    args = [quoted]
+    if encoding == "unix_millis":
+        args = [f"{quoted} / 1000.0", "'unixepoch'"]
+    elif encoding == "unix_seconds":
+        args.append("'unixepoch'")
+    if years:
+        args.append(f"'+{int(years)} years'")
+    return f"julianday({', '.join(args)})"
+
+
+def build_expiry_expression(rule: RetentionRule, lookup_columns: List[str],
+                            profile: Optional[Dict] = None) -> Optional[Dict]:
+    """One SQL expression giving each row's expiry as a julian day number, or NULL if it never expires.
+
+    The anchor date plus ``rule.years`` calendar years (``julianday(anchor,
+    '+N years')``) is the expiry for every retention type; they differ in
+    when a row has an anchor at all:
+
+    - CREATION_BASED: the creation date column.
+    - EVENT_BASED: the event date column (termination, end, ...); rows whose
+      event has not happened yet (NULL) never expire.
+    - ACTIVE_PLUS: the date column, but only once the activity flag says
+      inactive; active rows and rows with a NULL flag never expire.
+
+    A NULL or unparseable anchor gives NULL, so unknown rows are kept.
+    """
+    date_column, flag_column, _ = retention_columns(rule, lookup_columns, profile)
+    if date_column is None:
+        return None
+    encoding = date_encoding(date_column, profile)
+    expiry = julianday_sql(date_column, encoding, rule.years)
+    params = []
+
+    if flag_column:
+        clause, params = _flag_clause(flag_column, profile)
+        expiry = f"CASE WHEN {clause} THEN {expiry} END"
+
+    return {
+        "sql": expiry,
+        "params": params,
+        "date_column": date_column,
+        "date_encoding": encoding,
+        "flag_column": flag_column,
+        "flag_text": bool(params),
+        "flag_inactive_when_set": bool(flag_column and flag_marks_inactive(flag_column)),
+        "years": int(rule.years),
+        "retention_type": rule.retention_type.value
+    }
+
+
+def build_retention_predicate(rule: RetentionRule, lookup_columns: List[str], as_of: Optional[date] = None,
+                              profile: Optional[Dict] = None) -> Optional[Dict]:
+    """WHERE clause selecting the rows a retention rule allows to be purged.
+
+    Rows qualify when the expiry from ``build_expiry_expression`` is before
+    ``as_of``, so purging, estimating and reporting agree on every row,
+    leap days included. A plain ``col < ?`` against a cutoff one day past
+    ``as_of`` minus the rule's years comes first: no row at or above it can
+    have expired, and it lets an index on the date column narrow the rows
+    the expression is evaluated on (the activity flag test is repeated for
+    the same reason). Returns None when ``retention_columns`` finds no
+    usable columns.
+    """
+    expression = build_expiry_expression(rule, lookup_columns, profile)
+    if expression is None:
+        return None
+
+    as_of = as_of or date.today()
+    cutoff = years_before(as_of, rule.years)
+    date_column, flag_column = expression["date_column"], expression["flag_column"]
+    clauses = [f"{quote_identifier(date_column)} < ?"]
+    params = [encode_cutoff(cutoff + timedelta(days=1), expression["date_encoding"])]
+    flag_clause, flag_params = _flag_clause(flag_column, profile) if flag_column else (None, [])
+    if flag_clause:
+        clauses.append(flag_clause)
+        params.extend(flag_params)
+    clauses.append(f"{expression['sql']} < julianday(?)")
+    params.extend(expression["params"] + [as_of.isoformat()])
+
+    return {
+        "sql": " AND ".join(clauses),
+        "params": params,
+        "date_column": date_column,
+        "date_encoding": expression["date_encoding"],
+        "flag_column": flag_column,
+        "flag_clause": flag_clause,
+        "flag_params": flag_params,
+        "cutoff": cutoff.isoformat()
+    }
+
+
+def predicate_for_table(retention_manager: RetentionManager, column_names: List[str], rcc_code: Optional[str],
+                        lookup_columns: Optional[List[str]], profile: Optional[Dict] = None,
+                        as_of: Optional[date] = None) -> Tuple[Optional[Dict], Optional[str]]:
+    """Retention predicate for an analyzed table, or None and the reason it cannot be built"""
+    rule = retention_manager.available_rccs.get(rcc_code) if rcc_code else None
+    if rule is None:
+        return None, "no assigned RCC"
+    # Only real columns: SQLite would read an unknown "name" as a string literal
+    known_columns = [c for c in lookup_columns or [] if c in column_names]
+    _, _, reason = retention_columns(rule, known_columns, profile)
+    if reason:
+        return None, reason
+    return build_retention_predicate(rule, known_columns, as_of=as_of, profile=profile), None
+
+
+def evaluate_expiry(conn: sqlite3.Connection, table_name: str, expression: Dict,
+                    as_of: Optional[date] = None) -> Dict:
+    """Expiry statistics of a whole table, computed by SQLite in one pass"""
+    as_of = as_of or date.today()
+    rows, dated, expired, first, last = conn.execute(f"""
+        SELECT count(*), count(expiry), coalesce(sum(expiry < julianday(?)), 0),
+               date(min(expiry)), date(max(expiry))
+        FROM (SELECT {expression['sql']} AS expiry FROM {quote_identifier(table_name)})
+    """, [as_of.isoformat()] + expression["params"]).fetchone()
+    return {
+        "rows": rows,
+        "expired_rows": expired,
+        "retained_rows": rows - expired,
+        "never_expire_rows": rows - dated,
+        "earliest_expiry": first,
+        "latest_expiry": last,
+        "as_of": as_of.isoformat()
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import tempfile
+    import time
+
+    parser = argparse.ArgumentParser(description="Benchmark SQL-side retention expiry evaluation")
+    parser.add_argument("--rows", type=int, default=10_000_000, help="Rows in each synthetic table")
+    parser.add_argument("--db", default=None, help="Where to build the synthetic database (default: temp file)")
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(), "expiry_bench.sqlite")
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("DROP TABLE IF EXISTS bench")
+    conn.execute("CREATE TABLE bench (id INTEGER PRIMARY KEY, created_at TEXT, created_ts INTEGER, "
+                 "terminated_at TEXT, is_active INTEGER, active_state TEXT)")
+    print(f"Building {args.rows} synthetic rows in {db_path}...")
+    started = time.perf_counter()
+    # Generated inside SQLite: about 3% NULL dates, 0.1% garbage text, leap days included
+    conn.execute(f"""
+        WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {int(args.rows)})
+        INSERT INTO bench
+        SELECT i,
+               CASE WHEN i % 33 = 0 THEN NULL WHEN i % 997 = 0 THEN 'not a date'
+                    ELSE date('2000-02-29', '+' || (abs(random()) % 9500) || ' days') END,
+               1000000000 + abs(random()) % 700000000,
+               CASE WHEN i % 3 = 0 THEN datetime('2010-01-01', '+' || (abs(random()) % 5000) || ' days') END,
+               CASE WHEN i % 50 = 0 THEN NULL ELSE abs(random()) % 2 END,
+               CASE abs(random()) % 4 WHEN 0 THEN 'inactive' WHEN 1 THEN 'N' WHEN 2 THEN 'active' ELSE NULL END
+        FROM n
+    """)
+    conn.commit()
+    print(f"Built in {time.perf_counter() - started:.1f}s")
+
+    manager = RetentionManager()
+    cases = [
+        ("CREATION_BASED, ISO text", manager.available_rccs["LEG120"], ["created_at"], None),
+        ("CREATION_BASED, unix seconds", manager.available_rccs["BNK460"], ["created_ts"],
+         {"columns": {"created_ts": {"kinds": {"integer": 1.0}, "distinct_estimate": args.rows,
+                                     "min": 1_000_000_000}}}),
+        ("ACTIVE_PLUS, integer flag", manager.available_rccs["LEG460"], ["created_at", "is_active"], None),
+        ("ACTIVE_PLUS, text flag", manager.available_rccs["LEG460"], ["created_at", "active_state"],
+         {"columns": {"active_state": {"kinds": {"text": 1.0}}}}),
+        ("EVENT_BASED", RetentionRule(7, RetentionType.EVENT_BASED, "7 years after termination"),
+         ["created_at", "terminated_at"], None),
+    ]
+    as_of = date.today()
+    for label, rule, columns, profile in cases:
+        expression = build_expiry_expression(rule, columns, profile)
+        started = time.perf_counter()
+        stats = evaluate_expiry(conn, "bench", expression, as_of)
+        elapsed = time.perf_counter() - started
+        predicate = build_retention_predicate(rule, columns, as_of, profile)
+        purgeable = conn.execute(f"SELECT count(*) FROM bench WHERE {predicate['sql']}",
+                                 predicate["params"]).fetchone()[0]
+        print(f"{label}: {stats['rows'] / elapsed / 1e6:.1f}M rows/s ({elapsed:.2f}s), "
+              f"{stats['expired_rows']} expired, {stats['never_expire_rows']} never expire, "
+              f"{purgeable} selected by the purge predicate")
+    conn.close()
@@ -6,6 +6,7 @@ import json
 import sqlite3
 from groq_langchain_analyzer import GroqLangChainTableAnalyzer
 from retention_manager import RetentionClassCode, RetentionManager
+from rcc_rules import RuleBasedRCCClassifier
 
 
 def mock_analyze_archival_columns_with_llm(self, table_name, schema, group):
@@ -33,16 +34,11 @@ def mock_analyze_archival_columns_with_llm(self, table_name, schema, group):
 
 
 def mock_classify_table_rcc(self, table_name, schema, content_hint=""):
-    # Naive mapping based on table name for mock
-    name = table_name.lower()
-    if "invoice" in name or "payment" in name:
-        assigned = "FIN_TRANS"
-    elif "audit" in name or "log" in name:
-        assigned = "AUDIT_LOG"
-    elif "employee" in name or "hr_" in name:
-        assigned = "HR_REC"
-    else:
-        assigned = "CUST_DATA"
+    # Best rule-based match for mock (no confidence threshold), customer data otherwise
+    scores = RuleBasedRCCClassifier().score_table(table_name, schema)
+    assigned, score = max(scores.items(), key=lambda item: item[1])
+    if score < RuleBasedRCCClassifier().name_weight:
+        assigned = "CFA340"
 
     return {
         "assigned_rcc": assigned,
@@ -51,7 +47,7 @@ def mock_classify_table_rcc(self, table_name, schema, content_hint=""):
     }
 
 
-def mock_analyze_retention_columns(self, table_name, schema, rcc_code):
+def mock_analyze_retention_columns(self, table_name, schema, rcc_code, content_hint=""):
     # Use RetentionManager hints to select plausible columns
     rm = RetentionManager()
     hints = rm.get_lookup_hints(rcc_code) or []
@@ -80,7 +76,7 @@ def mock_analyze_retention_columns(self, table_name, schema, rcc_code):
     }
 
 
-def mock_categorize_tables_with_llm(self, table_schemas):
+def mock_categorize_tables_with_llm(self, table_schemas, on_table=None, existing_groups=None):
     # Return a simple categorization: put all tables into a single group for mocking
     results = {}
     for table_name in table_schemas.keys():
@@ -92,10 +88,12 @@ def mock_categorize_tables_with_llm(self, table_schemas):
             "confidence": 9,
             "reasoning": "Mocked grouping: default single group"
         }
+        if on_table is not None:
+            on_table(table_name, results[table_name])
     return results
 
 
-def mock_determine_priorities_with_llm(self, group_name, group_tables, relationships):
+def mock_determine_priorities_with_llm(self, group_name, group_tables, relationships, on_table=None):
     result = {}
     for t in group_tables:
         result[t] = {
@@ -105,6 +103,8 @@ def mock_determine_priorities_with_llm(self, group_name, group_tables, relations
             "referenced_by": [],
             "reasoning": "Mocked priority: medium"
         }
+        if on_table is not None:
+            on_table(t, result[t])
     return result
 
 
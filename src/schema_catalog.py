@@ -0,0 +1,294 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass, asdict
+from functools import cached_property
+from typing import Dict, List, Optional, Set, Tuple
+
+
+@dataclass(frozen=True)
+class ColumnInfo:
+    """One column of a table"""
+    name: str
+    type: str
+    not_null: bool
+    default: Optional[str]
+    # 1-based position within the primary key, 0 when not part of it
+    pk_position: int = 0
+
+
+@dataclass(frozen=True)
+class ForeignKeyInfo:
+    """One FK column pair: child_table.child_column -> parent_table.parent_column"""
+    child_table: str
+    child_column: str
+    parent_table: str
+    parent_column: Optional[str]
+    # Pairs of one composite FK share an fk_id (unique within the child table)
+    fk_id: int = 0
+
+
+@dataclass(frozen=True)
+class IndexInfo:
+    """An index and the columns it covers, in index order"""
+    name: str
+    columns: Tuple[str, ...]
+    unique: bool
+    # "c" = CREATE INDEX, "u" = UNIQUE constraint, "pk" = PRIMARY KEY constraint
+    origin: str
+    partial: bool
+
+
+@dataclass(frozen=True)
+class TableInfo:
+    """Everything the analyzer, visualizer and UI need to know about one table"""
+    name: str
+    ddl: str
+    columns: Tuple[ColumnInfo, ...]
+    primary_keys: Tuple[str, ...]
+    foreign_keys: Tuple[ForeignKeyInfo, ...]
+    indexes: Tuple[IndexInfo, ...]
+    row_estimate: Optional[int]
+    # True when row_estimate is max(rowid) rather than a statistic: deletes leave gaps, so it only bounds the count
+    row_estimate_is_upper_bound: bool = False
+
+    @property
+    def column_names(self) -> List[str]:
+        return [c.name for c in self.columns]
+
+
+@dataclass(frozen=True)
+class SchemaCatalog:
+    """Immutable snapshot of a database schema, introspected in a single pass.
+
+    ``schema_hash`` identifies the schema content (identical DDL gives the
+    same hash in any file); ``source`` and ``schema_version`` identify where
+    and when the snapshot was taken.
+    """
+    source: str
+    schema_version: int
+    schema_hash: str
+    tables: Tuple[TableInfo, ...]
+
+    @property
+    def table_names(self) -> List[str]:
+        return [t.name for t in self.tables]
+
+    @cached_property
+    def _tables_by_name(self) -> Dict[str, TableInfo]:
+        # cached_property writes the instance __dict__ directly, so this works on a frozen dataclass
+        return {t.name: t for t in self.tables}
+
+    def table(self, name: str) -> Optional[TableInfo]:
+        return self._tables_by_name.get(name)
+
+    def relationships(self) -> Dict[str, Dict]:
+        """FK relationships in the analyzer's format: foreign_keys plus a referenced_by reverse index"""
+        relationships = {t.name: {"foreign_keys": [], "referenced_by": []} for t in self.tables}
+        for table in self.tables:
+            for fk in table.foreign_keys:
+                relationships[table.name]["foreign_keys"].append({
+                    "parent_table": fk.parent_table,
+                    "parent_column": fk.parent_column,
+                    "child_column": fk.child_column,
+                    "fk_id": fk.fk_id
+                })
+                # Self-references are not listed as "referenced by"
+                if fk.parent_table in relationships and fk.parent_table != table.name:
+                    relationships[fk.parent_table]["referenced_by"].append({
+                        "child_table": table.name,
+                        "child_column": fk.child_column,
+                        "parent_column": fk.parent_column,
+                        "fk_id": fk.fk_id
+                    })
+        for rel in relationships.values():
+            rel["has_foreign_keys"] = len(rel["foreign_keys"]) > 0
+            rel["is_referenced"] = len(rel["referenced_by"]) > 0
+        return relationships
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    @classmethod
+    def from_tables(cls, source: str, tables: List[TableInfo], schema_version: int = 0) -> "SchemaCatalog":
+        """Build a catalog from already introspected tables, computing the schema hash"""
+        return cls(source=source, schema_version=schema_version,
+                   schema_hash=schema_hash({t.name: t.ddl for t in tables}), tables=tuple(tables))
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SchemaCatalog":
+        tables = tuple(
+            TableInfo(
+                name=t["name"],
+                ddl=t["ddl"],
+                columns=tuple(ColumnInfo(**c) for c in t["columns"]),
+                primary_keys=tuple(t["primary_keys"]),
+                foreign_keys=tuple(ForeignKeyInfo(**fk) for fk in t["foreign_keys"]),
+                indexes=tuple(IndexInfo(**{**ix, "columns": tuple(ix["columns"])}) for ix in t["indexes"]),
+                row_estimate=t["row_estimate"],
+                row_estimate_is_upper_bound=t.get("row_estimate_is_upper_bound", False)
+            )
+            for t in data["tables"]
+        )
+        return cls(source=data["source"], schema_version=data["schema_version"],
+                   schema_hash=data["schema_hash"], tables=tables)
+
+    def save(self, path: str) -> None:
+        """Write the catalog to a JSON file"""
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path: str) -> "SchemaCatalog":
+        """Read a catalog written by save()"""
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def schema_hash(ddl_by_table: Dict[str, str]) -> str:
+    """Content hash of a schema: identical table definitions give the same hash in any database"""
+    return hashlib.sha256(
+        json.dumps(sorted((name, ddl or "") for name, ddl in ddl_by_table.items())).encode("utf-8")
+    ).hexdigest()[:16]
+
+
+def _row_estimates(conn: sqlite3.Connection, tables: List[str]) -> Tuple[Dict[str, Optional[int]], Set[str]]:
+    """Row counts from sqlite_stat1 when ANALYZE has run, else max(rowid) (one index seek per table).
+
+    Also returns the tables whose estimate is max(rowid), which is only an
+    upper bound on the row count.
+    """
+    estimates = {}
+    upper_bounds = set()
+    has_stat1 = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='sqlite_stat1'"
+    ).fetchone()
+    if has_stat1:
+        for tbl, stat in conn.execute("SELECT tbl, stat FROM sqlite_stat1"):
+            try:
+                count = int(str(stat).split()[0])
+            except (ValueError, IndexError):
+                continue
+            estimates[tbl] = max(estimates.get(tbl, 0), count)
+
+    for table_name in tables:
+        if table_name in estimates:
+            continue
+        try:
+            row = conn.execute(f'SELECT max(rowid) FROM "{table_name}"').fetchone()
+            estimates[table_name] = int(row[0] or 0)
+            upper_bounds.add(table_name)
+        except sqlite3.Error:
+            # WITHOUT ROWID tables have no cheap estimate
+            estimates[table_name] = None
+    return estimates, upper_bounds
+
+
+def introspect_sqlite(conn: sqlite3.Connection, source: str = "") -> SchemaCatalog:
+    """Build a SchemaCatalog from an open SQLite connection with a handful of bulk queries"""
+    table_rows = conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY rowid"
+    ).fetchall()
+    tables = [name for name, _ in table_rows]
+    schema_version = conn.execute("PRAGMA schema_version").fetchone()[0]
+
+    columns = {name: [] for name in tables}
+    for table_name, cid, col_name, col_type, not_null, default, pk in conn.execute("""
+        SELECT m.name, c.cid, c.name, c.type, c."notnull", c.dflt_value, c.pk
+        FROM sqlite_master AS m
+        JOIN pragma_table_info(m.name) AS c
+        WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%'
+        ORDER BY m.rowid, c.cid
+    """):
+        columns[table_name].append(ColumnInfo(col_name, col_type or "", bool(not_null), default, pk))
+
+    foreign_keys = {name: [] for name in tables}
+    for child_table, parent_table, child_column, parent_column, fk_id in conn.execute("""
+        SELECT m.name, fk."table", fk."from", fk."to", fk.id
+        FROM sqlite_master AS m
+        JOIN pragma_foreign_key_list(m.name) AS fk
+        WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%'
+        ORDER BY m.rowid, fk.id, fk.seq
+    """):
+        foreign_keys[child_table].append(ForeignKeyInfo(child_table, child_column, parent_table, parent_column, fk_id))
+
+    index_columns = {}
+    index_meta = {}
+    for table_name, index_name, unique, origin, partial, seqno, col_name in conn.execute("""
+        SELECT m.name, il.name, il."unique", il.origin, il.partial, ii.seqno, ii.name
+        FROM sqlite_master AS m
+        JOIN pragma_index_list(m.name) AS il
+        JOIN pragma_index_info(il.name) AS ii
+        WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%'
+        ORDER BY m.rowid, il.seq, ii.seqno
+    """):
+        key = (table_name, index_name)
+        index_meta[key] = (bool(unique), origin, bool(partial))
+        index_columns.setdefault(key, []).append(col_name)
+
+    indexes = {name: [] for name in tables}
+    for (table_name, index_name), cols in index_columns.items():
+        unique, origin, partial = index_meta[(table_name, index_name)]
+        indexes[table_name].append(IndexInfo(index_name, tuple(cols), unique, origin, partial))
+
+    row_estimates, upper_bounds = _row_estimates(conn, tables)
+    ddl = dict(table_rows)
+
+    table_infos = [
+        TableInfo(
+            name=name,
+            ddl=ddl[name] or "",
+            columns=tuple(columns[name]),
+            primary_keys=tuple(c.name for c in sorted(columns[name], key=lambda c: c.pk_position) if c.pk_position),
+            foreign_keys=tuple(foreign_keys[name]),
+            indexes=tuple(indexes[name]),
+            row_estimate=row_estimates.get(name),
+            row_estimate_is_upper_bound=name in upper_bounds
+        )
+        for name in tables
+    ]
+    return SchemaCatalog.from_tables(source, table_infos, schema_version)
+
+
+_catalog_cache: Dict[Tuple, SchemaCatalog] = {}
+_catalog_lock = threading.Lock()
+
+
+def _file_version(path: str) -> Tuple:
+    """Identity and modification stamp of a database file and its WAL, if any"""
+    stat = os.stat(path)
+    try:
+        wal = os.stat(path + "-wal")
+        wal_stamp = (wal.st_mtime_ns, wal.st_size)
+    except OSError:
+        wal_stamp = None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size, wal_stamp
+
+
+def load_schema_catalog(db_path: str, refresh: bool = False) -> SchemaCatalog:
+    """Load the catalog of a SQLite file, reusing the cached one while the file is unmodified.
+
+    The cache is keyed on the file's (and its WAL's) modification stamp
+    rather than on schema_version alone, so row estimates refresh after
+    data changes too.
+    """
+    real_path = os.path.realpath(db_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        schema_version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        key = (real_path, _file_version(real_path), schema_version)
+        with _catalog_lock:
+            cached = _catalog_cache.get(key)
+        if cached is not None and not refresh:
+            return cached
+        catalog = introspect_sqlite(conn, source=db_path)
+    finally:
+        conn.close()
+
+    with _catalog_lock:
+        for stale in [k for k in _catalog_cache if k[0] == real_path]:
+            del _catalog_cache[stale]
+        _catalog_cache[key] = catalog
+    return catalog
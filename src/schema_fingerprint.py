@@ -0,0 +1,73 @@
+import hashlib
+import json
+import re
+from typing import Dict, Iterable, Set
+
+
+def normalize_ddl(ddl: str) -> str:
+    """Normalize a CREATE statement so formatting-only edits do not change its fingerprint"""
+    if not ddl:
+        return ""
+    normalized = re.sub(r"\s+", " ", ddl.strip().rstrip(";")).lower()
+    # Drop whitespace around punctuation: "( id integer , name text )" == "(id integer,name text)"
+    return re.sub(r"\s*([(),])\s*", r"\1", normalized)
+
+
+def compute_table_fingerprints(table_ddl: Dict[str, str], relationships: Dict[str, Dict],
+                               catalog_version: str) -> Dict[str, str]:
+    """Fingerprint each table from its normalized DDL, its FK edges and the RCC catalog version.
+
+    Both outgoing (foreign_keys) and incoming (referenced_by) edges are hashed,
+    so adding a child table that references this one changes its fingerprint.
+    """
+    fingerprints = {}
+    for table_name, ddl in table_ddl.items():
+        rel = relationships.get(table_name, {})
+        payload = {
+            "ddl": normalize_ddl(ddl),
+            "foreign_keys": sorted(
+                [fk["parent_table"], fk["parent_column"], fk["child_column"]]
+                for fk in rel.get("foreign_keys", [])
+            ),
+            "referenced_by": sorted(
+                [ref["child_table"], ref["child_column"], ref["parent_column"]]
+                for ref in rel.get("referenced_by", [])
+            ),
+            "rcc_catalog": catalog_version
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        fingerprints[table_name] = hashlib.sha256(encoded).hexdigest()[:16]
+    return fingerprints
+
+
+def fk_neighbors(table_name: str, relationships: Dict[str, Dict]) -> Set[str]:
+    """Tables directly linked to table_name by a foreign key in either direction"""
+    rel = relationships.get(table_name, {})
+    neighbors = {fk["parent_table"] for fk in rel.get("foreign_keys", [])}
+    neighbors.update(ref["child_table"] for ref in rel.get("referenced_by", []))
+    neighbors.discard(table_name)
+    return neighbors
+
+
+def tables_needing_analysis(current: Dict[str, str], previous: Dict[str, str],
+                            relationships: Dict[str, Dict], force: Iterable[str] = ()) -> Set[str]:
+    """Return the tables whose fingerprint changed, plus their direct FK neighbors.
+
+    New tables count as changed. Tables that disappeared since the previous
+    run mark their surviving neighbors dirty as well. ``force`` adds tables
+    that must be re-run regardless (e.g. ones whose previous analysis failed).
+    """
+    changed = {name for name, fp in current.items() if previous.get(name) != fp}
+    removed = set(previous) - set(current)
+    changed.update(name for name in force if name in current)
+
+    dirty = set(changed)
+    for name in changed:
+        dirty.update(fk_neighbors(name, relationships))
+    for name, rel in relationships.items():
+        linked = {fk["parent_table"] for fk in rel.get("foreign_keys", [])}
+        linked.update(ref["child_table"] for ref in rel.get("referenced_by", []))
+        if linked & removed:
+            dirty.add(name)
+
+    return {name for name in dirty if name in current}
@@ -0,0 +1,251 @@
+from typing import Callable, Dict, List, Set, Tuple
+
+
+def build_fk_adjacency(tables: List[str], relationships: Dict[str, Dict]) -> Dict[str, Set[str]]:
+    """Undirected FK adjacency restricted to the given tables (self-references dropped)"""
+    table_set = set(tables)
+    adjacency = {name: set() for name in tables}
+    for name in tables:
+        for fk in relationships.get(name, {}).get("foreign_keys", []):
+            parent = fk["parent_table"]
+            if parent in table_set and parent != name:
+                adjacency[name].add(parent)
+                adjacency[parent].add(name)
+    return adjacency
+
+
+def connected_components(tables: List[str], adjacency: Dict[str, Set[str]]) -> List[List[str]]:
+    """FK-connected components, each listed in the order its tables appear in ``tables``"""
+    order = {name: i for i, name in enumerate(tables)}
+    seen = set()
+    components = []
+    for start in tables:
+        if start in seen:
+            continue
+        seen.add(start)
+        stack = [start]
+        component = []
+        while stack:
+            node = stack.pop()
+            component.append(node)
+            for neighbor in adjacency.get(node, ()):
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    stack.append(neighbor)
+        components.append(sorted(component, key=order.get))
+    return components
+
+
+def split_component(component: List[str], adjacency: Dict[str, Set[str]], cost: Callable[[str], int],
+                    budget: int) -> Tuple[List[List[str]], List[Tuple[str, str]]]:
+    """Split an over-budget component along its weakest FK edges.
+
+    An edge is weaker the more other tables its endpoints are linked to:
+    edges into hub tables (e.g. a customers table referenced by everything)
+    carry the least grouping signal, so they are cut first. Edges are removed
+    until every piece fits the budget or is a single table. Returns the
+    pieces and the edges that were cut.
+    """
+    if sum(cost(name) for name in component) <= budget or len(component) == 1:
+        return [component], []
+
+    members = set(component)
+    local = {name: adjacency.get(name, set()) & members for name in component}
+    order = {name: i for i, name in enumerate(component)}
+    edges = sorted(
+        {tuple(sorted((a, b), key=order.get)) for a in component for b in local[a]},
+        key=lambda e: (-max(len(local[e[0]]), len(local[e[1]])), -(len(local[e[0]]) + len(local[e[1]])),
+                       order[e[0]], order[e[1]])
+    )
+
+    cut = []
+    pieces = [component]
+    for a, b in edges:
+        local[a].discard(b)
+        local[b].discard(a)
+        cut.append((a, b))
+        pieces = connected_components(component, local)
+        if len(pieces) > 1:
+            break
+
+    result = []
+    for piece in pieces:
+        sub_pieces, sub_cut = split_component(piece, local, cost, budget)
+        result.extend(sub_pieces)
+        cut.extend(sub_cut)
+
+    # Edges removed on the way to a split that still join tables of the same piece were not really cut
+    piece_of = {name: i for i, piece in enumerate(result) for name in piece}
+    cut = [(a, b) for a, b in cut if piece_of[a] != piece_of[b]]
+    return result, cut
+
+
+def pack_partitions(components: List[List[str]], cost: Callable[[str], int], budget: int) -> List[List[str]]:
+    """Pack components into as few partitions as possible without exceeding the budget.
+
+    First-fit decreasing; ties keep the original component order so the
+    result is deterministic. A component larger than the budget gets a
+    partition of its own.
+    """
+    sized = sorted(enumerate(components), key=lambda item: (-sum(cost(n) for n in item[1]), item[0]))
+    partitions = []
+    loads = []
+    for _, component in sized:
+        size = sum(cost(name) for name in component)
+        for i, load in enumerate(loads):
+            if load + size <= budget:
+                partitions[i].extend(component)
+                loads[i] += size
+                break
+        else:
+            partitions.append(list(component))
+            loads.append(size)
+    return partitions
+
+
+def strongly_connected_components(tables: List[str], relationships: Dict[str, Dict]) -> List[List[str]]:
+    """Strongly connected components of the child -> parent FK graph (iterative Tarjan).
+
+    Components come out in reverse topological order of the condensation:
+    a component is emitted only after every component it references.
+    """
+    table_set = set(tables)
+    successors = {
+        name: sorted({fk["parent_table"] for fk in relationships.get(name, {}).get("foreign_keys", [])
+                      if fk["parent_table"] in table_set})
+        for name in tables
+    }
+
+    index = {}
+    lowlink = {}
+    on_stack = set()
+    stack = []
+    components = []
+    counter = 0
+
+    for root in tables:
+        if root in index:
+            continue
+        work = [(root, iter(successors[root]))]
+        index[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, children = work[-1]
+            advanced = False
+            for child in children:
+                if child not in index:
+                    index[child] = lowlink[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(successors[child])))
+                    advanced = True
+                    break
+                if child in on_stack:
+                    lowlink[node] = min(lowlink[node], index[child])
+            if advanced:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+            if lowlink[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+    return components
+
+
+def compute_purge_ranks(tables: List[str], relationships: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Multi-level purge ranks for a set of tables from their FK graph.
+
+    Rank 1 tables are referenced by no other table in the set and can be
+    purged first; every other table gets one more than the highest rank of
+    the tables referencing it, so children always precede their parents
+    however deep the hierarchy. Cycles and self-references are collapsed into
+    one strongly connected component whose members share a rank.
+    """
+    table_set = set(tables)
+    components = strongly_connected_components(tables, relationships)
+    component_of = {name: i for i, component in enumerate(components) for name in component}
+
+    self_referencing = {
+        name for name in tables
+        if any(fk["parent_table"] == name for fk in relationships.get(name, {}).get("foreign_keys", []))
+    }
+
+    # Parents come before their children in `components`; walk backwards so every
+    # child component is ranked before the parents it references.
+    component_rank = {}
+    referrers = {i: set() for i in range(len(components))}
+    for name in tables:
+        for fk in relationships.get(name, {}).get("foreign_keys", []):
+            parent = fk["parent_table"]
+            if parent in table_set and component_of[parent] != component_of[name]:
+                referrers[component_of[parent]].add(component_of[name])
+
+    for i in reversed(range(len(components))):
+        component_rank[i] = 1 + max((component_rank[c] for c in referrers[i]), default=0)
+
+    ranks = {}
+    for name in tables:
+        component = components[component_of[name]]
+        ranks[name] = {
+            "purge_rank": component_rank[component_of[name]],
+            "cycle_members": sorted(component) if len(component) > 1 or name in self_referencing else []
+        }
+    return ranks
+
+
+def find_cross_group_edges(table_groups: Dict[str, str], relationships: Dict[str, Dict]) -> List[Dict]:
+    """FK edges whose child and parent tables were placed in different groups"""
+    edges = []
+    for child, group in table_groups.items():
+        for fk in relationships.get(child, {}).get("foreign_keys", []):
+            parent = fk["parent_table"]
+            parent_group = table_groups.get(parent)
+            if parent_group is not None and parent_group != group:
+                edges.append({
+                    "child_table": child,
+                    "child_group": group,
+                    "child_column": fk["child_column"],
+                    "parent_table": parent,
+                    "parent_group": parent_group,
+                    "parent_column": fk["parent_column"]
+                })
+    return edges
+
+
+def merge_fk_linked_groups(table_groups: Dict[str, str], relationships: Dict[str, Dict],
+                           keep: Set[str] = frozenset()) -> Dict[str, str]:
+    """Group renames that put every FK-linked pair of tables into one group.
+
+    Groups joined by a cross-group edge (directly or through other groups)
+    merge into one survivor: a group in ``keep`` if any (e.g. groups of
+    carried-over tables, so their names stay stable), else the group with
+    the most tables, ties broken by name. Returns ``{old_group: survivor}``
+    for the groups that disappear.
+    """
+    groups = sorted(set(table_groups.values()))
+    adjacency = {group: set() for group in groups}
+    for edge in find_cross_group_edges(table_groups, relationships):
+        adjacency[edge["child_group"]].add(edge["parent_group"])
+        adjacency[edge["parent_group"]].add(edge["child_group"])
+
+    sizes = {}
+    for group in table_groups.values():
+        sizes[group] = sizes.get(group, 0) + 1
+    renames = {}
+    for component in connected_components(groups, adjacency):
+        if len(component) < 2:
+            continue
+        survivor = min(component, key=lambda g: (g not in keep, -sizes[g], g))
+        renames.update({group: survivor for group in component if group != survivor})
+    return renames
@@ -0,0 +1,120 @@
+import json
+from typing import Any, List, Sequence, Tuple
+
+
+class IncrementalJSONEntryParser:
+    """Emit the entries of one nested JSON object while the document is still arriving.
+
+    ``path`` names the object whose entries are wanted, e.g. ``("analysis",)``
+    for ``{"groups": {...}, "analysis": {"orders": {...}, ...}}``. Feed the
+    text chunk by chunk; every call returns the ``(key, value)`` pairs of that
+    object that became complete with the chunk. Text before the first ``{``
+    (such as a Markdown code fence) is ignored.
+    """
+
+    def __init__(self, path: Sequence[str]):
+        self.path = list(path)
+        self.buffer = ""
+        self._pos = 0
+        self._started = False
+        self._done = False
+        # Stack frames: [container_char, key_in_parent, pending_key, value_start, value_is_container]
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string = None
+
+    def _frame_path(self, depth: int) -> List[Any]:
+        return [frame[1] for frame in self._stack[1:depth + 1]]
+
+    def _in_target(self) -> bool:
+        return (bool(self._stack) and self._stack[-1][0] == "{"
+                and self._frame_path(len(self._stack) - 1) == self.path)
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Consume the next chunk of text and return newly completed entries"""
+        self.buffer += chunk
+        entries = []
+        text = self.buffer
+
+        while self._pos < len(text) and not self._done:
+            i = self._pos
+            ch = text[i]
+            self._pos += 1
+
+            if not self._started:
+                if ch == "{":
+                    self._started = True
+                    self._stack.append(["{", None, None, None, False])
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    try:
+                        self._last_string = json.loads(text[self._string_start:i + 1])
+                    except json.JSONDecodeError:
+                        self._last_string = text[self._string_start + 1:i]
+                continue
+
+            frame = self._stack[-1]
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+                if frame[0] == "{" and frame[2] is not None and frame[3] is None:
+                    frame[3] = i
+            elif ch == ":" and frame[0] == "{":
+                frame[2] = self._last_string
+                frame[3] = None
+                frame[4] = False
+            elif ch in "{[":
+                key = frame[2] if frame[0] == "{" else None
+                if frame[0] == "{" and frame[3] is None:
+                    frame[3] = i
+                    frame[4] = True
+                self._stack.append([ch, key, None, None, False])
+            elif ch in "}]":
+                closing_target = self._in_target()
+                if closing_target:
+                    entries.extend(self._emit_primitive(frame, i))
+                self._stack.pop()
+                if not self._stack:
+                    self._done = True
+                    break
+                parent = self._stack[-1]
+                if self._in_target() and parent[4] and parent[3] is not None:
+                    entries.append(self._decode(parent[2], text[parent[3]:i + 1]))
+                    parent[2] = None
+                    parent[3] = None
+                    parent[4] = False
+            elif ch == "," and frame[0] == "{":
+                if self._in_target():
+                    entries.extend(self._emit_primitive(frame, i))
+                frame[2] = None
+                frame[3] = None
+                frame[4] = False
+            elif not ch.isspace() and frame[0] == "{" and frame[2] is not None and frame[3] is None:
+                # Start of a number / true / false / null value
+                frame[3] = i
+
+        return [entry for entry in entries if entry is not None]
+
+    def _emit_primitive(self, frame, end: int):
+        if frame[2] is None or frame[3] is None or frame[4]:
+            return []
+        entry = self._decode(frame[2], self.buffer[frame[3]:end].strip())
+        frame[2] = None
+        frame[3] = None
+        return [entry]
+
+    @staticmethod
+    def _decode(key, raw: str):
+        try:
+            return key, json.loads(raw)
+        except json.JSONDecodeError:
+            return None
@@ -6,7 +6,6 @@ from dotenv import load_dotenv
 
 # Local import
 from groq_langchain_analyzer import GroqLangChainTableAnalyzer
-import sqlite3
 
 load_dotenv()
 
@@ -41,6 +40,11 @@ with st.sidebar:
 	else:
 		api_key = "mock"  # Placeholder value when in mock mode
 		st.info("Running in mock mode - using sample data without LLM calls")
+
+	max_concurrency = st.number_input("Concurrent LLM requests", min_value=1, max_value=32, value=4,
+									  help="Maximum number of tables analyzed in parallel")
+	use_cache = st.checkbox("Cache LLM responses", value=True,
+							help="Reuse earlier answers for unchanged tables (stored in llm_cache.sqlite)")
 	
 	st.write("")
 	run_btn = st.button("Run Analysis", type="primary")
@@ -61,7 +65,8 @@ if run_btn:
 	with st.status("Running analysis...", expanded=True) as status:
 		try:
 			st.write("Initializing analyzer" + (" (Mock Mode)" if mock_mode else ""))
-			analyzer = GroqLangChainTableAnalyzer(db_path, mock_mode=mock_mode)
+			analyzer = GroqLangChainTableAnalyzer(db_path, mock_mode=mock_mode, max_concurrency=int(max_concurrency),
+												  cache_path="llm_cache.sqlite" if use_cache else None)
 
 			st.write("Creating comprehensive report")
 			report = analyzer.create_comprehensive_report()
@@ -85,75 +90,48 @@ if run_btn:
 	edges = []
 	nodes = set()
 	node_labels = {}
-	# We'll fetch actual table columns from the SQLite file to ensure accurate column lists
-	conn = None
-	try:
-		conn = sqlite3.connect(db_path)
-		cursor = conn.cursor()
-
-		for table_name, info in table_analysis.items():
-			rel = info.get("relationship_info", {}) or {}
-			col_lines = []
-			try:
-				cursor.execute(f"PRAGMA table_info({table_name})")
-				cols = cursor.fetchall()  # cid, name, type, notnull, dflt_value, pk
-			except Exception:
-				cols = []
-
-			pk_set = set()
-			fk_set = set()
-			# Collect pk columns from PRAGMA
+	# Column lists come from the same schema catalog the analyzer used
+	catalog = analyzer.catalog
+
+	for table_name, info in table_analysis.items():
+		rel = info.get("relationship_info", {}) or {}
+		col_lines = []
+		table = catalog.table(table_name)
+		cols = list(table.columns) if table else []
+
+		pk_set = set(table.primary_keys) if table else set()
+		fk_set = set()
+
+		# Collect foreign key child columns from relationship info
+		for fk in rel.get("foreign_keys", []):
+			child_col = fk.get("child_column")
+			if child_col:
+				fk_set.add(child_col)
+
+		# Only show primary keys and foreign keys per user's request
+		if cols:
 			for c in cols:
-				if len(c) >= 6 and c[5]:
-					pk_set.add(c[1])
-
-			# Collect foreign key child columns from relationship info
-			for fk in rel.get("foreign_keys", []):
-				child_col = fk.get("child_column")
-				if child_col:
-					fk_set.add(child_col)
-
-			# Only show primary keys and foreign keys per user's request
-			if cols:
-				for c in cols:
-					col_name = c[1]
-					if col_name in pk_set:
-						col_lines.append(f'<FONT COLOR="green"><B>{col_name}</B></FONT>')
-					elif col_name in fk_set:
-						col_lines.append(f'<FONT COLOR="blue"><I>{col_name}</I></FONT>')
-				if not col_lines:
-					col_lines.append('<I><FONT COLOR="gray">(no keys)</FONT></I>')
-			else:
-				# Fallback: use analyzer-provided primary_keys and relationship info
-				pk_list = set(info.get("primary_keys", []) or [])
-				fk_list = set(fk.get("child_column") for fk in rel.get("foreign_keys", []) if fk.get("child_column"))
-				for name in sorted(pk_list):
-					col_lines.append(f'<FONT COLOR="green"><B>{name}</B></FONT>')
-				for name in sorted(fk_list - pk_list):
-					col_lines.append(f'<FONT COLOR="blue"><I>{name}</I></FONT>')
-				if not col_lines:
-					col_lines.append('<I><FONT COLOR="gray">(no keys)</FONT></I>')
-
-			label = '<' + f'<B>{table_name}</B><BR/>' + '<BR/>'.join(col_lines) + '>'
-			node_labels[table_name] = label
-			# Build edges and nodes
-			for fk in rel.get("foreign_keys", []):
-				parent = fk.get("parent_table")
-				child = table_name
-				if parent and child:
-					edges.append((child, parent))
-					nodes.add(child)
-					nodes.add(parent)
-			for ref in rel.get("referenced_by", []):
-				child = ref.get("child_table")
-				parent = table_name
-				if parent and child:
-					nodes.add(child)
-					nodes.add(parent)
-
-	finally:
-		if conn:
-			conn.close()
+				col_name = c.name
+				if col_name in pk_set:
+					col_lines.append(f'<FONT COLOR="green"><B>{col_name}</B></FONT>')
+				elif col_name in fk_set:
+					col_lines.append(f'<FONT COLOR="blue"><I>{col_name}</I></FONT>')
+			if not col_lines:
+				col_lines.append('<I><FONT COLOR="gray">(no keys)</FONT></I>')
+		else:
+			# Fallback: use analyzer-provided primary_keys and relationship info
+			pk_list = set(info.get("primary_keys", []) or [])
+			fk_list = set(fk.get("child_column") for fk in rel.get("foreign_keys", []) if fk.get("child_column"))
+			for name in sorted(pk_list):
+				col_lines.append(f'<FONT COLOR="green"><B>{name}</B></FONT>')
+			for name in sorted(fk_list - pk_list):
+				col_lines.append(f'<FONT COLOR="blue"><I>{name}</I></FONT>')
+			if not col_lines:
+				col_lines.append('<I><FONT COLOR="gray">(no keys)</FONT></I>')
+
+		label = '<' + f'<B>{table_name}</B><BR/>' + '<BR/>'.join(col_lines) + '>'
+		node_labels[table_name] = label
+		# Build edges and nodes
 		for fk in rel.get("foreign_keys", []):
 			parent = fk.get("parent_table")
 			child = table_name
@@ -184,11 +162,14 @@ if run_btn:
 	st.divider()
 
 	# Metrics
-	col1, col2 = st.columns(2)
+	col1, col2, col3 = st.columns(3)
 	with col1:
 		st.metric("Total Tables", report.get("total_tables", 0))
 	with col2:
 		st.metric("Total Groups", report.get("total_groups", 0))
+	with col3:
+		cache_stats = report.get("llm_cache_stats") or {}
+		st.metric("LLM Cache Hits", f"{cache_stats.get('hits', 0)} / {cache_stats.get('hits', 0) + cache_stats.get('misses', 0)}")
 
 	# Grouped by priority (with nested table expanders + relationships)
 	st.subheader("Grouped by Priority")
@@ -197,7 +178,7 @@ if run_btn:
 		with st.expander(f"Group: {group_name} ({len(tables)} tables)", expanded=False):
 			for t in tables:
 				priority = t.get("intra_group_priority", 2)
-				priority_desc = {1: "HIGH", 2: "MEDIUM", 3: "LOW"}.get(priority, "?")
+				priority_desc = {1: "HIGH", 2: "MEDIUM"}.get(priority, "LOW")
 				with st.expander(f"{t['table_name']} - Priority {priority} ({priority_desc})", expanded=False):
 					if t.get("priority_reasoning"):
 						with st.expander("Priority reasoning"):
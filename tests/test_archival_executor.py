@@ -0,0 +1,159 @@
+import sqlite3
+from datetime import date
+
+import pytest
+
+from archival_executor import ArchivalExecutor
+
+
+def report_for(*tables):
+    return {
+        "grouped_by_priority": {"g": [
+            {"table_name": name, "intra_group_priority": 1, "purge_order": i,
+             "rcc_classification": {"assigned_rcc": "ADM150"},
+             "retention_analysis": {"retention_lookup_columns": ["created_at"]}}
+            for i, name in enumerate(tables)
+        ]},
+        "table_analysis": {}
+    }
+
+
+@pytest.fixture
+def live(tmp_path):
+    db_path = str(tmp_path / "live.sqlite")
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.executescript("""
+        CREATE TABLE customers (id INTEGER PRIMARY KEY, created_at TEXT);
+        CREATE TABLE orders (id INTEGER PRIMARY KEY, customer_id INTEGER REFERENCES customers(id), created_at TEXT);
+        CREATE INDEX idx_orders_customer ON orders(customer_id);
+    """)
+    conn.executemany("INSERT INTO customers VALUES (?, ?)", [(i, "2010-01-01") for i in range(1, 101)])
+    # Only even customers still have orders, and those orders are recent
+    conn.executemany("INSERT INTO orders (customer_id, created_at) VALUES (?, '2024-01-01')",
+                     [(i,) for i in range(2, 101, 2)])
+    conn.commit()
+    conn.close()
+    return db_path, str(tmp_path / "archive.sqlite")
+
+
+def count(db_path, sql):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(sql).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_referenced_rows_stay_without_cascade(live):
+    db_path, archive_path = live
+
+    result = ArchivalExecutor(db_path, archive_path, chunk_size=7, as_of=date(2021, 6, 1)).run(
+        report_for("customers"))
+
+    assert result["tables"]["customers"]["rows_archived"] == 50
+    assert count(db_path, "SELECT count(*) FROM customers WHERE id % 2 = 1") == 0
+    assert count(db_path, "SELECT count(*) FROM customers WHERE id % 2 = 0") == 50
+    assert count(archive_path, "SELECT count(*) FROM customers") == 50
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+    conn.close()
+
+
+def test_crash_between_copy_and_delete_loses_nothing(live, monkeypatch):
+    db_path, archive_path = live
+    executor = ArchivalExecutor(db_path, archive_path, chunk_size=10, chunks_per_transaction=2,
+                                as_of=date(2021, 6, 1), journal_path=db_path + ".journal", job_id="nightly")
+    delete_chunk = executor._delete_chunk
+    calls = []
+
+    def crash_on_second_batch(*args):
+        calls.append(args)
+        if len(calls) == 3:
+            raise KeyboardInterrupt
+        return delete_chunk(*args)
+
+    monkeypatch.setattr(executor, "_delete_chunk", crash_on_second_batch)
+    with pytest.raises(KeyboardInterrupt):
+        executor.run(report_for("customers"))
+    # The second batch is archived but still live: in both databases, never in neither
+    live_ids = count(db_path, "SELECT count(*) FROM customers")
+    archived = count(archive_path, "SELECT count(*) FROM customers")
+    assert live_ids + archived > 100
+    assert count(db_path, "SELECT count(*) FROM customers WHERE id % 2 = 1") == 50 - 10
+
+    monkeypatch.undo()
+    result = ArchivalExecutor(db_path, archive_path, as_of=date(2021, 6, 1),
+                              journal_path=db_path + ".journal", job_id="nightly").run()
+    assert result["tables"]["customers"]["status"] == "done"
+    assert count(db_path, "SELECT count(*) FROM customers") == 50
+    assert count(archive_path, "SELECT count(*) FROM customers") == 50
+
+
+def test_rows_changed_between_copy_and_delete_stay_live(live, monkeypatch):
+    db_path, archive_path = live
+    executor = ArchivalExecutor(db_path, archive_path, chunk_size=100, as_of=date(2021, 6, 1))
+    transaction = executor._transaction
+    opened = []
+
+    def touch_before_delete():
+        opened.append(True)
+        if len(opened) == 2:
+            # Another writer makes customer 1 recent after it was copied
+            writer = sqlite3.connect(db_path)
+            writer.execute("UPDATE customers SET created_at = '2024-01-01' WHERE id = 1")
+            writer.commit()
+            writer.close()
+        return transaction()
+
+    monkeypatch.setattr(executor, "_transaction", touch_before_delete)
+    result = executor.run(report_for("customers"))
+
+    assert result["tables"]["customers"]["rows_archived"] == 49
+    assert result["tables"]["customers"]["rows_left_live"] == 1
+    assert count(db_path, "SELECT created_at FROM customers WHERE id = 1") == "2024-01-01"
+
+
+def test_finished_job_is_not_resumed_by_the_next_run(live):
+    db_path, archive_path = live
+    journal_path = db_path + ".journal"
+    first = ArchivalExecutor(db_path, archive_path, as_of=date(2021, 6, 1), journal_path=journal_path,
+                             job_id="nightly").run(report_for("customers"))
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO customers VALUES (?, '2010-01-01')", [(i,) for i in range(101, 111)])
+    conn.commit()
+    conn.close()
+
+    second = ArchivalExecutor(db_path, archive_path, as_of=date(2021, 6, 1), journal_path=journal_path,
+                              job_id="nightly").run(report_for("customers"))
+
+    assert first["total_rows_archived"] == 50
+    assert second["total_rows_archived"] == 10
+    assert second["job_id"].startswith("nightly@")
+
+
+def test_reused_keys_are_archived_next_to_earlier_rows(live):
+    db_path, archive_path = live
+    ArchivalExecutor(db_path, archive_path, as_of=date(2021, 6, 1)).run(report_for("customers"))
+    conn = sqlite3.connect(db_path)
+    # Without AUTOINCREMENT a purged rowid can be handed out again
+    conn.execute("INSERT INTO customers VALUES (1, '2011-01-01')")
+    conn.commit()
+    conn.close()
+
+    result = ArchivalExecutor(db_path, archive_path, as_of=date(2021, 6, 1)).run(report_for("customers"))
+
+    assert result["total_rows_archived"] == 1
+    conn = sqlite3.connect(archive_path)
+    rows = conn.execute("SELECT created_at, _archive_job FROM customers WHERE _source_key = 1 "
+                        "ORDER BY _archive_id").fetchall()
+    conn.close()
+    assert [created_at for created_at, _ in rows] == ["2010-01-01", "2011-01-01"]
+    assert rows[0][1] != rows[1][1]
+
+
+def test_run_without_report_or_journal_is_rejected(live):
+    db_path, archive_path = live
+
+    with pytest.raises(ValueError, match="report required without a journal job"):
+        ArchivalExecutor(db_path, archive_path).run(None)
@@ -0,0 +1,45 @@
+import sqlite3
+
+from column_profiler import ColumnProfiler, format_profile_hint
+from schema_catalog import introspect_sqlite
+
+
+def add_rows(conn, first, last):
+    conn.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?)", [
+        (i, f"20{10 + i % 12}-0{1 + i % 9}-1{i % 10}", 1_500_000_000 + i * 3_600, i % 2,
+         None if i % 3 else f"note {i}")
+        for i in range(first, last)
+    ])
+
+
+def hint(conn):
+    table = introspect_sqlite(conn).table("events")
+    return format_profile_hint(ColumnProfiler().profile_table(conn, table))
+
+
+def test_hint_survives_ordinary_growth():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, created_at TEXT, logged_ts INTEGER, "
+                 "is_active INTEGER, note TEXT)")
+    add_rows(conn, 1, 20_000)
+    before = hint(conn)
+
+    add_rows(conn, 20_000, 30_000)
+    conn.execute("UPDATE events SET note = NULL WHERE id % 7 = 0")
+
+    assert hint(conn) == before
+    assert before.splitlines() == [
+        "Column profile (10k+ rows):",
+        "- created_at: date",
+        "- logged_ts: integer, dates as unix seconds",
+        "- id: integer",
+        "- is_active: integer, at most 2 values",
+        "- note: text, mostly null",
+    ]
+
+
+def test_hint_of_empty_table():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, created_at TEXT)")
+
+    assert hint(conn).splitlines()[1:] == ["- id: empty", "- created_at: empty"]
@@ -0,0 +1,94 @@
+import sqlite3
+
+import pytest
+
+from db_backends import FakeInformationSchemaBackend, SQLiteBackend
+from schema_catalog import ColumnInfo, TableInfo
+
+
+@pytest.fixture
+def sqlite_catalog(tmp_path):
+    db_path = str(tmp_path / "shop.sqlite")
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE customers (id INTEGER PRIMARY KEY, email TEXT NOT NULL UNIQUE, created_at TEXT);
+        CREATE TABLE orders (
+            id INTEGER PRIMARY KEY,
+            customer_id INTEGER NOT NULL REFERENCES customers(id),
+            status TEXT DEFAULT 'open',
+            created_at TEXT
+        );
+        CREATE INDEX idx_orders_created ON orders(created_at);
+        CREATE TABLE order_lines (
+            order_id INTEGER REFERENCES orders(id),
+            line_no INTEGER,
+            amount REAL,
+            PRIMARY KEY (order_id, line_no)
+        );
+    """)
+    conn.executemany("INSERT INTO customers (email) VALUES (?)", [(f"c{i}@example.com",) for i in range(5)])
+    conn.commit()
+    conn.close()
+    return SQLiteBackend(db_path).load_catalog()
+
+
+def test_loads_whole_schema_in_four_queries(sqlite_catalog):
+    backend = FakeInformationSchemaBackend("shop").load_from_catalog(sqlite_catalog)
+
+    catalog = backend.load_catalog()
+
+    assert backend.round_trips == 4
+    assert sorted(catalog.table_names) == sorted(sqlite_catalog.table_names)
+
+
+def test_round_trips_columns_keys_and_row_estimates(sqlite_catalog):
+    catalog = FakeInformationSchemaBackend("shop").load_from_catalog(sqlite_catalog).load_catalog()
+
+    for original in sqlite_catalog.tables:
+        loaded = catalog.table(original.name)
+        assert loaded.column_names == original.column_names
+        assert [(c.type, c.not_null) for c in loaded.columns] == [(c.type, c.not_null) for c in original.columns]
+        assert loaded.primary_keys == original.primary_keys
+        assert [(fk.child_column, fk.parent_table, fk.parent_column) for fk in loaded.foreign_keys] == \
+            [(fk.child_column, fk.parent_table, fk.parent_column) for fk in original.foreign_keys]
+        assert loaded.row_estimate == original.row_estimate
+    assert catalog.table("order_lines").primary_keys == ("order_id", "line_no")
+    assert catalog.table("orders").columns[2].default == "'open'"
+
+
+def test_indexes_keep_columns_and_uniqueness(sqlite_catalog):
+    catalog = FakeInformationSchemaBackend("shop").load_from_catalog(sqlite_catalog).load_catalog()
+
+    orders = {index.columns: index.unique for index in catalog.table("orders").indexes}
+    customers = {index.columns: index.unique for index in catalog.table("customers").indexes}
+    assert orders[("created_at",)] is False
+    assert customers[("email",)] is True
+
+
+def test_relationships_match_sqlite(sqlite_catalog):
+    catalog = FakeInformationSchemaBackend("shop").load_from_catalog(sqlite_catalog).load_catalog()
+
+    relationships = catalog.relationships()
+    assert relationships == sqlite_catalog.relationships()
+    assert relationships["customers"]["is_referenced"]
+    assert [r["child_table"] for r in relationships["orders"]["referenced_by"]] == ["order_lines"]
+
+
+def test_rendered_ddl_declares_keys(sqlite_catalog):
+    catalog = FakeInformationSchemaBackend("shop").load_from_catalog(sqlite_catalog).load_catalog()
+
+    ddl = catalog.table("order_lines").ddl
+    assert ddl.startswith("CREATE TABLE `order_lines` (")
+    assert "PRIMARY KEY (`order_id`, `line_no`)" in ddl
+    assert "FOREIGN KEY (`order_id`) REFERENCES `orders`(`id`)" in ddl
+
+
+def test_ignores_other_schemas():
+    backend = FakeInformationSchemaBackend("shop")
+    backend.add_table(TableInfo("mine", "", (ColumnInfo("id", "int", True, None, 1),), ("id",), (), (), 10))
+    other = FakeInformationSchemaBackend("other")
+    other._conn = backend._conn
+    other.add_table(TableInfo("theirs", "", (ColumnInfo("id", "int", True, None, 1),), ("id",), (), (), 10))
+
+    assert backend.load_catalog().table_names == ["mine"]
+    assert other.load_catalog().table_names == ["theirs"]
@@ -0,0 +1,77 @@
+import sqlite3
+from datetime import date
+
+import pytest
+
+from index_advisor import IndexAdvisor, recommended_indexes
+from retention_manager import RetentionClassCode
+from retention_sql import build_retention_predicate
+from schema_catalog import introspect_sqlite
+
+ANALYSIS = {"rcc_classification": {"assigned_rcc": "LEG120"},
+            "retention_analysis": {"retention_lookup_columns": ["created_at"]}}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "advice.sqlite")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE customers (id INTEGER PRIMARY KEY, created_at TEXT);
+        CREATE TABLE orders (id INTEGER PRIMARY KEY, customer_id INTEGER REFERENCES customers(id));
+        CREATE TABLE settings (id INTEGER PRIMARY KEY, created_at TEXT);
+    """)
+    conn.executemany("INSERT INTO customers VALUES (?, '2010-01-01')", [(i,) for i in range(1, 20_001)])
+    conn.executemany("INSERT INTO orders (customer_id) VALUES (?)", [(i,) for i in range(1, 20_001, 7)])
+    conn.executemany("INSERT INTO settings VALUES (?, '2010-01-01')", [(i,) for i in range(1, 50)])
+    conn.commit()
+    conn.close()
+    return path
+
+
+def advise(db_path, *tables):
+    conn = sqlite3.connect(db_path)
+    catalog = introspect_sqlite(conn)
+    conn.close()
+    return IndexAdvisor(min_rows=10_000).advise(db_path, catalog, {name: ANALYSIS for name in tables})
+
+
+def test_small_tables_are_skipped(db_path):
+    assert advise(db_path, "settings")["settings"] == {"status": "skipped", "reason": "fewer than 10000 rows"}
+
+
+def test_plan_is_the_executors_next_chunk_lookup(db_path):
+    advice = advise(db_path, "customers")["customers"]
+
+    assert advice["status"] == "full_scan"
+    # The lookup starts above the last chunk, so without an index it walks the rowid range
+    assert advice["plan"] == ["SEARCH main.customers USING INTEGER PRIMARY KEY (rowid>?)"]
+
+
+def test_unindexed_reference_guard_is_recommended(db_path):
+    advice = advise(db_path, "customers")
+
+    assert [s["sql"] for s in advice["customers"]["guard_indexes"]] == [
+        'CREATE INDEX IF NOT EXISTS "ix_fk_orders_customer_id" ON "orders" ("customer_id")'
+    ]
+    assert "ix_fk_orders_customer_id" in recommended_indexes(advice)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE INDEX ix_orders_customer ON orders(customer_id)")
+    conn.commit()
+    conn.close()
+    assert advise(db_path, "customers")["customers"]["guard_indexes"] == []
+
+
+def test_partial_index_keeps_the_flag_polarity(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE contracts (id INTEGER PRIMARY KEY, created_at TEXT, is_deleted INTEGER)")
+    contracts = introspect_sqlite(conn).table("contracts")
+    conn.close()
+    predicate = build_retention_predicate(RetentionClassCode.LEG460.rule, ["created_at", "is_deleted"],
+                                          date(2030, 1, 1))
+
+    suggestion = IndexAdvisor().suggest_index(contracts, predicate)
+
+    assert suggestion["kind"] == "partial"
+    assert suggestion["where"] == '"is_deleted" = 1'
@@ -0,0 +1,71 @@
+import sqlite3
+from datetime import date
+
+import pytest
+
+from archival_executor import ArchivalExecutor
+from legal_hold import LegalHoldRegistry, coerce_hold_key
+from schema_catalog import load_schema_catalog
+
+REPORT = {
+    "grouped_by_priority": {"g": [
+        {"table_name": "accounts", "intra_group_priority": 1, "purge_order": 0,
+         "rcc_classification": {"assigned_rcc": "ADM150"},
+         "retention_analysis": {"retention_lookup_columns": ["created_at"]}}
+    ]},
+    "table_analysis": {}
+}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "live.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE accounts (code TEXT PRIMARY KEY, created_at TEXT)")
+    conn.executemany("INSERT INTO accounts VALUES (?, '2010-01-01')",
+                     [("42",), ("00042",), ("43",), ("abc",)])
+    conn.execute("CREATE TABLE ledger (id INTEGER PRIMARY KEY, created_at TEXT)")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_integer_hold_protects_text_primary_key(db_path, tmp_path):
+    registry = LegalHoldRegistry(str(tmp_path / "holds.sqlite"), catalog=load_schema_catalog(db_path))
+    registry.place("accounts", [42, "00042"], reason="matter 7")
+    registry.close()
+
+    result = ArchivalExecutor(db_path, str(tmp_path / "archive.sqlite"), as_of=date(2021, 6, 1),
+                              legal_hold_path=str(tmp_path / "holds.sqlite")).run(REPORT)
+
+    assert result["tables"]["accounts"]["rows_archived"] == 2
+    conn = sqlite3.connect(db_path)
+    assert sorted(row[0] for row in conn.execute("SELECT code FROM accounts")) == ["00042", "42"]
+    conn.close()
+
+
+def test_keys_follow_the_column_type(db_path, tmp_path):
+    registry = LegalHoldRegistry(str(tmp_path / "holds.sqlite"), catalog=load_schema_catalog(db_path))
+
+    registry.place("accounts", [42])
+    registry.place("ledger", ["00042", "7"])
+
+    assert registry.screen("accounts", ["42", 42, "0042"]) == {"42", 42}
+    assert registry.is_held("ledger", 42) and registry.is_held("ledger", "7")
+    registry.close()
+
+
+def test_hold_without_key_type_is_refused(db_path, tmp_path):
+    with pytest.raises(ValueError):
+        LegalHoldRegistry(str(tmp_path / "holds.sqlite")).place("accounts", [42])
+    with pytest.raises(ValueError):
+        LegalHoldRegistry(str(tmp_path / "holds.sqlite"), catalog=load_schema_catalog(db_path)).place("missing", [1])
+
+
+@pytest.mark.parametrize("key, affinity, stored", [
+    (42, "TEXT", "42"), ("00042", "TEXT", "00042"), ("00042", "INTEGER", 42), ("42.0", "NUMERIC", 42),
+    ("4.5", "REAL", 4.5), ("abc", "INTEGER", "abc"), ("42", "BLOB", "42"), (42.0, "BLOB", 42),
+])
+def test_coerce_hold_key(key, affinity, stored):
+    assert coerce_hold_key(key, affinity) == stored
+    assert type(coerce_hold_key(key, affinity)) is type(stored)
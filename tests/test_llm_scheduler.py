@@ -0,0 +1,117 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from llm_scheduler import LLMScheduler, retry_after_seconds
+
+
+class FakeProvider(BaseHTTPRequestHandler):
+    """Local stand-in for an LLM endpoint: answers 429 with Retry-After for the first ``fail_first`` requests"""
+
+    fail_first = 0
+    retry_after = "0.05"
+    hits = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with FakeProvider.lock:
+            FakeProvider.hits += 1
+            limited = FakeProvider.hits <= FakeProvider.fail_first
+        if limited:
+            body = b'{"error": {"message": "Rate limit reached"}}'
+            self.send_response(429)
+            self.send_header("Retry-After", FakeProvider.retry_after)
+        else:
+            body = json.dumps({"content": "ok"}).encode()
+            self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def provider():
+    FakeProvider.hits = 0
+    FakeProvider.fail_first = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeProvider)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1/chat"
+    server.shutdown()
+    server.server_close()
+
+
+def post(url):
+    request = urllib.request.Request(url, data=b'{"prompt": "hi"}', headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return json.loads(response.read())
+
+
+def test_retries_rate_limited_calls_after_retry_after(provider):
+    FakeProvider.fail_first = 2
+    scheduler = LLMScheduler(max_concurrency=4, base_backoff=0.01)
+
+    assert scheduler.run(lambda: post(provider)) == {"content": "ok"}
+
+    stats = scheduler.stats()
+    assert FakeProvider.hits == 3
+    assert stats["retries"] == 2
+    assert stats["rate_limited"] == 2
+    assert stats["failures"] == 0
+    # Halved once per 429, then one success grows it by 1/limit
+    assert stats["concurrency_limit"] == pytest.approx(1 + 1 / 1.0)
+
+
+def test_retry_after_header_is_read_from_http_error(provider):
+    FakeProvider.fail_first = 1
+    with pytest.raises(urllib.error.HTTPError) as error:
+        post(provider)
+    assert error.value.code == 429
+    assert retry_after_seconds(error.value) == pytest.approx(0.05)
+
+
+def test_rate_limit_drains_both_buckets(provider):
+    FakeProvider.fail_first = 1
+    scheduler = LLMScheduler(requests_per_minute=6000, tokens_per_minute=600_000, base_backoff=0.01)
+
+    scheduler.run(lambda: post(provider), estimated_tokens=100)
+
+    # Both buckets were emptied by the 429 and have refilled only briefly since
+    assert scheduler.request_bucket.available < scheduler.request_bucket.capacity / 2
+    assert scheduler.token_bucket.available < scheduler.token_bucket.capacity / 2
+
+
+def test_gives_up_after_max_retries(provider):
+    FakeProvider.fail_first = 100
+    scheduler = LLMScheduler(max_retries=2, base_backoff=0.01)
+
+    with pytest.raises(urllib.error.HTTPError):
+        scheduler.run(lambda: post(provider))
+    assert FakeProvider.hits == 3
+    assert scheduler.stats()["failures"] == 1
+
+
+def test_concurrent_calls_stay_within_limit(provider):
+    scheduler = LLMScheduler(max_concurrency=2, base_backoff=0.01)
+    peak = []
+
+    def call():
+        peak.append(scheduler.in_flight)
+        return post(provider)
+
+    threads = [threading.Thread(target=scheduler.run, args=(call,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert FakeProvider.hits == 8
+    assert max(peak) <= 2
@@ -0,0 +1,20 @@
+from purge_scheduler import group_jobs
+
+REPORT = {"grouped_by_priority": {"audit": [{"table_name": "a"}], "orders": [{"table_name": "o"}], "empty": []}}
+
+
+def test_job_ids_carry_the_run_date():
+    tonight = group_jobs("/data/shop.sqlite", "/data/archive.sqlite", REPORT, "/data/journal.sqlite",
+                         run_id="2026-10-16")
+    tomorrow = group_jobs("/data/shop.sqlite", "/data/archive.sqlite", REPORT, "/data/journal.sqlite",
+                          run_id="2026-10-17")
+
+    assert [job["job_id"] for job in tonight] == ["shop.sqlite:2026-10-16:audit", "shop.sqlite:2026-10-16:orders"]
+    assert {job["job_id"] for job in tonight}.isdisjoint(job["job_id"] for job in tomorrow)
+
+
+def test_unjournaled_jobs_have_no_id():
+    jobs = group_jobs("/data/shop.sqlite", "/data/archive.sqlite", REPORT)
+
+    assert [job["group"] for job in jobs] == ["audit", "orders"]
+    assert all(job["job_id"] is None for job in jobs)
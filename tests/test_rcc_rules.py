@@ -0,0 +1,40 @@
+import pytest
+
+from rcc_rules import RuleBasedRCCClassifier, normalize_table_name
+
+SCHEMA = "CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT, created_at TEXT)"
+
+
+@pytest.mark.parametrize("table_name", ["audit_log", "app_logs", "AccessLog", "login_audit", "debug_trace"])
+def test_log_tables_are_audit_logs(table_name):
+    result = RuleBasedRCCClassifier().classify(table_name, SCHEMA)
+
+    assert result is not None
+    assert result["assigned_rcc"] == "ADM150"
+
+
+@pytest.mark.parametrize("table_name", [
+    "catalog", "product_catalog", "catalog_items", "blog_posts", "technology_stack", "dialogue",
+    "contactless_cards", "personal_settings", "policyholders", "transactional_outbox",
+])
+def test_substrings_of_other_words_do_not_match(table_name):
+    classifier = RuleBasedRCCClassifier()
+
+    result = classifier.classify(table_name, SCHEMA)
+
+    assert result is None or result["assigned_rcc"] != "ADM150"
+    # Only the column hints score, never the name
+    assert max(classifier.score_table(table_name, SCHEMA).values()) < classifier.name_weight
+
+
+def test_whole_words_of_compound_names_match():
+    scores = RuleBasedRCCClassifier().score_table("customer_payments", SCHEMA)
+
+    assert scores["CFA340"] >= 0.7
+    assert scores["BNK460"] >= 0.7
+
+
+def test_normalize_table_name():
+    assert normalize_table_name("AuditLog") == "audit_log"
+    assert normalize_table_name("audit-logs") == "audit_logs"
+    assert normalize_table_name("Order Lines") == "order_lines"
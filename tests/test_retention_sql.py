@@ -0,0 +1,206 @@
+import sqlite3
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional
+
+import pytest
+
+from column_profiler import quote_identifier
+from retention_manager import RetentionManager, RetentionRule, RetentionType
+from retention_sql import (INACTIVE_TEXT_VALUES, SET_TEXT_VALUES, build_expiry_expression,
+                           build_retention_predicate, predicate_for_table)
+
+UNIX_EPOCH_JULIAN_DAY = 2440587.5
+
+ANCHORS = [
+    "2016-02-28", "2016-02-29", "2016-03-01", "2016-02-29 12:30:00", "2016-02-29T23:59:59",
+    "2017-02-28", "2017-03-01", "2019-02-28", "2019-03-01", "2020-02-29", "2010-06-15 08:00",
+    None, "", "not a date", "2016-13-45"
+]
+INT_FLAGS = [0, 1, None]
+TEXT_FLAGS = ["inactive", "No", "active", None]
+AS_OF_DATES = [date(2023, 2, 28), date(2023, 3, 1), date(2023, 3, 2), date(2024, 2, 29), date(2027, 3, 1)]
+
+UNIX_PROFILE = {"columns": {"created_ts": {"kinds": {"integer": 1.0}, "min": 1_000_000_000,
+                                           "distinct_estimate": 1000}}}
+TEXT_FLAG_PROFILE = {"columns": {"active_state": {"kinds": {"text": 1.0}}}}
+DELETED_TEXT_PROFILE = {"columns": {"deleted_state": {"kinds": {"text": 1.0}}}}
+
+CASES = [
+    ("creation_iso", RetentionType.CREATION_BASED, ["created_at"], None),
+    ("creation_unix", RetentionType.CREATION_BASED, ["created_ts"], UNIX_PROFILE),
+    ("active_int_flag", RetentionType.ACTIVE_PLUS, ["created_at", "is_active"], None),
+    ("active_text_flag", RetentionType.ACTIVE_PLUS, ["created_at", "active_state"], TEXT_FLAG_PROFILE),
+    ("deleted_int_flag", RetentionType.ACTIVE_PLUS, ["created_at", "is_deleted"], None),
+    ("deleted_text_flag", RetentionType.ACTIVE_PLUS, ["created_at", "deleted_state"], DELETED_TEXT_PROFILE),
+    ("event", RetentionType.EVENT_BASED, ["created_at", "terminated_at"], None),
+]
+
+
+def _parse_anchor(value, encoding: str) -> Optional[datetime]:
+    """Python counterpart of julianday_sql for the formats SQLite's date functions accept here"""
+    if value is None or isinstance(value, bytes):
+        return None
+    try:
+        if encoding == "unix_seconds":
+            return datetime(1970, 1, 1) + timedelta(seconds=float(value))
+        if encoding == "unix_millis":
+            return datetime(1970, 1, 1) + timedelta(seconds=float(value) / 1000.0)
+        if isinstance(value, (int, float)):
+            # julianday() reads a bare number as a julian day number
+            return datetime(1970, 1, 1) + timedelta(days=float(value) - UNIX_EPOCH_JULIAN_DAY)
+        text = value.strip()
+        for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M", "%Y-%m-%d"):
+            try:
+                return datetime.strptime(text, fmt)
+            except ValueError:
+                continue
+    except (ValueError, OverflowError):
+        return None
+    return None
+
+
+def _add_years(anchor: datetime, years: int) -> datetime:
+    """SQLite's '+N years': keep month and day, letting 29 February overflow into 1 March"""
+    try:
+        return anchor.replace(year=anchor.year + years)
+    except ValueError:
+        return anchor.replace(year=anchor.year + years, day=28) + timedelta(days=1)
+
+
+def python_expiry(expression: Dict, row: Dict) -> Optional[float]:
+    """Reference implementation of build_expiry_expression for one row"""
+    if expression["flag_column"]:
+        flag = row.get(expression["flag_column"])
+        if expression["flag_text"]:
+            values = SET_TEXT_VALUES if expression["flag_inactive_when_set"] else INACTIVE_TEXT_VALUES
+            inactive = flag is not None and str(flag).lower() in values
+        else:
+            inactive = isinstance(flag, (int, float)) and flag == int(expression["flag_inactive_when_set"])
+        if not inactive:
+            return None
+    anchor = _parse_anchor(row.get(expression["date_column"]), expression["date_encoding"])
+    if anchor is None:
+        return None
+    expiry = _add_years(anchor, expression["years"])
+    return (expiry - datetime(1970, 1, 1)).total_seconds() / 86400.0 + UNIX_EPOCH_JULIAN_DAY
+
+
+def differential_check(conn: sqlite3.Connection, table_name: str, expression: Dict) -> Dict:
+    """Compare the SQL expiry with python_expiry on every row; returns mismatching examples"""
+    columns = [expression["date_column"]] + ([expression["flag_column"]] if expression["flag_column"] else [])
+    selected = ", ".join(quote_identifier(c) for c in columns)
+    cursor = conn.execute(f"SELECT {selected}, {expression['sql']} FROM {quote_identifier(table_name)}",
+                          expression["params"])
+    checked = 0
+    mismatches = []
+    for values in cursor:
+        checked += 1
+        row = dict(zip(columns, values))
+        expected = python_expiry(expression, row)
+        actual = values[-1]
+        same = (expected is None and actual is None) or (
+            expected is not None and actual is not None and abs(expected - actual) < 1e-6)
+        if not same:
+            mismatches.append({"row": row, "sql": actual, "python": expected})
+    return {"checked": checked, "mismatches": mismatches}
+
+
+def julian(day: date) -> float:
+    return (day - date(1970, 1, 1)).days + UNIX_EPOCH_JULIAN_DAY
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE records (id INTEGER PRIMARY KEY, created_at TEXT, created_ts INTEGER, "
+                 "terminated_at TEXT, is_active INTEGER, active_state TEXT, is_deleted INTEGER, "
+                 "deleted_state TEXT)")
+    rows = []
+    for anchor in ANCHORS:
+        parsed = _parse_anchor(anchor, "iso_text")
+        created_ts = int((parsed - datetime(1970, 1, 1)).total_seconds()) if parsed else None
+        for int_flag in INT_FLAGS:
+            for text_flag in TEXT_FLAGS:
+                deleted = None if int_flag is None else 1 - int_flag
+                deleted_state = {"active": "no", "inactive": "yes", "No": "1"}.get(text_flag)
+                rows.append((anchor, created_ts, anchor if int_flag == 0 else None, int_flag, text_flag,
+                             deleted, deleted_state))
+    conn.executemany("INSERT INTO records (created_at, created_ts, terminated_at, is_active, active_state, "
+                     "is_deleted, deleted_state) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize("label, retention_type, lookup_columns, profile", CASES)
+def test_expiry_expression_matches_reference(conn, label, retention_type, lookup_columns, profile):
+    expression = build_expiry_expression(RetentionRule(7, retention_type, label), lookup_columns, profile)
+
+    check = differential_check(conn, "records", expression)
+
+    assert check["checked"] == len(ANCHORS) * len(INT_FLAGS) * len(TEXT_FLAGS)
+    assert check["mismatches"] == []
+
+
+@pytest.mark.parametrize("label, retention_type, lookup_columns, profile", CASES)
+def test_predicate_selects_exactly_the_expired_rows(conn, label, retention_type, lookup_columns, profile):
+    rule = RetentionRule(7, retention_type, label)
+    expression = build_expiry_expression(rule, lookup_columns, profile)
+    columns = [expression["date_column"]] + ([expression["flag_column"]] if expression["flag_column"] else [])
+    rows = {row[0]: dict(zip(columns, row[1:])) for row in conn.execute(
+        f"SELECT id, {', '.join(quote_identifier(c) for c in columns)} FROM records")}
+
+    for as_of in AS_OF_DATES:
+        predicate = build_retention_predicate(rule, lookup_columns, as_of, profile)
+        selected = {row[0] for row in conn.execute(f"SELECT id FROM records WHERE {predicate['sql']}",
+                                                   predicate["params"])}
+        expected = {row_id for row_id, row in rows.items()
+                    if (python_expiry(expression, row) or float("inf")) < julian(as_of)}
+        assert selected == expected, as_of
+
+
+def test_leap_day_rows_expire_on_first_of_march(conn):
+    rule = RetentionRule(7, RetentionType.CREATION_BASED, "creation")
+
+    def purged_anchors(as_of):
+        predicate = build_retention_predicate(rule, ["created_at"], as_of)
+        return {row[0] for row in conn.execute(
+            f"SELECT DISTINCT created_at FROM records WHERE {predicate['sql']}", predicate["params"])}
+
+    assert "2016-02-29" not in purged_anchors(date(2023, 3, 1))
+    assert "2016-02-28" in purged_anchors(date(2023, 3, 1))
+    assert "2016-02-29" in purged_anchors(date(2023, 3, 2))
+
+
+def test_event_based_rule_anchors_on_the_event_date(conn):
+    rule = RetentionRule(5, RetentionType.EVENT_BASED, "event")
+
+    expression = build_expiry_expression(rule, ["created_at", "terminated_at"])
+    predicate = build_retention_predicate(rule, ["created_at", "terminated_at"], date(2030, 1, 1))
+
+    assert expression["date_column"] == predicate["date_column"] == "terminated_at"
+    assert "created_at" not in predicate["sql"]
+    assert conn.execute(f"SELECT count(*) FROM records WHERE terminated_at IS NULL AND {predicate['sql']}",
+                        predicate["params"]).fetchone()[0] == 0
+    assert build_expiry_expression(rule, ["created_at"]) is None
+    assert build_retention_predicate(rule, ["created_at"]) is None
+
+
+def test_deleted_flag_selects_only_deleted_rows(conn):
+    rule = RetentionRule(10, RetentionType.ACTIVE_PLUS, "contracts")
+
+    predicate = build_retention_predicate(rule, ["created_at", "is_deleted"], date(2040, 1, 1))
+
+    assert predicate["flag_clause"] == '"is_deleted" = 1'
+    flags = {row[0] for row in conn.execute(f"SELECT DISTINCT is_deleted FROM records WHERE {predicate['sql']}",
+                                            predicate["params"])}
+    assert flags == {1}
+
+
+def test_flag_of_unknown_polarity_is_not_guessed():
+    manager = RetentionManager()
+
+    predicate, reason = predicate_for_table(manager, ["id", "created_at", "status_flag"], "LEG460",
+                                            ["created_at", "status_flag"])
+
+    assert predicate is None
+    assert "status_flag" in reason
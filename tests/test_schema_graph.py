@@ -0,0 +1,47 @@
+from schema_graph import find_cross_group_edges, merge_fk_linked_groups
+
+
+def fk(parent, column="id"):
+    return {"parent_table": parent, "child_column": column, "parent_column": "id"}
+
+
+RELATIONSHIPS = {
+    "customers": {"foreign_keys": []},
+    "orders": {"foreign_keys": [fk("customers", "customer_id")]},
+    "order_lines": {"foreign_keys": [fk("orders", "order_id")]},
+    "shipments": {"foreign_keys": [fk("orders", "order_id")]},
+    "audit_log": {"foreign_keys": []},
+}
+
+
+def apply(table_groups, renames):
+    return {t: renames.get(g, g) for t, g in table_groups.items()}
+
+
+def test_groups_split_by_a_foreign_key_are_merged():
+    # An incremental run put the new child table in a group of its own
+    table_groups = {"customers": "SALES", "orders": "SALES", "order_lines": "SALES",
+                    "shipments": "LOGISTICS", "audit_log": "AUDIT"}
+
+    renames = merge_fk_linked_groups(table_groups, RELATIONSHIPS)
+
+    assert renames == {"LOGISTICS": "SALES"}
+    assert find_cross_group_edges(apply(table_groups, renames), RELATIONSHIPS) == []
+
+
+def test_kept_groups_survive_a_merge():
+    table_groups = {"customers": "CRM", "orders": "ORDERS", "order_lines": "ORDERS",
+                    "shipments": "ORDERS", "audit_log": "AUDIT"}
+
+    renames = merge_fk_linked_groups(table_groups, RELATIONSHIPS, keep={"CRM"})
+
+    assert renames == {"ORDERS": "CRM"}
+
+
+def test_groups_linked_through_a_chain_merge_into_one():
+    table_groups = {"customers": "A", "orders": "B", "order_lines": "C", "shipments": "B", "audit_log": "D"}
+
+    merged = apply(table_groups, merge_fk_linked_groups(table_groups, RELATIONSHIPS))
+
+    assert len({merged[t] for t in ("customers", "orders", "order_lines", "shipments")}) == 1
+    assert merged["audit_log"] == "D"